@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.api import market
+from src.api import market, stream
 
 import os
 
@@ -25,6 +25,7 @@ app.add_middleware(
 )
 
 app.include_router(market.router, prefix="/api/v1")
+app.include_router(stream.router)
 
 @app.get("/")
 async def root():
@@ -32,4 +33,14 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "frame_cache": market.frame_cache.stats(),
+        "executors": market.executor.stats()
+    }
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stream.shutdown()
+    market.executor.shutdown()
+    market.optimizer_pool.shutdown()
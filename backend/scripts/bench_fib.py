@@ -0,0 +1,59 @@
+import sys
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.indicators import Indicators, FIB_BOUNCE_LEVELS
+
+def loop_signal(df, tolerance=0.005):
+    # Previous SignalAggregator._calc_fib_signal: one pass of full-length temporaries per level
+    tol = df['close'] * tolerance
+    bull = np.zeros(len(df))
+    bear = np.zeros(len(df))
+    for level in FIB_BOUNCE_LEVELS:
+        touched = (df['low'] <= df[level] + tol) & (df['low'] >= df[level] - tol)
+        bull = np.where(touched & (df['close'] > df[level]), 1, bull)
+        touched_upper = (df['high'] >= df[level] - tol) & (df['high'] <= df[level] + tol)
+        bear = np.where(touched_upper & (df['close'] < df[level]), -1, bear)
+    combined = np.where(bull != 0, bull, bear)
+    return np.where(combined != 0, combined, np.where(df['close'] > df['Fib_500'], 0.5, -0.5))
+
+def kernel_signal(indicators, df, tolerance=0.005):
+    interaction = indicators.check_fib_interaction(tolerance)
+    return np.where(interaction != 0, interaction, np.where(df['close'].to_numpy() > df['Fib_500'].to_numpy(), 0.5, -0.5))
+
+def measure(fn, repeat=20):
+    fn() # Warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main(timeframe='1h'):
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    df = pd.read_csv(os.path.join(base_dir, 'data', f'BTCUSDT_{timeframe}.csv'), index_col='timestamp', parse_dates=True)
+    indicators = Indicators(df)
+    df = indicators.add_all_indicators()
+    print(f"{len(df)} {timeframe} bars, {len(FIB_BOUNCE_LEVELS)} levels")
+
+    ref, ref_sec, ref_peak = measure(lambda: loop_signal(df))
+    new, new_sec, new_peak = measure(lambda: kernel_signal(indicators, df))
+    assert np.array_equal(ref, new), "Signals differ"
+    print(f"loop:   {ref_sec * 1000:7.2f} ms  peak {ref_peak / 1e6:6.2f} MB")
+    print(f"kernel: {new_sec * 1000:7.2f} ms  peak {new_peak / 1e6:6.2f} MB")
+    print(f"speedup {ref_sec / new_sec:.1f}x, memory {ref_peak / new_peak:.1f}x less")
+
+if __name__ == "__main__":
+    # Usage: python scripts/bench_fib.py [timeframe]
+    main(*sys.argv[1:2])
@@ -6,19 +6,22 @@ import os
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.data_loader import DataLoader
+from src.data_loader import FetchScheduler
 
-async def main():
-    timeframes = ['1h', '2h', '4h']
-    for tf in timeframes:
-        print(f"Fetching/Verifying data for {tf}...")
-        loader = DataLoader(timeframe=tf)
-        df = await loader.fetch_data(years=4)
-        if not df.empty:
-            loader.save_data(df)
-            print(f"[{tf}] Saved {len(df)} rows.")
+async def main(symbols):
+    # Only the 1h base is fetched; 2h/4h/... are derived from it on load
+    jobs = [(symbol, '1h') for symbol in symbols]
+    print(f"Syncing {len(jobs)} series...")
+    async with FetchScheduler() as scheduler:
+        results = await scheduler.run(jobs, years=4)
+    for (symbol, tf), df in results.items():
+        if isinstance(df, Exception):
+            print(f"[{symbol} {tf}] Failed: {df}")
+        elif not df.empty:
+            print(f"[{symbol} {tf}] {len(df)} rows stored, last candle {df.index[-1]}.")
         else:
-            print(f"[{tf}] No data found.")
+            print(f"[{symbol} {tf}] No data found.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Usage: python scripts/fetch_all_data.py [SYMBOL ...], e.g. BTC/USDT ETH/USDT
+    asyncio.run(main(sys.argv[1:] or ['BTC/USDT']))
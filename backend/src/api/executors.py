@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+
+class Route:
+    """
+    Concurrency limit, timeout and counters of one route on the execution layer.
+    """
+    def __init__(self, name, executor, limit, timeout, max_queue):
+        self.name = name
+        self.executor = executor
+        self.limit = limit
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self._semaphore = None
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.errors = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.busy_sec = 0.0
+        self.max_wait_sec = 0.0
+
+    @property
+    def semaphore(self):
+        # Created on first use so it binds to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    def stats(self):
+        return {
+            "executor": self.executor,
+            "limit": self.limit,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_ms": round(self.busy_sec / self.completed * 1000, 2) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait_sec * 1000, 2)
+        }
+
+
+class ExecutionLayer:
+    """
+    Runs blocking route work (pandas, indicator and backtest code, SDK calls)
+    on bounded thread pools so the event loop stays free.
+    Each registered route has its own concurrency limit, a cap on queued
+    requests (503 beyond it) and a timeout covering queueing and execution (504).
+    """
+    def __init__(self, cpu_workers=None, io_workers=16):
+        self.executors = {
+            # NumPy, pandas and the numba kernels release the GIL for most of their work
+            "cpu": ThreadPoolExecutor(max_workers=cpu_workers or max(2, os.cpu_count() or 1), thread_name_prefix="cpu"),
+            "io": ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io")
+        }
+        self.routes = {}
+
+    def register(self, name, executor="cpu", limit=2, timeout=30.0, max_queue=32):
+        self.routes[name] = Route(name, executor, limit, timeout, max_queue)
+
+    async def run(self, name, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) on the route's executor and returns its result.
+        """
+        route = self.routes[name]
+        loop = asyncio.get_running_loop()
+        queued_at = loop.time()
+        if route.semaphore.locked():
+            if route.waiting >= route.max_queue:
+                route.rejected += 1
+                raise HTTPException(status_code=503, detail=f"{name} is busy, retry later")
+            route.waiting += 1
+            try:
+                await asyncio.wait_for(route.semaphore.acquire(), route.timeout)
+            except asyncio.TimeoutError:
+                route.timeouts += 1
+                raise HTTPException(status_code=503, detail=f"{name} queue wait exceeded {route.timeout}s")
+            finally:
+                route.waiting -= 1
+        else:
+            await route.semaphore.acquire() # Free slot: returns immediately
+        started_at = loop.time()
+        route.max_wait_sec = max(route.max_wait_sec, started_at - queued_at)
+
+        route.running += 1
+        future = loop.run_in_executor(self.executors[route.executor], functools.partial(fn, *args, **kwargs))
+
+        def release(_):
+            # The slot is held until the work really ends, even after a timeout
+            route.running -= 1
+            route.semaphore.release()
+        future.add_done_callback(release)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), route.timeout - (started_at - queued_at))
+        except asyncio.TimeoutError:
+            route.timeouts += 1
+            raise HTTPException(status_code=504, detail=f"{name} timed out after {route.timeout}s")
+        except Exception:
+            route.errors += 1
+            raise
+        route.completed += 1
+        route.busy_sec += loop.time() - started_at
+        return result
+
+    def stats(self):
+        return {name: route.stats() for name, route in self.routes.items()}
+
+    def shutdown(self):
+        for pool in self.executors.values():
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,30 @@
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
 import pandas as pd
 import os
+import json
 from ..core.indicators import Indicators
-from ..core.strategy import SignalAggregator
+from ..core.strategy import SignalAggregator, UnumScorer, SIGNALS, MTF_TREND_PREFIX
 from ..core.backtest import Backtester
+from ..core.sweep import ParameterSweep
+from ..core.portfolio import PortfolioBacktester, panel, SIZING_MODES
+from ..core.metrics import rolling_metrics
+from ..core.robustness import (
+    SIM_METHODS, simulate, point_metrics, trade_returns, trades_per_year, robustness_report
+)
+from ..core.optimizer import OptimizerPool, simplex_weights, weight_candidates
+from ..core.search import Search, SearchSpace, SearchJob, SESSION_CHOICES
+from ..core.validation import ValidationJob, walk_forward_splits, purged_kfold_splits, EMBARGO_BARS, RANK_METRICS
+from ..core.cache import FrameCache
+from ..storage import OHLCVStore
+from ..timeframes import TimeframeStore
+from ..core.periods import periods_per_year, infer_period
+from .executors import ExecutionLayer
+from .serialization import (
+    NumpyJSONResponse, ARROW_MEDIA_TYPE, check_format, select_frame, to_records, to_columns, to_arrow
+)
+import numpy as np
 
 router = APIRouter()
 
@@ -14,59 +34,125 @@ if not os.path.exists(DATA_DIR):
     # Fallback for local development
     DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data")
 
-def load_data(timeframe):
-    filename = f"BTCUSDT_{timeframe}.csv"
-    filepath = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(filepath):
-        raise HTTPException(status_code=404, detail=f"Data for {timeframe} not found")
-    
-    df = pd.read_csv(filepath, index_col='timestamp', parse_dates=True)
-    return df
+SYMBOL = "BTCUSDT"
+# Storage dtype of the cached indicator columns; float32 halves the cache footprint
+INDICATOR_DTYPE = np.dtype(os.getenv("INDICATOR_DTYPE", "float64"))
+
+store = OHLCVStore(DATA_DIR)
+frame_cache = FrameCache(max_bytes=int(os.getenv("FRAME_CACHE_MB", "512")) * 1024 * 1024)
+# Blocking route work runs here, off the event loop; limits and timeouts are per route
+executor = ExecutionLayer(cpu_workers=int(os.getenv("CPU_WORKERS", "0")) or None)
+executor.register("market-data", limit=4, timeout=30)
+executor.register("latest-signal", limit=4, timeout=30)
+executor.register("backtest", limit=2, timeout=60)
+executor.register("sweep", limit=1, timeout=300, max_queue=4)
+executor.register("portfolio", limit=1, timeout=120, max_queue=4)
+executor.register("robustness", limit=1, timeout=120, max_queue=4)
+executor.register("optimize", limit=1, timeout=60, max_queue=4)
+executor.register("ai-analysis", limit=2, timeout=30)
+executor.register("gemini", executor="io", limit=4, timeout=60)
+
+# Only the 1h base is stored; higher timeframes are aggregated from it on demand
+timeframes = TimeframeStore(store, cache=frame_cache)
+
+def load_data(timeframe, symbol=SYMBOL):
+    """
+    Loads OHLCV from the binary store (memory-mapped, no date parsing),
+    deriving timeframes above the base by resampling.
+    """
+    try:
+        return timeframes.load(symbol, timeframe)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        detail = f"Data for {timeframe} not found" if symbol == SYMBOL else f"Data for {symbol} {timeframe} not found"
+        raise HTTPException(status_code=404, detail=detail)
+
+def load_indicator_frame(timeframe, params: dict = None, symbol=SYMBOL):
+    """
+    OHLCV + indicators from the shared frame cache, keyed by
+    (symbol, timeframe, data version, indicator params).
+    Callers get a shallow copy and may add columns freely.
+    """
+    load_data(timeframe, symbol) # 404 early; imports a newer CSV if present
+    version = timeframes.version(symbol, timeframe) # Before the data (see TimeframeStore.version)
+    params_key = json.dumps(params or {}, sort_keys=True)
+    return frame_cache.get_or_compute(
+        (symbol, timeframe, version, params_key),
+        # OHLCV buffers are shared with the store (copy-on-write), only indicator columns are allocated
+        lambda: Indicators(load_data(timeframe, symbol), copy=False, dtype=INDICATOR_DTYPE).add_all_indicators(params),
+        group=(symbol, timeframe, params_key)
+    )
+
+# Other timeframes whose trend confirms the score (see SignalAggregator.confirm_signal_mtf)
+CONFIRMATION_TIMEFRAMES = {'4h': ('1h',)}
+
+def load_confirmation_frames(timeframe, symbol=SYMBOL):
+    """
+    Cached indicator frames of the confirmation timeframes of `timeframe` that have data.
+    """
+    frames = {}
+    for other in CONFIRMATION_TIMEFRAMES.get(timeframe, ()):
+        try:
+            frames[other] = load_indicator_frame(other, symbol=symbol)
+        except HTTPException:
+            pass
+    return frames
+
+def load_scorer(timeframe, symbol=SYMBOL):
+    """
+    UnumScorer of the cached indicator frame (stacked signals, filters, regimes
+    and confirmation), cached per data version: scoring new weights skips all
+    indicator and signal work.
+    """
+    load_data(timeframe, symbol) # 404 early
+    version = timeframes.version(symbol, timeframe) # Before the data (see TimeframeStore.version)
+    frame = frame_cache.get_or_compute(
+        ('scorer', symbol, timeframe, version),
+        lambda: SignalAggregator(load_indicator_frame(timeframe, symbol=symbol),
+                                 other_dfs=load_confirmation_frames(timeframe, symbol),
+                                 inplace=False).scorer().to_frame(),
+        group=('scorer', symbol, timeframe)
+    )
+    return UnumScorer.from_frame(frame)
 
 @router.get("/market-data/{timeframe}")
-async def get_market_data(timeframe: str):
+async def get_market_data(
+    timeframe: str,
+    format: str = "records", # records | columns | arrow
+    columns: str = None, # Comma-separated projection, e.g. "close,unum_score"
+    limit: int = 500,
+    since: str = None # ISO timestamp of the first candle
+):
     """
     Returns historical data with indicators and Unum score.
     """
-    if timeframe not in ['1h', '2h', '4h']:
+    if not timeframes.supports(timeframe):
         raise HTTPException(status_code=400, detail="Invalid timeframe")
-    
+    check_format(format)
+    return await executor.run("market-data", _market_data, timeframe, format, columns, limit, since)
+
+def _market_data(timeframe, format, columns, limit, since):
     try:
-        df = load_data(timeframe)
-        
-        # Calculate Indicators
-        indicators = Indicators(df)
-        df = indicators.add_all_indicators()
+        # Indicators (cached per data version)
+        df = load_indicator_frame(timeframe)
         
         # Calculate Strategy Score
-        other_dfs = {}
-        if timeframe == '4h':
-            # Load 1h for confirmation if available
-            try:
-                other_dfs['1h'] = load_data('1h')
-            except:
-                pass
-                
-        strategy = SignalAggregator(df, other_dfs=other_dfs)
+        strategy = SignalAggregator(df, other_dfs=load_confirmation_frames(timeframe))
         strategy.calculate_unum_score()
         market_state = strategy.state.value if hasattr(strategy, 'state') else "unknown"
         
-        # Limit to last 500 candles for performance
-        df_recent = df.tail(500).reset_index()
-        
-        # Add market state to the latest row
-        results = df_recent.to_dict(orient='records')
-        
-        # Process data to handle NaN values (replace with None for JSON)
-        clean_results = []
-        for row in results:
-            clean_row = {k: (None if pd.isna(v) else v) for k, v in row.items()}
-            ts = row['timestamp']
-            clean_row['timestamp'] = ts.isoformat() if hasattr(ts, 'isoformat') else str(ts)
-            clean_row['market_state'] = market_state
-            clean_results.append(clean_row)
-            
-        return clean_results
+        df_recent = select_frame(df, columns, limit, since)
+        if format == "arrow":
+            return Response(to_arrow(df_recent, {"market_state": market_state}), media_type=ARROW_MEDIA_TYPE)
+        if format == "columns":
+            return NumpyJSONResponse({"market_state": market_state, "data": to_columns(df_recent)})
+        # Row format (used by the dashboard) carries the market state of every row
+        if strategy.regimes is None:
+            return NumpyJSONResponse(to_records(df_recent, {"market_state": market_state}))
+        return NumpyJSONResponse(to_records(df_recent.assign(market_state=strategy.regimes.loc[df_recent.index])))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -75,17 +161,12 @@ async def get_latest_signal():
     """
     Returns the most recent Unum signal for 4h timeframe.
     """
+    return await executor.run("latest-signal", _latest_signal)
+
+def _latest_signal():
     try:
-        df = load_data('4h')
-        other_dfs = {}
-        try:
-            other_dfs['1h'] = load_data('1h')
-        except:
-            pass
-            
-        indicators = Indicators(df)
-        df = indicators.add_all_indicators()
-        strategy = SignalAggregator(df, other_dfs=other_dfs)
+        df = load_indicator_frame('4h')
+        strategy = SignalAggregator(df, other_dfs=load_confirmation_frames('4h'))
         strategy.calculate_unum_score()
         
         latest = df.iloc[-1]
@@ -102,6 +183,8 @@ async def get_latest_signal():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+EXECUTION_MODES = ('close', 'intrabar')
+
 @router.get("/backtest")
 async def run_backtest_endpoint(
     trend_w: float = 0.4,
@@ -113,115 +196,520 @@ async def run_backtest_endpoint(
     tp_pct: float = 0.03,
     trailing_sl_pct: float = 0.015,
     skip_weekends: bool = True,
-    sessions: str = None # Comma-separated: "asian,european"
+    sessions: str = None, # Comma-separated: "asian,european"
+    format: str = "records", # chart_data as records | columns | arrow
+    columns: str = None, # Comma-separated chart_data projection
+    limit: int = 500,
+    since: str = None,
+    execution: str = "close", # close | intrabar (high/low fills, resolved on 1h candles)
+    rolling_window: int = None # Bars per rolling-metrics window (default: 30 days)
 ):
+    check_format(format)
+    if execution not in EXECUTION_MODES:
+        raise HTTPException(status_code=400, detail=f"execution must be one of {', '.join(EXECUTION_MODES)}")
+    if rolling_window is not None and rolling_window < 2:
+        raise HTTPException(status_code=400, detail="rolling_window must be at least 2 bars")
+    weights = {'trend': trend_w, 'volume_levels': vol_w, 'momentum': mom_w}
+    backtest_params = {
+        'long_threshold': long_t,
+        'short_threshold': short_t,
+        'sl_pct': sl_pct,
+        'tp_pct': tp_pct,
+        'trailing_sl_pct': trailing_sl_pct,
+        'skip_weekends': skip_weekends,
+        'allowed_sessions': sessions.split(",") if sessions else None,
+        'execution': execution
+    }
+    return await executor.run("backtest", _backtest, weights, backtest_params, format, columns, limit, since,
+                              rolling_window)
+
+# Default rolling-metrics window
+ROLLING_DAYS = 30
+
+def _backtest(weights, backtest_params, format, columns, limit, since, rolling_window=None):
     try:
-        df = load_data("4h")
-        indicators = Indicators(df)
-        df = indicators.add_all_indicators()
+        df = load_indicator_frame("4h")
         
-        weights = {'trend': trend_w, 'volume_levels': vol_w, 'momentum': mom_w}
-        aggregator = SignalAggregator(df, custom_weights=weights)
-        aggregator.calculate_unum_score()
+        # Lean pipeline: cached frames are only read, each stage returns its own arrays
+        scorer = load_scorer("4h")
+        scores = scorer.score(weights)
         
-        allowed_sessions = sessions.split(",") if sessions else None
+        # Intrabar fills drill into the base candles to tell which level a 4h wick hit first
+        sub_bars = load_data(timeframes.base) if backtest_params['execution'] == 'intrabar' else None
+        backtester = Backtester(df, copy=False)
+        results, metrics = backtester.run_backtest(scores=scores, lean=True, sub_bars=sub_bars, **backtest_params)
         
-        backtester = Backtester(df)
-        results_df, metrics = backtester.run_backtest(
-            long_threshold=long_t,
-            short_threshold=short_t,
-            sl_pct=sl_pct,
-            tp_pct=tp_pct,
-            trailing_sl_pct=trailing_sl_pct,
-            skip_weekends=skip_weekends,
-            allowed_sessions=allowed_sessions
-        )
+        # Rolling metrics: O(N) over the whole curve, so windows at the chart's left edge are full
+        period = infer_period(df.index)
+        if rolling_window is None:
+            rolling_window = max(2, int(pd.Timedelta(days=ROLLING_DAYS) / period)) if period else 2
+        rolling = rolling_metrics(results['equity_curve'].to_numpy(), rolling_window, periods_per_year(df.index))
         
-        chart_data = results_df.tail(500).reset_index()
-        chart_data['timestamp'] = chart_data['timestamp'].astype(str)
+        # Assemble chart rows only for the requested window
+        start = len(results) - len(select_frame(results[[]], limit=limit, since=since))
+        window = pd.concat([
+            df.iloc[start:],
+            pd.DataFrame({**dict(zip(SIGNALS, scorer.signals[start:].T)), 'unum_score': scores[start:]}, index=df.index[start:]),
+            results.iloc[start:],
+            pd.DataFrame({name: values[start:] for name, values in rolling.items()}, index=df.index[start:])
+        ], axis=1)
+        chart_data = select_frame(window, columns, limit=None)
+        # Trades still open at, or closed within, the window
+        trades = backtester.trades_frame()
+        trades = trades[trades['exit_time'] >= df.index[start]] if start < len(df) else trades.iloc[:0]
+        if format == "arrow":
+            return Response(to_arrow(chart_data, {"metrics": metrics, "trades": to_records(trades)}),
+                            media_type=ARROW_MEDIA_TYPE)
         
+        return NumpyJSONResponse({
+            "metrics": metrics,
+            "rolling_window": rolling_window,
+            "trades": to_columns(trades) if format == "columns" else to_records(trades),
+            "chart_data": to_columns(chart_data) if format == "columns" else to_records(chart_data)
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+MAX_SIMULATIONS = 50000
+
+@router.get("/robustness")
+async def run_robustness_endpoint(
+    trend_w: float = 0.4,
+    vol_w: float = 0.4,
+    mom_w: float = 0.2,
+    long_t: float = 0.6,
+    short_t: float = -0.6,
+    sl_pct: float = 0.015,
+    tp_pct: float = 0.03,
+    trailing_sl_pct: float = 0.015,
+    skip_weekends: bool = True,
+    sessions: str = None,
+    method: str = "block_bootstrap", # block_bootstrap | trade_shuffle | trade_bootstrap
+    n_sims: int = 10000,
+    block: int = None, # Bars per bootstrap block (default ~sqrt(bars))
+    slippage: float = 0.0, # Mean extra cost per trade side (trade methods)
+    confidence: float = 0.95,
+    seed: int = None # Omitted: a fresh seed, returned for reproduction
+):
+    """
+    Monte Carlo robustness of a backtest: confidence intervals of return,
+    drawdown and Sharpe over resampled return streams or trade sequences.
+    """
+    if method not in SIM_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {', '.join(SIM_METHODS)}")
+    if not 1 <= n_sims <= MAX_SIMULATIONS:
+        raise HTTPException(status_code=400, detail=f"n_sims must be between 1 and {MAX_SIMULATIONS}")
+    if not 0 < confidence < 1:
+        raise HTTPException(status_code=400, detail="confidence must be between 0 and 1")
+    weights = {'trend': trend_w, 'volume_levels': vol_w, 'momentum': mom_w}
+    backtest_params = {
+        'long_threshold': long_t,
+        'short_threshold': short_t,
+        'sl_pct': sl_pct,
+        'tp_pct': tp_pct,
+        'trailing_sl_pct': trailing_sl_pct,
+        'skip_weekends': skip_weekends,
+        'allowed_sessions': sessions.split(",") if sessions else None
+    }
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    sim_params = {'method': method, 'n_sims': n_sims, 'block': block, 'slippage': slippage, 'seed': seed}
+    return await executor.run("robustness", _robustness, weights, backtest_params, sim_params, confidence)
+
+def _robustness(weights, backtest_params, sim_params, confidence):
+    try:
+        df = load_indicator_frame("4h")
+        backtester = Backtester(df, copy=False)
+        results, metrics = backtester.run_backtest(scores=load_scorer("4h").score(weights), lean=True, **backtest_params)
+        
+        # Point estimates from the same stream that is resampled
+        if sim_params['method'] == 'block_bootstrap':
+            stream, periods = results['strategy_returns'].to_numpy(), periods_per_year(df.index)
+        else:
+            stream, periods = trade_returns(backtester.trades), trades_per_year(backtester.trades)
+        samples = simulate(stream, **sim_params, periods_per_year=periods)
         return {
             "metrics": metrics,
-            "chart_data": chart_data.to_dict(orient='records')
+            **sim_params,
+            "robustness": robustness_report(samples, point_metrics(stream, periods), confidence)
         }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+MAX_SWEEP_COMBOS = 50000
+
+def parse_grid(spec: str):
+    """
+    Parses a grid query value: comma-separated values ("0.5,0.6")
+    or an inclusive range "start:stop:step".
+    """
+    try:
+        if ':' in spec:
+            start, stop, step = (float(x) for x in spec.split(':'))
+        else:
+            return [float(x) for x in spec.split(',') if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid grid '{spec}'")
+    if step <= 0:
+        raise HTTPException(status_code=400, detail=f"Invalid grid step in '{spec}'")
+    return list(np.round(np.arange(start, stop + step / 2, step), 10))
+
+@router.get("/sweep")
+async def run_sweep_endpoint(
+    trend_w: float = 0.4,
+    vol_w: float = 0.4,
+    mom_w: float = 0.2,
+    long_t: str = "0.6",
+    short_t: str = "-0.6",
+    sl_pct: str = "0.015",
+    tp_pct: str = "0.03",
+    trailing_sl_pct: str = "0.015",
+    skip_weekends: bool = True,
+    sessions: str = None,
+    rank_by: str = "total_return_pct",
+    top: int = 50
+):
+    """
+    Batch backtest over the cartesian product of the threshold/exit grids.
+    Each grid accepts "a,b,c" or "start:stop:step".
+    """
+    grids = [parse_grid(g) for g in (long_t, short_t, sl_pct, tp_pct, trailing_sl_pct)]
+    combos = int(np.prod([len(g) for g in grids]))
+    if combos == 0 or combos > MAX_SWEEP_COMBOS:
+        raise HTTPException(status_code=400, detail=f"Grid must contain 1..{MAX_SWEEP_COMBOS} combinations, got {combos}")
+
+    weights = {'trend': trend_w, 'volume_levels': vol_w, 'momentum': mom_w}
+    allowed_sessions = sessions.split(",") if sessions else None
+    return await executor.run("sweep", _sweep, weights, grids, combos, skip_weekends, allowed_sessions, rank_by, top)
+
+def _sweep(weights, grids, combos, skip_weekends, allowed_sessions, rank_by, top):
+    try:
+        df = load_indicator_frame("4h").assign(unum_score=load_scorer("4h").score(weights))
+        
+        sweep = ParameterSweep(df)
+        table = sweep.run(*grids, skip_weekends=skip_weekends,
+                          allowed_sessions=allowed_sessions, rank_by=rank_by)
+        
+        return {
+            "combinations": combos,
+            "results": table.head(top).to_dict(orient='records')
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+MAX_PORTFOLIO_SYMBOLS = 100
+
+def parse_symbols(spec: str):
+    symbols = list(dict.fromkeys(s.strip().upper() for s in spec.split(",") if s.strip()))
+    if not 1 <= len(symbols) <= MAX_PORTFOLIO_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"symbols must list 1..{MAX_PORTFOLIO_SYMBOLS} symbols")
+    bad = [s for s in symbols if not s.isalnum()]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Invalid symbols: {', '.join(bad)}")
+    return symbols
+
+@router.get("/portfolio")
+async def run_portfolio_endpoint(
+    symbols: str, # Comma-separated: "BTCUSDT,ETHUSDT,SOLUSDT"
+    timeframe: str = "4h",
+    trend_w: float = 0.4,
+    vol_w: float = 0.4,
+    mom_w: float = 0.2,
+    long_t: float = 0.6,
+    short_t: float = -0.6,
+    sl_pct: float = 0.015,
+    tp_pct: float = 0.03,
+    trailing_sl_pct: float = 0.015,
+    position_size: float = 0.1, # Fraction of equity per new position
+    sizing: str = "fixed", # fixed | score (scaled by |score|)
+    max_positions: int = None,
+    max_gross_exposure: float = 1.0,
+    skip_weekends: bool = True,
+    sessions: str = None,
+    limit: int = 500
+):
+    """
+    Trades the Unum strategy on several symbols from one shared balance.
+    Returns portfolio metrics, per-symbol attribution and the equity/exposure series.
+    """
+    if not timeframes.supports(timeframe):
+        raise HTTPException(status_code=400, detail="Invalid timeframe")
+    if sizing not in SIZING_MODES:
+        raise HTTPException(status_code=400, detail=f"sizing must be one of {', '.join(SIZING_MODES)}")
+    weights = {'trend': trend_w, 'volume_levels': vol_w, 'momentum': mom_w}
+    run_params = {
+        'long_threshold': long_t,
+        'short_threshold': short_t,
+        'sl_pct': sl_pct,
+        'tp_pct': tp_pct,
+        'trailing_sl_pct': trailing_sl_pct,
+        'position_size': position_size,
+        'sizing': sizing,
+        'max_positions': max_positions,
+        'max_gross_exposure': max_gross_exposure,
+        'skip_weekends': skip_weekends,
+        'allowed_sessions': sessions.split(",") if sessions else None
+    }
+    return await executor.run("portfolio", _portfolio, parse_symbols(symbols), timeframe, weights, run_params, limit)
+
+def _portfolio(symbols, timeframe, weights, run_params, limit):
+    try:
+        # Per-symbol scores come from the cached scorers; only the panel assembly is new work
+        frames = {}
+        for symbol in symbols:
+            df = load_indicator_frame(timeframe, symbol=symbol)
+            frames[symbol] = pd.DataFrame({'close': df['close'], 'high': df['high'], 'low': df['low'],
+                                           'unum_score': load_scorer(timeframe, symbol).score(weights)}, index=df.index)
+        prices = panel(frames, 'close')
+        backtester = PortfolioBacktester(prices, panel(frames, 'unum_score').reindex_like(prices),
+                                         highs=panel(frames, 'high'), lows=panel(frames, 'low'))
+        results, metrics = backtester.run(**run_params)
+        
+        attribution = backtester.attribution()
+        return NumpyJSONResponse({
+            "symbols": symbols,
+            "metrics": metrics,
+            "attribution": attribution.reset_index().to_dict(orient='records'),
+            "chart_data": to_records(select_frame(results, limit=limit))
+        })
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 from ..core.llm import GeminiClient
 
+def _analysis_context():
+    df = load_indicator_frame("4h")
+    
+    # Use default weights for analysis context
+    aggregator = SignalAggregator(df, other_dfs=load_confirmation_frames("4h"))
+    aggregator.calculate_unum_score()
+    return aggregator.get_latest_market_context()
+
 @router.get("/ai-analysis")
 async def get_ai_analysis():
     """
     Triggers an on-demand analysis of the current market situation using Gemini.
     """
     try:
-        gemini_client = GeminiClient()
-        df = load_data("4h")
-        indicators = Indicators(df)
-        df = indicators.add_all_indicators()
-        
-        # Use default weights for analysis context
-        aggregator = SignalAggregator(df)
-        aggregator.calculate_unum_score()
-        
-        context = aggregator.get_latest_market_context()
-        analysis = gemini_client.analyze_signal(context)
+        context = await executor.run("ai-analysis", _analysis_context)
+        # The Gemini SDK call blocks on the network; it gets its own I/O route
+        analysis = await executor.run("gemini", lambda: GeminiClient().analyze_signal(context))
         
         return {
             "context": context,
             "analysis": analysis
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Smallest /optimize weight step: 0.02 gives 1326 weight vectors
+MIN_WEIGHT_STEP = 0.02
+
+optimizer_pool = OptimizerPool()
+
+def _prepare_optimization_frame():
+    df = load_indicator_frame("4h")
+    # Workers only receive the shared numeric frame, so confirmation trends travel as columns
+    trends = SignalAggregator(df, other_dfs=load_confirmation_frames("4h"), inplace=False).mtf_trends()
+    return df.assign(**{MTF_TREND_PREFIX + tf: trend for tf, trend in trends.items()})
+
+def _optimization_candidates(weight_step, sl_pct, tp_pct, trailing_sl_pct, skip_weekends, sessions):
+    if not MIN_WEIGHT_STEP <= weight_step <= 1:
+        raise HTTPException(status_code=400, detail=f"weight_step must be between {MIN_WEIGHT_STEP} and 1")
+    try:
+        weights = simplex_weights(weight_step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    backtest_params = {
+        'sl_pct': sl_pct,
+        'tp_pct': tp_pct,
+        'trailing_sl_pct': trailing_sl_pct,
+        'skip_weekends': skip_weekends,
+        'allowed_sessions': sessions.split(",") if sessions else None
+    }
+    return weight_candidates(weights, backtest_params)
+
 @router.get("/optimize")
 async def run_optimization_endpoint(
     sl_pct: float = 0.015,
     tp_pct: float = 0.03,
     trailing_sl_pct: float = 0.015,
     skip_weekends: bool = True,
-    sessions: str = None
+    sessions: str = None,
+    weight_step: float = 0.1 # Grid spacing of the weight simplex (0.1 -> 66 vectors)
 ):
+    """
+    Starts a weight optimization job on the process pool over every
+    (trend, volume_levels, momentum) weighting on a simplex grid.
+    Returns a job id to poll via /optimize/{job_id}.
+    """
+    candidates = _optimization_candidates(weight_step, sl_pct, tp_pct, trailing_sl_pct, skip_weekends, sessions)
     try:
-        df_base = load_data("4h")
-        indicators = Indicators(df_base)
-        df_base = indicators.add_all_indicators()
-        
-        allowed_sessions = sessions.split(",") if sessions else None
-        best_roi = -float('inf')
-        best_weights = {}
-        
-        # Test weight combinations
-        test_weights = [
-            (0.4, 0.4, 0.2),
-            (0.5, 0.3, 0.2),
-            (0.3, 0.5, 0.2),
-            (0.4, 0.2, 0.4),
-            (0.2, 0.4, 0.4)
-        ]
-        
-        for w_t, w_v, w_m in test_weights:
-            df_run = df_base.copy()
-            weights = {'trend': w_t, 'volume_levels': w_v, 'momentum': w_m}
-            aggregator = SignalAggregator(df_run, custom_weights=weights)
-            aggregator.calculate_unum_score()
-            
-            backtester = Backtester(df_run)
-            _, metrics = backtester.run_backtest(
-                sl_pct=sl_pct,
-                tp_pct=tp_pct,
-                trailing_sl_pct=trailing_sl_pct,
-                skip_weekends=skip_weekends,
-                allowed_sessions=allowed_sessions
-            )
-            
-            if metrics['total_return_pct'] > best_roi:
-                best_roi = metrics['total_return_pct']
-                best_weights = weights
-                
-        return {
-            "best_weights": best_weights,
-            "best_roi": best_roi
-        }
+        df_base = await executor.run("optimize", _prepare_optimization_frame)
+        job_id = optimizer_pool.submit(df_base, candidates)
+        return optimizer_pool.get(job_id).snapshot(top=0)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/optimize/{job_id}")
+async def get_optimization_job(job_id: str, top: int = 10):
+    """
+    Progress and ranked results of an optimization job.
+    """
+    job = optimizer_pool.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Optimization job {job_id} not found")
+    return job.snapshot(top=top)
+
+VALIDATION_METHODS = ('rolling', 'anchored', 'kfold')
+
+@router.get("/walk-forward")
+async def run_walk_forward_endpoint(
+    method: str = "rolling",
+    train_bars: int = 2190, # ~1 year of 4h bars
+    test_bars: int = 540, # ~1 quarter
+    step: int = None,
+    n_folds: int = 5,
+    purge_bars: int = 0,
+    embargo_bars: int = EMBARGO_BARS,
+    sl_pct: float = 0.015,
+    tp_pct: float = 0.03,
+    trailing_sl_pct: float = 0.015,
+    skip_weekends: bool = True,
+    sessions: str = None,
+    weight_step: float = 0.1,
+    rank_by: str = "total_return_pct"
+):
+    """
+    Starts an out-of-sample validation of the weight optimization: each fold
+    picks the best simplex weighting on its train bars and reports the metrics
+    of that weighting on the following (rolling/anchored) or held-out (kfold,
+    purged and embargoed) test bars. Folds run in parallel on the process pool.
+    Returns a job id to poll via /walk-forward/{job_id}.
+    """
+    if method not in VALIDATION_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {', '.join(VALIDATION_METHODS)}")
+    if purge_bars < 0 or embargo_bars < 0:
+        raise HTTPException(status_code=400, detail="purge_bars and embargo_bars must be non-negative")
+    if rank_by not in RANK_METRICS:
+        raise HTTPException(status_code=400, detail=f"Cannot rank by '{rank_by}'")
+    candidates = _optimization_candidates(weight_step, sl_pct, tp_pct, trailing_sl_pct, skip_weekends, sessions)
+    try:
+        df_base = await executor.run("optimize", _prepare_optimization_frame)
+        try:
+            if method == 'kfold':
+                folds = purged_kfold_splits(len(df_base), n_folds, purge_bars, embargo_bars)
+            else:
+                folds = walk_forward_splits(len(df_base), train_bars, test_bars, step, anchored=method == 'anchored')
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        job = ValidationJob(folds, candidates, rank_by, method)
+        job_id = optimizer_pool.start(job, df_base, job.tasks())
+        return optimizer_pool.get(job_id).snapshot(top=0)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/walk-forward/{job_id}")
+async def get_walk_forward_job(job_id: str, top: int = None):
+    """
+    Progress, per-fold in/out-of-sample metrics and the aggregate out-of-sample view of a validation job.
+    """
+    job = optimizer_pool.get(job_id)
+    if not isinstance(job, ValidationJob):
+        raise HTTPException(status_code=404, detail=f"Validation job {job_id} not found")
+    return job.snapshot(top=top)
+
+MAX_SEARCH_SECONDS = 600
+
+@router.get("/search")
+async def run_search_endpoint(
+    sampler: str = "tpe",
+    halving: bool = True, # Prune on short recent windows before full-history runs
+    max_evals: float = 100, # Budget in full-history backtest equivalents
+    max_seconds: float = 120,
+    batch: int = 27,
+    eta: int = 3,
+    rungs: int = 3,
+    search_sessions: bool = True,
+    search_sub_weights: bool = True,
+    skip_weekends: bool = True,
+    rank_by: str = "total_return_pct",
+    seed: int = None,
+    resume: str = None # Job id of a finished search to continue with a new budget
+):
+    """
+    Starts a budgeted search over thresholds, exits, sessions, category and
+    sub-weights on the process pool: random or TPE-style sampling, optionally
+    with successive halving. Returns a job id to poll via /search/{job_id}.
+    """
+    if not 0 < max_seconds <= MAX_SEARCH_SECONDS or max_evals <= 0:
+        raise HTTPException(status_code=400, detail=f"max_evals must be positive and max_seconds in (0, {MAX_SEARCH_SECONDS}]")
+    if rank_by not in RANK_METRICS:
+        raise HTTPException(status_code=400, detail=f"Cannot rank by '{rank_by}'")
+    try:
+        df_base = await executor.run("optimize", _prepare_optimization_frame)
+        if resume is not None:
+            previous = optimizer_pool.get(resume)
+            if not isinstance(previous, SearchJob):
+                raise HTTPException(status_code=404, detail=f"Search job {resume} not found")
+            if previous.status == 'running':
+                raise HTTPException(status_code=409, detail=f"Search job {resume} is still running")
+            if previous.search.n_bars != len(df_base):
+                raise HTTPException(status_code=409, detail="Market data changed since the search ran")
+            search = Search.from_state(previous.search.space, previous.search.state_dict())
+        else:
+            space = SearchSpace(sessions=SESSION_CHOICES if search_sessions else None,
+                                sub_weights=search_sub_weights, fixed={'skip_weekends': skip_weekends})
+            try:
+                search = Search(space, len(df_base), sampler, halving, eta, rungs, batch, rank_by, seed)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        job = SearchJob(search, max_evals, max_seconds)
+        job_id = optimizer_pool.start_driver(job, df_base)
+        return optimizer_pool.get(job_id).snapshot(top=0)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search/{job_id}")
+async def get_search_job(job_id: str, top: int = 10):
+    """
+    Progress, budget spent and the best full-history configurations of a search job.
+    """
+    job = optimizer_pool.get(job_id)
+    if not isinstance(job, SearchJob):
+        raise HTTPException(status_code=404, detail=f"Search job {job_id} not found")
+    return job.snapshot(top=top)
+
+@router.get("/search/{job_id}/state")
+async def get_search_state(job_id: str):
+    """
+    Resumable state of a search job (config, every trial, RNG state).
+    """
+    job = optimizer_pool.get(job_id)
+    if not isinstance(job, SearchJob):
+        raise HTTPException(status_code=404, detail=f"Search job {job_id} not found")
+    return job.search.state_dict()
@@ -0,0 +1,118 @@
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+FORMATS = ('records', 'columns', 'arrow')
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# orjson writes NaN/inf as null, so float buffers need no per-cell cleaning
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+class NumpyJSONResponse(Response):
+    """
+    JSON response rendered by orjson; NumPy arrays and scalars are written directly.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+
+def select_frame(df: pd.DataFrame, columns: str = None, limit: int = 500, since: str = None) -> pd.DataFrame:
+    """
+    Applies client paging and projection: rows at or after `since` (ISO time),
+    the last `limit` of those, and only the comma-separated `columns`.
+    """
+    if since:
+        try:
+            start = pd.Timestamp(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid since '{since}'")
+        if start.tzinfo is not None:
+            start = start.tz_convert(None)
+        df = df.iloc[df.index.searchsorted(start):]
+    if limit is not None:
+        if limit < 0:
+            raise HTTPException(status_code=400, detail="limit must be >= 0")
+        df = df.iloc[len(df) - min(limit, len(df)):]
+    if columns:
+        names = [c.strip() for c in columns.split(",") if c.strip()]
+        unknown = [c for c in names if c not in df.columns]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+        df = df[names]
+    return df
+
+
+def _timestamps(index) -> list:
+    # Same text as Timestamp.isoformat() for whole-second candles
+    return np.datetime_as_string(np.asarray(index, dtype='datetime64[s]'), unit='s').tolist()
+
+
+def _column_values(series: pd.Series):
+    values = series.to_numpy()
+    if values.dtype.kind in 'fiub':
+        return np.ascontiguousarray(values)
+    if values.dtype.kind == 'M':
+        return _timestamps(values)
+    # Objects, categoricals, datetimes: plain Python values
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def to_records(df: pd.DataFrame, extra: dict = None) -> list:
+    """
+    Row-oriented payload [{timestamp, col: value, ...}, ...]; `extra` is added to every row.
+    Values are converted per column, not per cell.
+    """
+    extra = extra or {}
+    keys = ['timestamp', *map(str, df.columns), *extra]
+    columns = [_timestamps(df.index)]
+    for col in df.columns:
+        values = _column_values(df[col])
+        columns.append(values.tolist() if isinstance(values, np.ndarray) else values)
+    columns.extend(repeat(v) for v in extra.values())
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def to_columns(df: pd.DataFrame) -> dict:
+    """
+    Column-oriented payload {timestamp: [...], col: [...]} backed by the NumPy buffers.
+    """
+    payload = {'timestamp': _timestamps(df.index)}
+    for col in df.columns:
+        payload[str(col)] = _column_values(df[col])
+    return payload
+
+
+def to_arrow(df: pd.DataFrame, metadata: dict = None) -> bytes:
+    """
+    Arrow IPC stream of the frame (timestamp column first); `metadata` is stored
+    JSON-encoded in the schema metadata.
+    """
+    if pa is None:
+        raise HTTPException(status_code=400, detail="Arrow output requires pyarrow")
+    table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            **{k.encode(): orjson.dumps(v, option=_ORJSON_OPTIONS) for k, v in metadata.items()}
+        })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def check_format(format: str):
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import os
+
+import ccxt.async_support as ccxt
+import orjson
+import pandas as pd
+from fastapi import APIRouter, WebSocket
+from starlette.concurrency import run_in_threadpool
+
+from ..core.streaming import StreamingIndicators, StreamingUnumScore
+from ..timeframes import resample_ohlcv, bucket_start
+from ..core.periods import parse_timeframe
+from . import market
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# "exchange" polls ccxt for closed candles; "replay" plays back the last stored ones
+STREAM_SOURCE = os.getenv("STREAM_SOURCE", "exchange")
+REPLAY_BARS = int(os.getenv("STREAM_REPLAY_BARS", "500"))
+REPLAY_INTERVAL = float(os.getenv("STREAM_REPLAY_INTERVAL", "1.0"))
+EXCHANGE_SYMBOL = os.getenv("STREAM_SYMBOL", "BTC/USDT")
+
+
+def _candle(row):
+    return {'open': float(row[0]), 'high': float(row[1]), 'low': float(row[2]),
+            'close': float(row[3]), 'volume': float(row[4])}
+
+
+class ReplaySource:
+    """
+    Plays back stored base candles at a fixed interval (development and demos).
+    """
+    def __init__(self, df: pd.DataFrame, interval=1.0):
+        self.df = df
+        self.interval = interval
+
+    async def candles(self, since=None):
+        df = self.df if since is None else self.df[self.df.index > since]
+        for ts, row in zip(df.index, df[['open', 'high', 'low', 'close', 'volume']].to_numpy()):
+            await asyncio.sleep(self.interval)
+            yield ts, _candle(row)
+
+
+class ExchangeSource:
+    """
+    Polls the exchange for newly closed base candles.
+    """
+    def __init__(self, symbol='BTC/USDT', timeframe='1h', exchange_id='binance', exchange=None, poll_interval=15.0):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self._owns_exchange = exchange is None
+        self.exchange = exchange if exchange is not None else getattr(ccxt, exchange_id)({'enableRateLimit': True})
+        self.poll_interval = poll_interval
+
+    async def candles(self, since=None):
+        period_ms = parse_timeframe(self.timeframe) * 1000
+        last = int(since.value // 10**6) if since is not None else self.exchange.milliseconds() - 2 * period_ms
+        try:
+            while True:
+                try:
+                    ohlcv = await self.exchange.fetch_ohlcv(self.symbol, self.timeframe, since=last + 1, limit=1000)
+                except Exception as e:
+                    logger.warning(f"Stream poll failed for {self.symbol} {self.timeframe}: {e}")
+                    ohlcv = []
+                now = self.exchange.milliseconds()
+                for candle in ohlcv:
+                    # The newest candle is still open until its period has elapsed
+                    if candle[0] > last and candle[0] + period_ms <= now:
+                        last = candle[0]
+                        yield pd.Timestamp(candle[0], unit='ms'), _candle(candle[1:])
+                if len(ohlcv) < 1000: # Caught up
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            if self._owns_exchange:
+                await self.exchange.close()
+
+
+class CandleHub:
+    """
+    Live pipeline for one timeframe. Closed base candles from `source` are
+    aggregated into the hub timeframe; each completed bar goes through the
+    streaming indicators and Unum score once, and the encoded row is queued
+    to every subscriber.
+    """
+    def __init__(self, timeframe='4h', source=None, base='1h', queue_size=64):
+        self.timeframe = timeframe
+        self.base = base
+        self.source = source
+        self.queue_size = queue_size
+        self.period = pd.Timedelta(seconds=parse_timeframe(timeframe))
+        self.base_period = pd.Timedelta(seconds=parse_timeframe(base))
+
+        self.indicators = StreamingIndicators()
+        self.score = StreamingUnumScore()
+        self.bucket = None # [bucket start, candle] of the bar being aggregated
+        self.last_base = None
+        self.latest = None
+        self.subscribers = set()
+        self.task = None
+
+    def warm_up(self, base_df: pd.DataFrame):
+        """
+        Replays stored base history into the indicator and score state.
+        """
+        if base_df.empty:
+            return
+        self.last_base = base_df.index[-1]
+        frame = resample_ohlcv(base_df, self.timeframe, self.base)
+        # The last bar is still forming unless its final base candle is in
+        complete = frame.index + self.period <= self.last_base + self.base_period
+        closed, forming = frame[complete], frame[~complete]
+
+        candles = closed.to_dict('records')
+        for candle in candles[:-1]:
+            self.score.update(self.indicators.update(candle))
+
+        # The last closed bar is scored with the confirmation closes available when it closed
+        end = closed.index[-1] + self.period if candles else base_df.index[0]
+        if self.timeframe != self.base:
+            for close in base_df['close'][base_df.index < end].to_numpy()[-self.score.mtf_sma.window:]:
+                self.score.update_confirmation(close)
+        if candles:
+            self._publish(closed.index[-1], candles[-1], notify=False)
+        if self.timeframe != self.base:
+            for close in base_df['close'][base_df.index >= end].to_numpy():
+                self.score.update_confirmation(close)
+        if len(forming):
+            self.bucket = [forming.index[0], forming.iloc[0].to_dict()]
+
+    def on_base_candle(self, ts, candle):
+        """
+        Consumes one closed base candle; publishes the hub bar when it completes.
+        """
+        self.last_base = ts
+        if self.timeframe == self.base:
+            self._publish(ts, candle)
+            return
+        self.score.update_confirmation(candle['close'])
+
+        start = bucket_start(ts, self.timeframe)
+        if self.bucket is not None and self.bucket[0] != start:
+            # A base candle went missing at the end of the previous bar
+            self._publish(*self.bucket)
+            self.bucket = None
+        if self.bucket is None:
+            self.bucket = [start, dict(candle)]
+        else:
+            bar = self.bucket[1]
+            bar['high'] = max(bar['high'], candle['high'])
+            bar['low'] = min(bar['low'], candle['low'])
+            bar['close'] = candle['close']
+            bar['volume'] += candle['volume']
+        if ts + self.base_period >= start + self.period:
+            self._publish(*self.bucket)
+            self.bucket = None
+
+    def _publish(self, ts, candle, notify=True):
+        row = self.indicators.update(candle)
+        row.update(self.score.update(row))
+        message = orjson.dumps({
+            "type": "candle",
+            "timeframe": self.timeframe,
+            "data": {"timestamp": ts.isoformat(), **row}
+        }, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        self.latest = message
+        if notify:
+            for queue in self.subscribers:
+                if queue.full():
+                    # Slow client: drop its oldest update rather than block the others
+                    queue.get_nowait()
+                queue.put_nowait(message)
+        return message
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    async def run(self):
+        async for ts, candle in self.source.candles(since=self.last_base):
+            self.on_base_candle(ts, candle)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.task = None
+
+
+hubs = {}
+_hubs_lock = None
+
+async def get_hub(timeframe):
+    """
+    Returns the running hub for `timeframe`, creating and warming it up on first use.
+    """
+    global _hubs_lock
+    if _hubs_lock is None: # Created on the server's event loop
+        _hubs_lock = asyncio.Lock()
+    async with _hubs_lock:
+        hub = hubs.get(timeframe)
+        if hub is None:
+            base = market.timeframes.base
+            base_df = await run_in_threadpool(market.store.load, market.SYMBOL, base)
+            if STREAM_SOURCE == "replay":
+                history, live = base_df.iloc[:-REPLAY_BARS], base_df.iloc[-REPLAY_BARS:]
+                source = ReplaySource(live, interval=REPLAY_INTERVAL)
+            else:
+                history = base_df
+                source = ExchangeSource(symbol=EXCHANGE_SYMBOL, timeframe=base)
+            hub = CandleHub(timeframe, source=source, base=base)
+            await run_in_threadpool(hub.warm_up, history)
+            hubs[timeframe] = hub
+        hub.start()
+        return hub
+
+async def shutdown():
+    for hub in hubs.values():
+        await hub.stop()
+    hubs.clear()
+
+@router.websocket("/ws/stream")
+async def stream_candles(websocket: WebSocket, timeframe: str = "4h"):
+    """
+    Pushes each newly closed candle with indicators and Unum score.
+    The latest bar is sent on connect.
+    """
+    if not market.timeframes.supports(timeframe):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    try:
+        hub = await get_hub(timeframe)
+    except FileNotFoundError:
+        await websocket.close(code=1011)
+        return
+    queue = hub.subscribe()
+
+    async def pump():
+        while True:
+            await websocket.send_text(await queue.get())
+
+    sender = asyncio.create_task(pump())
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        hub.unsubscribe(queue)
@@ -1,23 +1,221 @@
 import pandas as pd
 import numpy as np
+from .engine import (
+    get_engine, simulate_intrabar, EXIT_REASONS, EXIT_OPEN,
+    T_ENTRY_BAR, T_EXIT_BAR, T_SIDE, T_ENTRY_PRICE, T_EXIT_PRICE, T_REASON, T_ENTRY_BALANCE
+)
+from .metrics import drawdown_duration
+from .periods import sub_bar_ranges, periods_per_year
+
+# Trading sessions in UTC hours: [start, end)
+SESSIONS = {
+    'asian': (0, 9),
+    'european': (7, 16),
+    'american': (13, 22)
+}
+
+def tradable_mask(index: pd.DatetimeIndex, skip_weekends=True, allowed_sessions=None):
+    """
+    Boolean array of bars where new entries are allowed.
+    Same rules as Backtester.run_backtest, without touching a DataFrame.
+    """
+    hours = np.asarray(index.hour)
+    mask = np.ones(len(index), dtype=bool)
+    if allowed_sessions:
+        mask[:] = False
+        for name in allowed_sessions:
+            if name in SESSIONS:
+                start, end = SESSIONS[name]
+                mask |= (hours >= start) & (hours < end)
+    if skip_weekends:
+        mask &= np.asarray(index.dayofweek) < 5
+    return mask
+
+# Record layout of Backtester.trades, one row per trade in entry order.
+# exit_reason indexes EXIT_REASONS; pnl and fees are in account currency,
+# return_pct is net of fees; MAE/MFE are the worst/best excursion from the
+# entry price over the bars held (highs/lows when the frame has them).
+TRADE_DTYPE = np.dtype([
+    ('entry_time', 'datetime64[ns]'), ('exit_time', 'datetime64[ns]'),
+    ('side', np.int8), ('exit_reason', np.int8), ('bars_held', np.int32),
+    ('entry_price', np.float64), ('exit_price', np.float64),
+    ('pnl', np.float64), ('return_pct', np.float64), ('fees', np.float64),
+    ('mae_pct', np.float64), ('mfe_pct', np.float64)
+])
+
+# Reported when no closed trade lost money
+PROFIT_FACTOR_CAP = 100.0
+
+def _segment_extremes(lows, highs, starts, stops):
+    """
+    min(lows) and max(highs) over each [start, stop) range, ignoring NaN (NaN
+    when empty); ranges must not overlap. One reduceat pass each.
+    """
+    order = np.argsort(starts, kind='stable')
+    bounds = np.empty(2 * len(starts), dtype=np.int64)
+    bounds[0::2], bounds[1::2] = starts[order], stops[order]
+    # Sentinel so a range may end at the last bar
+    low, high = np.empty(len(starts)), np.empty(len(starts))
+    low[order] = np.fmin.reduceat(np.append(lows, np.nan), bounds)[0::2]
+    high[order] = np.fmax.reduceat(np.append(highs, np.nan), bounds)[0::2]
+    empty = stops <= starts
+    low[empty] = np.nan
+    high[empty] = np.nan
+    return low, high
+
+def build_trade_ledger(trades, index, lows, highs, fee, offsets=None, dtype=TRADE_DTYPE):
+    """
+    Raw engine ledger (see core.engine) -> record array of `dtype` (TRADE_DTYPE
+    fields at least), with PnL, fees and MAE/MFE computed for all trades at once.
+    offsets: per-trade position of bar 0 in lows/highs, for panels flattened
+    asset by asset; trades of one series must not overlap.
+    """
+    ledger = np.zeros(len(trades), dtype=dtype)
+    if not len(trades):
+        return ledger
+    entry_bar = trades[:, T_ENTRY_BAR].astype(np.int64)
+    exit_bar = trades[:, T_EXIT_BAR].astype(np.int64)
+    side = trades[:, T_SIDE]
+    entry_price, exit_price = trades[:, T_ENTRY_PRICE], trades[:, T_EXIT_PRICE]
+    reason = trades[:, T_REASON].astype(np.int8)
+    index = np.asarray(index, dtype='datetime64[ns]')
+
+    # Same arithmetic as the engines: entry fee, mark-to-market fee, exit fee
+    start_balance = trades[:, T_ENTRY_BALANCE]
+    invested = start_balance * (1 - fee)
+    ratio = exit_price / entry_price
+    value = np.where(side > 0, ratio, 2 - ratio) * invested
+    final = value * (1 - fee)
+    closed = reason != EXIT_OPEN
+    final[closed] *= 1 - fee
+
+    offset = 0 if offsets is None else offsets
+    low, high = _segment_extremes(lows, highs, entry_bar + 1 + offset, exit_bar + 1 + offset)
+    worst = np.where(side > 0, low / entry_price - 1, 1 - high / entry_price)
+    best = np.where(side > 0, high / entry_price - 1, 1 - low / entry_price)
+
+    ledger['entry_time'] = index[entry_bar]
+    ledger['exit_time'] = index[exit_bar]
+    ledger['side'] = side
+    ledger['exit_reason'] = reason
+    ledger['bars_held'] = exit_bar - entry_bar
+    ledger['entry_price'] = entry_price
+    ledger['exit_price'] = exit_price
+    ledger['pnl'] = final - start_balance
+    ledger['return_pct'] = (final / start_balance - 1) * 100
+    ledger['fees'] = (start_balance - invested) + (value - final)
+    ledger['mae_pct'] = np.minimum(np.nan_to_num(worst), 0) * 100
+    ledger['mfe_pct'] = np.maximum(np.nan_to_num(best), 0) * 100
+    return ledger
+
+def trade_metrics(trades) -> dict:
+    """
+    Per-trade KPIs over the closed trades of a ledger, in one vectorized pass.
+    """
+    closed = trades[trades['exit_reason'] != EXIT_OPEN]
+    n = len(closed)
+    if n == 0:
+        return {"closed_trades": 0, "win_rate_pct": 0, "profit_factor": 0, "expectancy_pct": 0,
+                "avg_trade_pnl": 0, "avg_hold_bars": 0, "avg_hold_hours": 0, "avg_mae_pct": 0, "avg_mfe_pct": 0}
+    pnl = closed['pnl']
+    wins = pnl > 0
+    gross_profit, gross_loss = pnl[wins].sum(), -pnl[pnl < 0].sum()
+    if gross_loss > 0:
+        profit_factor = min(gross_profit / gross_loss, PROFIT_FACTOR_CAP)
+    else:
+        profit_factor = PROFIT_FACTOR_CAP if gross_profit > 0 else 0
+    hold_hours = (closed['exit_time'] - closed['entry_time']).astype('timedelta64[s]').astype(np.float64) / 3600
+    return {
+        "closed_trades": n,
+        "win_rate_pct": round(np.count_nonzero(wins) / n * 100, 2),
+        "profit_factor": round(profit_factor, 2),
+        "expectancy_pct": round(closed['return_pct'].mean(), 3),
+        "avg_trade_pnl": round(pnl.mean(), 2),
+        "avg_hold_bars": round(closed['bars_held'].mean(), 2),
+        "avg_hold_hours": round(hold_hours.mean(), 2),
+        "avg_mae_pct": round(closed['mae_pct'].mean(), 2),
+        "avg_mfe_pct": round(closed['mfe_pct'].mean(), 2)
+    }
+
+def performance_metrics(equity_curve, trades, strategy_returns, cum_market_returns, drawdown, trades_count,
+                        initial_balance, periods_per_year):
+    """
+    Account-level KPIs of an equity curve plus the per-trade KPIs of its ledger.
+    periods_per_year: bars per year (periods.periods_per_year) for annualizing.
+    """
+    total_return = (equity_curve[-1] / initial_balance - 1) * 100
+    buy_hold_return = (cum_market_returns[-1] - 1) * 100
+    # Win rate, profit factor etc. come from the closed trades of the ledger
+    per_trade = trade_metrics(trades)
+    
+    max_drawdown = np.nanmin(drawdown) * 100
+    
+    # Sharpe / Sortino / volatility annualized at the bar frequency
+    # Note: Risk-free rate assumed 0
+    returns = strategy_returns[~np.isnan(strategy_returns)]
+    scale = np.sqrt(periods_per_year)
+    std = returns.std(ddof=1) if len(returns) > 1 else np.nan
+    sharpe = (returns.mean() / std) * scale if std != 0 else 0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2)) if len(returns) else 0
+    sortino = returns.mean() / downside * scale if downside > 0 else 0
+    # Calmar: annualized growth over the max drawdown
+    years = len(returns) / periods_per_year
+    cagr = (equity_curve[-1] / initial_balance) ** (1 / years) - 1 if years > 0 and equity_curve[-1] > 0 else -1
+    calmar = cagr / -np.nanmin(drawdown) if np.nanmin(drawdown) < 0 else 0
+    
+    return {
+        "total_return_pct": round(total_return, 2),
+        "buy_hold_return_pct": round(buy_hold_return, 2),
+        "win_rate_pct": per_trade.pop("win_rate_pct"),
+        "max_drawdown_pct": round(max_drawdown, 2),
+        "sharpe_ratio": round(sharpe, 2),
+        "sortino_ratio": round(sortino, 2),
+        "calmar_ratio": round(calmar, 2),
+        "volatility_pct": round(std * scale * 100, 2) if len(returns) > 1 else 0,
+        "max_drawdown_bars": int(drawdown_duration(equity_curve).max()),
+        "final_balance": round(equity_curve[-1], 2),
+        "total_trades": int(trades_count),
+        **per_trade
+    }
+
+def _pct_change(values):
+    out = np.empty_like(values)
+    out[0] = np.nan
+    np.divide(values[1:], values[:-1], out=out[1:])
+    out[1:] -= 1
+    return out
 
 class Backtester:
-    def __init__(self, df: pd.DataFrame, initial_balance=10000, fee=0.001):
+    def __init__(self, df: pd.DataFrame, initial_balance=10000, fee=0.001, copy=True):
         """
         initial_balance: Starting USD
         fee: 0.1% = 0.001
+        copy: copy df first. Lean runs only read df, so a shared frame
+        can be passed with copy=False.
         """
-        self.df = df.copy()
+        self.df = df.copy() if copy else df
         self.initial_balance = initial_balance
         self.fee = fee
         
     def run_backtest(self, long_threshold=0.6, short_threshold=-0.6, 
                      sl_pct=0.02, tp_pct=0.04, trailing_sl_pct=0.015, 
-                     skip_weekends=True, allowed_sessions=None):
+                     skip_weekends=True, allowed_sessions=None, engine='auto',
+                     scores=None, lean=False, execution='close', sub_bars=None):
         """
         Simulates trading with SL/TP, Trailing Stop, and Session Filtering.
         allowed_sessions: list of session names ['asian', 'european', 'american'] or None (all)
+        engine: 'python' (reference loop), 'numba', 'numpy' or 'auto' (see core.engine)
+        scores: Unum score array to trade on instead of df['unum_score']
+        lean: leave df untouched and return a frame holding only the result
+        columns (signal, returns, equity, drawdown) instead of df with helper columns
+        execution: 'close' checks exits on closes only; 'intrabar' fills them at
+        the stop/target price when the bar's high/low reaches it
+        sub_bars: lower-timeframe OHLC (e.g. 1h for 4h bars) resolving, with
+        'intrabar', which level each bar reached first
         """
+        if lean:
+            return self._run_lean(scores, long_threshold, short_threshold, sl_pct, tp_pct,
+                                  trailing_sl_pct, skip_weekends, allowed_sessions, engine, execution, sub_bars)
         df = self.df
         df['signal'] = 0
         df['market_returns'] = df['close'].pct_change()
@@ -25,9 +223,8 @@ class Backtester:
         # 1. Identification (UTC)
         # Asian: 00-09, European: 07-16, American: 13-22
         df['hour'] = df.index.hour
-        df['is_asian'] = (df['hour'] >= 0) & (df['hour'] < 9)
-        df['is_european'] = (df['hour'] >= 7) & (df['hour'] < 16)
-        df['is_american'] = (df['hour'] >= 13) & (df['hour'] < 22)
+        for name, (start, end) in SESSIONS.items():
+            df[f'is_{name}'] = (df['hour'] >= start) & (df['hour'] < end)
         
         # Calculate session mask
         if allowed_sessions:
@@ -45,68 +242,20 @@ class Backtester:
         else:
             df['is_weekend'] = False
 
-        balance = self.initial_balance
-        position = 0 # 1 for Long, -1 for Short, 0 for None
-        entry_price = 0
-        peak_price = 0
-        equity_curve = [] 
-        trades_count = 0
-        signals = [0] * len(df)
-        
         # Pre-calculate for efficiency
-        scores = df['unum_score'].values
-        prices = df['close'].values
-        weekends = df['is_weekend'].values
-        in_sessions = df['in_session'].values
+        scores = np.asarray(df['unum_score'] if scores is None else scores, dtype=np.float64)
+        prices = df['close'].values.astype(np.float64)
+        tradable = (~df['is_weekend'].values.astype(bool)) & df['in_session'].values.astype(bool)
         
-        for i in range(1, len(df)):
-            # Update Equity Curve based on price movement
-            curr_equity = balance
-            if position == 1:
-                curr_equity = (prices[i] / entry_price) * balance * (1 - self.fee)
-            elif position == -1:
-                curr_equity = (2 - (prices[i] / entry_price)) * balance * (1 - self.fee)
-            
-            # 1. Exit Logic (SL / TP / Trailing Stop) - Exits are ALWAYS active once in trade
-            exit_triggered = False
-            if position != 0:
-                if position == 1:
-                    peak_price = max(peak_price, prices[i])
-                    if (prices[i] <= entry_price * (1 - sl_pct)) or \
-                       (prices[i] >= entry_price * (1 + tp_pct)) or \
-                       (prices[i] <= peak_price * (1 - trailing_sl_pct)):
-                        exit_triggered = True
-                elif position == -1:
-                    peak_price = min(peak_price, prices[i])
-                    if (prices[i] >= entry_price * (1 + sl_pct)) or \
-                       (prices[i] <= entry_price * (1 - tp_pct)) or \
-                       (prices[i] >= peak_price * (1 + trailing_sl_pct)):
-                        exit_triggered = True
-
-            if exit_triggered:
-                balance = curr_equity * (1 - self.fee)
-                position = 0
-                trades_count += 1
-            
-            # 2. Entry Logic (Only if not in position, not weekend, and IN ALLOWED SESSION)
-            if position == 0 and not weekends[i] and in_sessions[i]:
-                if scores[i] > long_threshold:
-                    position = 1
-                    entry_price = prices[i]
-                    peak_price = prices[i]
-                    balance = balance * (1 - self.fee)
-                    trades_count += 1
-                elif scores[i] < short_threshold:
-                    position = -1
-                    entry_price = prices[i]
-                    peak_price = prices[i]
-                    balance = balance * (1 - self.fee)
-                    trades_count += 1
+        equity_curve, signals, trades_count, trades = self._simulate(
+            prices, scores, tradable,
+            long_threshold, short_threshold,
+            sl_pct, tp_pct, trailing_sl_pct,
+            engine, execution, sub_bars
+        )
+        self.trades = self.trade_ledger(trades)
             
-            equity_curve.append(curr_equity)
-            signals[i] = position
-            
-        df['equity_curve'] = [self.initial_balance] + equity_curve
+        df['equity_curve'] = equity_curve
         df['signal'] = signals
         df['strategy_returns'] = df['equity_curve'].pct_change().fillna(0)
         df['cum_strategy_returns'] = df['equity_curve'] / self.initial_balance
@@ -115,35 +264,97 @@ class Backtester:
         
         return self.calculate_metrics(df, trades_count)
 
-    def calculate_metrics(self, df, trades_count=0):
+    def _simulate(self, prices, scores, tradable, long_threshold, short_threshold,
+                  sl_pct, tp_pct, trailing_sl_pct, engine, execution, sub_bars):
+        if execution == 'close':
+            return get_engine(engine)(prices, scores, tradable, long_threshold, short_threshold,
+                                      sl_pct, tp_pct, trailing_sl_pct, self.fee, self.initial_balance)
+        if execution != 'intrabar':
+            raise ValueError(f"Unknown execution mode '{execution}', expected 'close' or 'intrabar'")
+        ranges = None
+        if sub_bars is not None:
+            ranges = (*sub_bar_ranges(self.df.index, sub_bars.index),
+                      *(sub_bars[col].to_numpy(dtype=np.float64) for col in ('open', 'high', 'low', 'close')))
+        df = self.df
+        return simulate_intrabar(df['open'].to_numpy(dtype=np.float64), df['high'].to_numpy(dtype=np.float64),
+                                 df['low'].to_numpy(dtype=np.float64), prices, scores, tradable,
+                                 long_threshold, short_threshold, sl_pct, tp_pct, trailing_sl_pct,
+                                 self.fee, self.initial_balance, sub_bars=ranges, engine=engine)
+
+    def _run_lean(self, scores, long_threshold, short_threshold, sl_pct, tp_pct,
+                  trailing_sl_pct, skip_weekends, allowed_sessions, engine, execution='close', sub_bars=None):
+        index = self.df.index
+        prices = self.df['close'].to_numpy(dtype=np.float64)
+        scores = np.asarray(self.df['unum_score'] if scores is None else scores, dtype=np.float64)
+        tradable = tradable_mask(index, skip_weekends, allowed_sessions)
+
+        equity_curve, signals, trades_count, trades = self._simulate(
+            prices, scores, tradable,
+            long_threshold, short_threshold,
+            sl_pct, tp_pct, trailing_sl_pct,
+            engine, execution, sub_bars
+        )
+        self.trades = self.trade_ledger(trades)
+
+        market_returns = _pct_change(prices)
+        strategy_returns = np.nan_to_num(_pct_change(equity_curve), nan=0.0)
+        peak = np.maximum.accumulate(equity_curve)
+        results = pd.DataFrame({
+            'signal': signals,
+            'market_returns': market_returns,
+            'equity_curve': equity_curve,
+            'strategy_returns': strategy_returns,
+            'cum_strategy_returns': equity_curve / self.initial_balance,
+            'cum_market_returns': np.cumprod(1 + np.nan_to_num(market_returns, nan=0.0)),
+            'drawdown': (equity_curve - peak) / peak
+        }, index=index, copy=False)
+        return results, self._metrics(results['equity_curve'].to_numpy(), self.trades,
+                                      results['strategy_returns'].to_numpy(),
+                                      results['cum_market_returns'].to_numpy(),
+                                      results['drawdown'].to_numpy(), trades_count)
+
+    def run_vectorized_backtest(self, **kwargs):
+        """
+        Runs the backtest on the pure-NumPy engine.
+        """
+        return self.run_backtest(engine='numpy', **kwargs)
+
+    def trade_ledger(self, trades) -> np.ndarray:
+        """
+        Raw engine ledger (see core.engine) -> TRADE_DTYPE record array.
+        """
+        df = self.df
+        lows = df['low' if 'low' in df.columns else 'close'].to_numpy(dtype=np.float64)
+        highs = df['high' if 'high' in df.columns else 'close'].to_numpy(dtype=np.float64)
+        return build_trade_ledger(trades, df.index, lows, highs, self.fee)
+
+    def trades_frame(self) -> pd.DataFrame:
+        """
+        The last run's trade ledger as a frame indexed by entry time, exit reasons as names.
+        """
+        frame = pd.DataFrame(self.trades).set_index('entry_time')
+        frame['exit_reason'] = np.asarray(EXIT_REASONS)[frame['exit_reason'].to_numpy()]
+        return frame
+
+    def calculate_metrics(self, df, trades_count=0, trades=None):
         """
         Calculates performance KPIs.
+        trades: trade ledger (TRADE_DTYPE), the last run's by default
         """
-        total_return = (df['cum_strategy_returns'].iloc[-1] - 1) * 100
-        buy_hold_return = (df['cum_market_returns'].iloc[-1] - 1) * 100
-        
-        # Win Rate (Simplified: bars where we are in position and strategy_returns > 0)
-        active_bars = df[df['signal'] != 0]
-        win_rate = (active_bars['strategy_returns'] > 0).sum() / len(active_bars) * 100 if len(active_bars) > 0 else 0
-        
         # Drawdown
         df['peak'] = df['equity_curve'].cummax()
         df['drawdown'] = (df['equity_curve'] - df['peak']) / df['peak']
-        max_drawdown = df['drawdown'].min() * 100
-        
-        # Sharpe Ratio (Rough estimate using candle frequency)
-        # Note: Risk-free rate assumed 0
-        returns = df['strategy_returns'].dropna()
-        sharpe = (returns.mean() / returns.std()) * np.sqrt(252 * 6) if returns.std() != 0 else 0 # Adjust for 4h candles
-        
-        metrics = {
-            "total_return_pct": round(total_return, 2),
-            "buy_hold_return_pct": round(buy_hold_return, 2),
-            "win_rate_pct": round(win_rate, 2),
-            "max_drawdown_pct": round(max_drawdown, 2),
-            "sharpe_ratio": round(sharpe, 2),
-            "final_balance": round(df['equity_curve'].iloc[-1], 2),
-            "total_trades": int(trades_count)
-        }
-        
+        metrics = self._metrics(
+            df['equity_curve'].to_numpy(dtype=np.float64), self.trades if trades is None else trades,
+            df['strategy_returns'].to_numpy(dtype=np.float64),
+            df['cum_market_returns'].to_numpy(dtype=np.float64),
+            df['drawdown'].to_numpy(dtype=np.float64), trades_count
+        )
         return df, metrics
+
+    trade_metrics = staticmethod(trade_metrics)
+
+    def _metrics(self, equity_curve, trades, strategy_returns, cum_market_returns, drawdown, trades_count):
+        return performance_metrics(equity_curve, trades, strategy_returns, cum_market_returns, drawdown,
+                                   trades_count, self.initial_balance, periods_per_year(self.df.index))
+
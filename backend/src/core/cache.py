@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+
+class FrameCache:
+    """
+    In-process LRU cache of computed DataFrames with a memory budget.
+    Concurrent requests for the same missing key are single-flighted:
+    one caller computes, the others wait for its result.
+    """
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # key -> (frame, nbytes, group)
+        self._inflight = {} # key -> threading.Event
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.waits = 0
+
+    def get_or_compute(self, key, compute, group=None):
+        """
+        Returns a shallow copy of the cached frame for `key`, computing it on a miss.
+        Entries sharing `group` with a different key (e.g. an older data version)
+        are dropped when the new one is stored.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0].copy(deep=False)
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    break
+                self.waits += 1
+            # Another caller is computing this key; if it fails we retry ourselves
+            event.wait()
+
+        try:
+            frame = compute()
+            self._store(key, frame, group)
+            return frame.copy(deep=False)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def _store(self, key, frame, group):
+        nbytes = int(frame.memory_usage(index=True, deep=False).sum())
+        with self._lock:
+            if group is not None:
+                for old_key in [k for k, e in self._entries.items() if e[2] == group and k != key]:
+                    self._drop(old_key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (frame, nbytes, group)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self.bytes -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "single_flight_waits": self.waits
+            }
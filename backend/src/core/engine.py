@@ -0,0 +1,461 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Execution engines for the Backtester bar loop.
+# Every engine takes plain arrays and returns (equity_curve, signals, trades_count, trades),
+# where equity_curve[0] is the initial balance, signals holds the position (-1/0/1)
+# after each bar and trades is the raw ledger (one row per trade, TRADE_FIELDS columns).
+# All engines must stay bit-identical to the reference loop.
+
+# Columns of the raw ledger. Entry balance is the balance before the entry fee;
+# a trade still open at the end is marked at the last bar with reason EXIT_OPEN.
+T_ENTRY_BAR, T_EXIT_BAR, T_SIDE, T_ENTRY_PRICE, T_EXIT_PRICE, T_REASON, T_ENTRY_BALANCE = range(7)
+TRADE_FIELDS = 7
+EXIT_REASONS = ('open', 'stop_loss', 'take_profit', 'trailing_stop')
+EXIT_OPEN, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, EXIT_TRAILING_STOP = range(4)
+
+
+def _open_trade(trades, row, bar, side, price, balance, last_bar, last_price):
+    # Until it closes, a trade is marked as open at the last bar
+    trades[row, T_ENTRY_BAR] = bar
+    trades[row, T_EXIT_BAR] = last_bar
+    trades[row, T_SIDE] = side
+    trades[row, T_ENTRY_PRICE] = price
+    trades[row, T_EXIT_PRICE] = last_price
+    trades[row, T_REASON] = EXIT_OPEN
+    trades[row, T_ENTRY_BALANCE] = balance
+
+
+def _close_trade(trades, row, bar, price, reason):
+    trades[row, T_EXIT_BAR] = bar
+    trades[row, T_EXIT_PRICE] = price
+    trades[row, T_REASON] = reason
+
+
+if njit is not None:
+    # Compiled first so the kernels below can call them
+    _open_trade = njit(cache=True, nogil=True)(_open_trade)
+    _close_trade = njit(cache=True, nogil=True)(_close_trade)
+
+
+def simulate_reference(prices, scores, tradable, long_threshold, short_threshold,
+                       sl_pct, tp_pct, trailing_sl_pct, fee, initial_balance):
+    """
+    Reference implementation: the original pure-Python bar loop.
+    Kept as the ground truth for the faster engines.
+    """
+    balance = initial_balance
+    position = 0 # 1 for Long, -1 for Short, 0 for None
+    entry_price = 0
+    peak_price = 0
+    equity_curve = []
+    trades_count = 0
+    signals = [0] * len(prices)
+    trades = []
+
+    for i in range(1, len(prices)):
+        # Update Equity Curve based on price movement
+        curr_equity = balance
+        if position == 1:
+            curr_equity = (prices[i] / entry_price) * balance * (1 - fee)
+        elif position == -1:
+            curr_equity = (2 - (prices[i] / entry_price)) * balance * (1 - fee)
+
+        # 1. Exit Logic (SL / TP / Trailing Stop) - Exits are ALWAYS active once in trade
+        reason = EXIT_OPEN
+        if position != 0:
+            if position == 1:
+                peak_price = max(peak_price, prices[i])
+                if prices[i] <= entry_price * (1 - sl_pct):
+                    reason = EXIT_STOP_LOSS
+                elif prices[i] >= entry_price * (1 + tp_pct):
+                    reason = EXIT_TAKE_PROFIT
+                elif prices[i] <= peak_price * (1 - trailing_sl_pct):
+                    reason = EXIT_TRAILING_STOP
+            elif position == -1:
+                peak_price = min(peak_price, prices[i])
+                if prices[i] >= entry_price * (1 + sl_pct):
+                    reason = EXIT_STOP_LOSS
+                elif prices[i] <= entry_price * (1 - tp_pct):
+                    reason = EXIT_TAKE_PROFIT
+                elif prices[i] >= peak_price * (1 + trailing_sl_pct):
+                    reason = EXIT_TRAILING_STOP
+
+        if reason != EXIT_OPEN:
+            balance = curr_equity * (1 - fee)
+            position = 0
+            trades_count += 1
+            trades[-1][T_EXIT_BAR], trades[-1][T_EXIT_PRICE], trades[-1][T_REASON] = i, prices[i], reason
+
+        # 2. Entry Logic (Only if not in position and the bar is tradable)
+        if position == 0 and tradable[i]:
+            if scores[i] > long_threshold:
+                position = 1
+            elif scores[i] < short_threshold:
+                position = -1
+            if position != 0:
+                trades.append([i, len(prices) - 1, position, prices[i], prices[-1], EXIT_OPEN, balance])
+                entry_price = prices[i]
+                peak_price = prices[i]
+                balance = balance * (1 - fee)
+                trades_count += 1
+
+        equity_curve.append(curr_equity)
+        signals[i] = position
+
+    equity = np.array([initial_balance] + equity_curve, dtype=np.float64)
+    ledger = np.array(trades, dtype=np.float64).reshape(-1, TRADE_FIELDS)
+    return equity, np.array(signals, dtype=np.int64), trades_count, ledger
+
+
+def _bar_loop_kernel(prices, scores, tradable, long_threshold, short_threshold,
+                     sl_pct, tp_pct, trailing_sl_pct, fee, initial_balance):
+    """
+    Same state machine as simulate_reference, written over preallocated
+    float64 arrays so Numba can compile it.
+    """
+    n = prices.shape[0]
+    equity = np.empty(n, dtype=np.float64)
+    signals = np.zeros(n, dtype=np.int64)
+    equity[0] = initial_balance
+    # A trade spans at least one bar, so there are at most n of them
+    trades = np.empty((n, TRADE_FIELDS), dtype=np.float64)
+    n_trades = 0
+
+    balance = initial_balance
+    position = 0
+    entry_price = 0.0
+    peak_price = 0.0
+    trades_count = 0
+
+    for i in range(1, n):
+        price = prices[i]
+        curr_equity = balance
+        if position == 1:
+            curr_equity = (price / entry_price) * balance * (1 - fee)
+        elif position == -1:
+            curr_equity = (2 - (price / entry_price)) * balance * (1 - fee)
+
+        reason = EXIT_OPEN
+        if position == 1:
+            if price > peak_price:
+                peak_price = price
+            if price <= entry_price * (1 - sl_pct):
+                reason = EXIT_STOP_LOSS
+            elif price >= entry_price * (1 + tp_pct):
+                reason = EXIT_TAKE_PROFIT
+            elif price <= peak_price * (1 - trailing_sl_pct):
+                reason = EXIT_TRAILING_STOP
+        elif position == -1:
+            if price < peak_price:
+                peak_price = price
+            if price >= entry_price * (1 + sl_pct):
+                reason = EXIT_STOP_LOSS
+            elif price <= entry_price * (1 - tp_pct):
+                reason = EXIT_TAKE_PROFIT
+            elif price >= peak_price * (1 + trailing_sl_pct):
+                reason = EXIT_TRAILING_STOP
+
+        if reason != EXIT_OPEN:
+            balance = curr_equity * (1 - fee)
+            position = 0
+            trades_count += 1
+            _close_trade(trades, n_trades - 1, i, price, reason)
+
+        if position == 0 and tradable[i]:
+            if scores[i] > long_threshold:
+                position = 1
+            elif scores[i] < short_threshold:
+                position = -1
+            if position != 0:
+                _open_trade(trades, n_trades, i, position, price, balance, n - 1, prices[n - 1])
+                n_trades += 1
+                entry_price = price
+                peak_price = price
+                balance = balance * (1 - fee)
+                trades_count += 1
+
+        equity[i] = curr_equity
+        signals[i] = position
+
+    return equity, signals, trades_count, trades[:n_trades].copy()
+
+
+if njit is not None:
+    _bar_loop_compiled = njit(cache=True, nogil=True)(_bar_loop_kernel)
+else:
+    _bar_loop_compiled = None
+
+
+def simulate_numba(prices, scores, tradable, long_threshold, short_threshold,
+                   sl_pct, tp_pct, trailing_sl_pct, fee, initial_balance):
+    """
+    JIT-compiled bar loop (requires numba).
+    """
+    if _bar_loop_compiled is None:
+        raise RuntimeError("numba is not installed")
+    return _bar_loop_compiled(prices, scores, tradable,
+                              float(long_threshold), float(short_threshold),
+                              float(sl_pct), float(tp_pct), float(trailing_sl_pct),
+                              float(fee), float(initial_balance))
+
+
+def _find_exit(prices, start, position, entry_price, sl_pct, tp_pct, trailing_sl_pct):
+    """
+    Returns the index of the first bar >= start that triggers an exit,
+    or len(prices) if the trade never closes. Scans in doubling windows
+    so the cost is proportional to the trade length, not the history.
+    """
+    n = len(prices)
+    peak_price = entry_price
+    width = 64
+    while start < n:
+        stop = min(n, start + width)
+        window = prices[start:stop]
+        if position == 1:
+            peaks = np.maximum(np.maximum.accumulate(window), peak_price)
+            hit = (window <= entry_price * (1 - sl_pct)) | \
+                  (window >= entry_price * (1 + tp_pct)) | \
+                  (window <= peaks * (1 - trailing_sl_pct))
+        else:
+            peaks = np.minimum(np.minimum.accumulate(window), peak_price)
+            hit = (window >= entry_price * (1 + sl_pct)) | \
+                  (window <= entry_price * (1 - tp_pct)) | \
+                  (window >= peaks * (1 + trailing_sl_pct))
+        idx = np.flatnonzero(hit)
+        if idx.size:
+            return start + int(idx[0])
+        peak_price = peaks[-1]
+        start = stop
+        width *= 2
+    return n
+
+
+def simulate_numpy(prices, scores, tradable, long_threshold, short_threshold,
+                   sl_pct, tp_pct, trailing_sl_pct, fee, initial_balance):
+    """
+    Pure-NumPy fallback. Jumps from trade to trade instead of walking every bar:
+    entries are located with a precomputed candidate index, exits with a
+    vectorized window scan, and equity is filled segment by segment.
+    """
+    n = len(prices)
+    equity = np.empty(n, dtype=np.float64)
+    signals = np.zeros(n, dtype=np.int64)
+    equity[0] = initial_balance
+
+    long_entry = tradable & (scores > long_threshold)
+    short_entry = tradable & ~long_entry & (scores < short_threshold)
+    candidates = np.flatnonzero(long_entry | short_entry)
+
+    balance = initial_balance
+    trades_count = 0
+    trades = []
+    i = 1 # First bar not yet written while flat
+    k = None # Entry bar, set when re-entering on an exit bar
+
+    while i < n:
+        if k is None:
+            pos = np.searchsorted(candidates, i)
+            if pos == len(candidates):
+                equity[i:] = balance
+                break
+            k = int(candidates[pos])
+            # Flat bars up to and including the entry bar carry the pre-fee balance
+            equity[i:k + 1] = balance
+
+        position = 1 if long_entry[k] else -1
+        entry_price = prices[k]
+        trades.append([k, n - 1, position, entry_price, prices[-1], EXIT_OPEN, balance])
+        balance = balance * (1 - fee)
+        trades_count += 1
+
+        x = _find_exit(prices, k + 1, position, entry_price, sl_pct, tp_pct, trailing_sl_pct)
+        segment = prices[k + 1:x + 1]
+        if position == 1:
+            equity[k + 1:x + 1] = (segment / entry_price) * balance * (1 - fee)
+        else:
+            equity[k + 1:x + 1] = (2 - (segment / entry_price)) * balance * (1 - fee)
+        signals[k:x] = position
+        if x >= n:
+            break
+
+        balance = equity[x] * (1 - fee)
+        trades_count += 1
+        # The first condition that holds at the exit bar, in the bar loop's order
+        if position == 1:
+            stopped, target = prices[x] <= entry_price * (1 - sl_pct), prices[x] >= entry_price * (1 + tp_pct)
+        else:
+            stopped, target = prices[x] >= entry_price * (1 + sl_pct), prices[x] <= entry_price * (1 - tp_pct)
+        reason = EXIT_STOP_LOSS if stopped else EXIT_TAKE_PROFIT if target else EXIT_TRAILING_STOP
+        trades[-1][T_EXIT_BAR], trades[-1][T_EXIT_PRICE], trades[-1][T_REASON] = x, prices[x], reason
+        if long_entry[x] or short_entry[x]:
+            k = x
+        else:
+            k = None
+            i = x + 1
+
+    return equity, signals, trades_count, np.array(trades, dtype=np.float64).reshape(-1, TRADE_FIELDS)
+
+
+def _intrabar_kernel(opens, highs, lows, closes, scores, tradable,
+                     sub_start, sub_stop, sub_opens, sub_highs, sub_lows, sub_closes,
+                     long_threshold, short_threshold, sl_pct, tp_pct, trailing_sl_pct, fee, initial_balance):
+    """
+    Bar loop with exits filled inside the bar instead of at the close.
+    Entries still fill at the signal bar's close. While in a trade each bar
+    (or, when sub_start[i] < sub_stop[i], each lower-timeframe bar inside it,
+    in order) is checked as:
+    1. open beyond the stop (SL or trailing, whichever is tighter) or the
+       target: filled at the open (gap);
+    2. low/high through the stop: filled at the stop. A bar that touches both
+       stop and target counts as stopped, as the order is unknown; drilling
+       down into sub-bars narrows that ambiguity;
+    3. high/low through the target: filled at the target;
+    4. otherwise the peak moves to the high (low) and a close beyond the new
+       trailing level exits at the close.
+    """
+    n = closes.shape[0]
+    equity = np.empty(n, dtype=np.float64)
+    signals = np.zeros(n, dtype=np.int64)
+    equity[0] = initial_balance
+    trades = np.empty((n, TRADE_FIELDS), dtype=np.float64)
+    n_trades = 0
+
+    balance = initial_balance
+    position = 0
+    entry_price = 0.0
+    peak_price = 0.0
+    trades_count = 0
+
+    for i in range(1, n):
+        fill = 0.0
+        reason = EXIT_OPEN
+        if position != 0:
+            if sub_stop[i] > sub_start[i]:
+                o, h, l, c = sub_opens, sub_highs, sub_lows, sub_closes
+                first, last = sub_start[i], sub_stop[i]
+            else:
+                o, h, l, c = opens, highs, lows, closes
+                first, last = i, i + 1
+            for j in range(first, last):
+                if position == 1:
+                    stop_loss = entry_price * (1 - sl_pct)
+                    stop = max(stop_loss, peak_price * (1 - trailing_sl_pct))
+                    target = entry_price * (1 + tp_pct)
+                    if o[j] <= stop or (o[j] < target and l[j] <= stop):
+                        fill = min(o[j], stop)
+                        reason = EXIT_STOP_LOSS if stop == stop_loss else EXIT_TRAILING_STOP
+                    elif o[j] >= target or h[j] >= target:
+                        fill = max(o[j], target)
+                        reason = EXIT_TAKE_PROFIT
+                    else:
+                        if h[j] > peak_price:
+                            peak_price = h[j]
+                        if c[j] <= peak_price * (1 - trailing_sl_pct):
+                            fill = c[j]
+                            reason = EXIT_TRAILING_STOP
+                else:
+                    stop_loss = entry_price * (1 + sl_pct)
+                    stop = min(stop_loss, peak_price * (1 + trailing_sl_pct))
+                    target = entry_price * (1 - tp_pct)
+                    if o[j] >= stop or (o[j] > target and h[j] >= stop):
+                        fill = max(o[j], stop)
+                        reason = EXIT_STOP_LOSS if stop == stop_loss else EXIT_TRAILING_STOP
+                    elif o[j] <= target or l[j] <= target:
+                        fill = min(o[j], target)
+                        reason = EXIT_TAKE_PROFIT
+                    else:
+                        if l[j] < peak_price:
+                            peak_price = l[j]
+                        if c[j] >= peak_price * (1 + trailing_sl_pct):
+                            fill = c[j]
+                            reason = EXIT_TRAILING_STOP
+                if reason != EXIT_OPEN:
+                    break
+
+        price = fill if reason != EXIT_OPEN else closes[i]
+        curr_equity = balance
+        if position == 1:
+            curr_equity = (price / entry_price) * balance * (1 - fee)
+        elif position == -1:
+            curr_equity = (2 - (price / entry_price)) * balance * (1 - fee)
+
+        if reason != EXIT_OPEN:
+            balance = curr_equity * (1 - fee)
+            position = 0
+            trades_count += 1
+            _close_trade(trades, n_trades - 1, i, price, reason)
+
+        if position == 0 and tradable[i]:
+            if scores[i] > long_threshold:
+                position = 1
+            elif scores[i] < short_threshold:
+                position = -1
+            if position != 0:
+                _open_trade(trades, n_trades, i, position, closes[i], balance, n - 1, closes[n - 1])
+                n_trades += 1
+                entry_price = closes[i]
+                peak_price = closes[i]
+                balance = balance * (1 - fee)
+                trades_count += 1
+
+        equity[i] = curr_equity
+        signals[i] = position
+
+    return equity, signals, trades_count, trades[:n_trades].copy()
+
+
+if njit is not None:
+    _intrabar_compiled = njit(cache=True, nogil=True)(_intrabar_kernel)
+else:
+    _intrabar_compiled = None
+
+
+def simulate_intrabar(opens, highs, lows, closes, scores, tradable, long_threshold, short_threshold,
+                      sl_pct, tp_pct, trailing_sl_pct, fee, initial_balance, sub_bars=None, engine='auto'):
+    """
+    High/low execution (see _intrabar_kernel); same outputs as the close-price engines.
+    sub_bars: optional (sub_start, sub_stop, opens, highs, lows, closes) of a
+    lower timeframe, bar i covering sub-bars sub_start[i]:sub_stop[i]
+    (see periods.sub_bar_ranges).
+    engine: 'numba' (compiled), 'python' (same kernel, interpreted) or 'auto'.
+    """
+    if engine == 'auto':
+        engine = 'numba' if _intrabar_compiled is not None else 'python'
+    if engine not in ('numba', 'python') or (engine == 'numba' and _intrabar_compiled is None):
+        raise ValueError(f"Intrabar execution runs on the numba or python engine, not '{engine}'")
+    kernel = _intrabar_compiled if engine == 'numba' else _intrabar_kernel
+
+    arrays = [np.ascontiguousarray(a, dtype=np.float64) for a in (opens, highs, lows, closes, scores)]
+    if sub_bars is None:
+        empty = np.zeros(0, dtype=np.float64)
+        sub_bars = (np.zeros(len(closes), dtype=np.int64), np.zeros(len(closes), dtype=np.int64),
+                    empty, empty, empty, empty)
+    sub_start, sub_stop = (np.ascontiguousarray(a, dtype=np.int64) for a in sub_bars[:2])
+    sub_prices = [np.ascontiguousarray(a, dtype=np.float64) for a in sub_bars[2:]]
+    return kernel(*arrays, np.ascontiguousarray(tradable, dtype=np.bool_), sub_start, sub_stop, *sub_prices,
+                  float(long_threshold), float(short_threshold), float(sl_pct), float(tp_pct),
+                  float(trailing_sl_pct), float(fee), float(initial_balance))
+
+
+ENGINES = {
+    'python': simulate_reference,
+    'numpy': simulate_numpy,
+}
+if _bar_loop_compiled is not None:
+    ENGINES['numba'] = simulate_numba
+
+
+def get_engine(name='auto'):
+    """
+    Resolves an engine name. 'auto' picks numba when available, else numpy.
+    """
+    if name == 'auto':
+        name = 'numba' if 'numba' in ENGINES else 'numpy'
+    if name not in ENGINES:
+        raise ValueError(f"Unknown backtest engine '{name}'. Available: {sorted(ENGINES)}")
+    return ENGINES[name]
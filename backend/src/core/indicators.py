@@ -7,30 +7,91 @@ except ImportError:
 import ta as ta_lib
 import numpy as np
 
+# Levels checked for bounces and rejections
+FIB_BOUNCE_LEVELS = ('Fib_382', 'Fib_500', 'Fib_618')
+# Bars per block of the Fib kernel; keeps its levels x bars temporaries in cache
+FIB_BLOCK = 4096
+
+def fib_interaction(df: pd.DataFrame, tolerance=0.005, lookback=1, levels=FIB_BOUNCE_LEVELS, block=FIB_BLOCK):
+    """
+    Touch/bounce/reject detector over all `levels` at once (levels x bars).
+    A level is touched when the low (high) comes within `tolerance` * close of it,
+    on the current bar or one of the `lookback` - 1 before.
+    Returns int8: 1 where a touched level is below the close (bounce),
+    -1 where it is above the close (rejection), 0 otherwise. Bounces win.
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    level_values = [df[name].to_numpy(dtype=np.float64) for name in levels]
+    signal = np.zeros(len(df), dtype=np.int8)
+
+    for start in range(0, len(df), block):
+        end = min(start + block, len(df))
+        first = max(start - lookback + 1, 0) # Earlier bars still inside the lookback window
+        lv = np.stack([values[first:end] for values in level_values])
+        tol = close[first:end] * tolerance
+        upper = lv + tol
+        lower = lv - tol
+        lv = lv[:, start - first:]
+        c = close[start:end]
+
+        def touches(price):
+            hit = price <= upper
+            hit &= price >= lower
+            if lookback > 1:
+                counts = np.cumsum(hit, axis=1, dtype=np.int32)
+                counts[:, lookback:] -= counts[:, :-lookback]
+                hit = counts > 0
+            return hit[:, start - first:]
+
+        bounced = touches(low[first:end])
+        bounced &= c > lv
+        rejected = touches(high[first:end])
+        rejected &= c < lv
+        out = signal[start:end]
+        out[rejected.any(axis=0)] = -1
+        out[bounced.any(axis=0)] = 1
+    return signal
+
 class Indicators:
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
+    def __init__(self, df: pd.DataFrame, copy=True, dtype=None):
+        """
+        copy: deep-copy df. With copy=False the OHLCV buffers are shared
+        (copy-on-write) and only the new indicator columns are allocated.
+        dtype: storage dtype of the indicator columns, e.g. np.float32 (default float64)
+        """
+        self.df = df.copy(deep=copy)
+        self.dtype = dtype
         if not isinstance(self.df.index, pd.DatetimeIndex):
              self.df.index = pd.to_datetime(self.df.index)
-        self.df.sort_index(inplace=True)
+        if not self.df.index.is_monotonic_increasing:
+            self.df.sort_index(inplace=True)
 
-    def add_all_indicators(self):
+    def add_all_indicators(self, params: dict = None):
         """
         Adds all requested indicators to the dataframe.
+        params: optional keyword overrides per indicator, keyed by method suffix,
+        e.g. {'rsi': {'period': 21}, 'moving_averages': {'periods': [10, 30]}}
         """
-        self.add_moving_averages()
-        self.add_rsi()
-        self.add_stoch()
-        self.add_macd()
+        params = params or {}
+        inputs = set(self.df.columns)
+        self.add_moving_averages(**params.get('moving_averages', {}))
+        self.add_rsi(**params.get('rsi', {}))
+        self.add_stoch(**params.get('stoch', {}))
+        self.add_macd(**params.get('macd', {}))
         self.add_obv()
-        self.add_volume_metrics()
-        self.add_atr()
-        self.add_aroon()
-        self.add_cci()
-        self.add_adx()
-        self.add_bollinger_bands()
-        self.add_keltner_channels()
-        self.add_fibonacci_levels()
+        self.add_volume_metrics(**params.get('volume_metrics', {}))
+        self.add_atr(**params.get('atr', {}))
+        self.add_aroon(**params.get('aroon', {}))
+        self.add_cci(**params.get('cci', {}))
+        self.add_adx(**params.get('adx', {}))
+        self.add_bollinger_bands(**params.get('bollinger_bands', {}))
+        self.add_keltner_channels(**params.get('keltner_channels', {}))
+        self.add_fibonacci_levels(**params.get('fibonacci_levels', {}))
+        if self.dtype is not None:
+            outputs = [c for c in self.df.columns if c not in inputs]
+            self.df = self.df.astype(dict.fromkeys(outputs, self.dtype))
         return self.df
 
     def add_moving_averages(self, periods=[20, 50, 200]):
@@ -116,10 +177,9 @@ class Indicators:
         self.df['Fib_786'] = self.df['Roll_Min'] + diff * 0.786
         self.df['Fib_100'] = self.df['Roll_Max']
 
-    def check_fib_interaction(self, tolerance=0.03):
+    def check_fib_interaction(self, tolerance=0.005, lookback=1, levels=FIB_BOUNCE_LEVELS):
         """
         Analyzes if current price is within tolerance of Fibonacci levels.
-        Returns a signal or mask.
+        Returns an int8 signal per bar (see fib_interaction).
         """
-        # TODO: Implement logic to detect "touches" or "bounces"
-        pass
+        return fib_interaction(self.df, tolerance, lookback, levels)
@@ -0,0 +1,134 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Rolling statistics of an equity curve, each O(N) whatever the window:
+# means and variances from differences of cumulative sums, window drawdowns
+# from a two-stack queue. Values are NaN until a full window exists.
+
+
+def _sliding_max_drawdown(equity, size):
+    """
+    Max drawdown (<= 0) of equity[i - size + 1 : i + 1] against that window's
+    own running peak, for every i (shorter windows at the start). Two-stack
+    queue: bars are pushed on the back, and when the front runs empty the
+    back is moved onto it with suffix aggregates (max, min, worst ratio of a
+    later value to an earlier one), so each bar is moved once.
+    """
+    n = equity.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    suffix_max = np.empty(n, dtype=np.float64)
+    suffix_min = np.empty(n, dtype=np.float64)
+    suffix_worst = np.empty(n, dtype=np.float64)
+    head = 0 # Front stack: bars [head, split), back stack: bars [split, i]
+    split = 0
+    back_max = -np.inf
+    back_min = np.inf
+    back_worst = 1.0
+    for i in range(n):
+        v = equity[i]
+        back_worst = min(back_worst, v / max(back_max, v))
+        back_max = max(back_max, v)
+        back_min = min(back_min, v)
+        if i - head >= size:
+            if head == split:
+                suffix_max[i] = v
+                suffix_min[i] = v
+                suffix_worst[i] = 1.0
+                for p in range(i - 1, split - 1, -1):
+                    suffix_worst[p] = min(suffix_worst[p + 1], suffix_min[p + 1] / equity[p])
+                    suffix_max[p] = max(suffix_max[p + 1], equity[p])
+                    suffix_min[p] = min(suffix_min[p + 1], equity[p])
+                split = i + 1
+                back_max = -np.inf
+                back_min = np.inf
+                back_worst = 1.0
+            head += 1
+        if head < split:
+            worst = min(suffix_worst[head], back_worst, back_min / suffix_max[head])
+        else:
+            worst = back_worst
+        out[i] = worst - 1
+    return out
+
+
+if njit is not None:
+    _sliding_max_drawdown = njit(cache=True, nogil=True)(_sliding_max_drawdown)
+
+
+def sliding_max_drawdown(equity, size):
+    return _sliding_max_drawdown(np.ascontiguousarray(equity, dtype=np.float64), int(size))
+
+
+def rolling_sum(values, window):
+    """
+    Sums of every full window of `values`, aligned to the window's last
+    element (NaN before): one cumulative sum, one subtraction.
+    """
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        total = np.concatenate([[0.0], np.cumsum(values)])
+        out[window - 1:] = total[window:] - total[:-window]
+    return out
+
+
+def drawdown_duration(equity):
+    """
+    Bars since the last equity high, per bar (0 at a new high).
+    """
+    position = np.arange(len(equity))
+    at_peak = equity >= np.maximum.accumulate(equity)
+    return position - np.maximum.accumulate(np.where(at_peak, position, 0))
+
+
+def rolling_metrics(equity, window, periods_per_year) -> dict:
+    """
+    Trailing-window statistics of an equity curve, annualized with
+    periods_per_year: Sharpe, Sortino, volatility (%), Calmar, plus the
+    drawdown duration in bars. Windows hold `window` bar returns. Calmar's
+    drawdown is the max drawdown within the window (window + 1 equity values).
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    window = int(window)
+    if window < 2:
+        raise ValueError("window must be at least 2 bars")
+    n = len(equity)
+    returns = np.zeros(n)
+    np.divide(equity[1:], equity[:-1], out=returns[1:])
+    returns[1:] -= 1
+
+    # Window moments from cumulative sums of centred returns (less cancellation)
+    center = returns[1:].mean() if n > 1 else 0.0
+    shifted = returns - center
+    shifted[0] = 0.0
+    s1 = rolling_sum(shifted, window)
+    s2 = rolling_sum(shifted * shifted, window)
+    downside = rolling_sum(np.minimum(returns, 0.0) ** 2, window)
+    # Bar 0 carries no return: the first full window ends at bar `window`
+    for column in (s1, s2, downside):
+        column[:window] = np.nan
+    mean = s1 / window + center
+    std = np.sqrt(np.maximum(s2 - s1 * s1 / window, 0.0) / (window - 1))
+    scale = np.sqrt(periods_per_year)
+
+    # Window return and max drawdown
+    window_return = np.full(n, np.nan)
+    window_return[window:] = equity[window:] / equity[:-window]
+    trough = sliding_max_drawdown(equity, window + 1)
+    trough[:window] = np.nan
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * scale, np.nan)
+        sortino = np.where(downside > 0, mean / np.sqrt(downside / window) * scale, np.nan)
+        annual_return = window_return ** (periods_per_year / window) - 1
+        calmar = np.where(trough < 0, annual_return / -trough, np.nan)
+    return {
+        'rolling_sharpe': sharpe,
+        'rolling_sortino': sortino,
+        'rolling_volatility_pct': std * scale * 100,
+        'rolling_calmar': calmar,
+        'drawdown_bars': drawdown_duration(equity)
+    }
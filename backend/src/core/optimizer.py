@@ -0,0 +1,321 @@
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .strategy import SignalAggregator, CATEGORIES
+from .backtest import Backtester
+
+
+def simplex_weights(step=0.1):
+    """
+    Every category weight vector (trend, volume_levels, momentum) with
+    non-negative multiples of `step` summing to 1, as a (K x 3) matrix.
+    """
+    n = int(round(1 / step))
+    if n < 1 or not np.isclose(n * step, 1):
+        raise ValueError(f"Weight step must divide 1, got {step}")
+    points = [(i, j, n - i - j) for i in range(n + 1) for j in range(n + 1 - i)]
+    return np.array(points, dtype=np.float64) / n
+
+
+def weight_candidates(weights, backtest_params):
+    """
+    Optimizer candidates for the rows of a (K x 3) weight matrix, all with the same backtest params.
+    """
+    return [{'weights': dict(zip(CATEGORIES, map(float, row))), 'backtest': backtest_params}
+            for row in np.asarray(weights)]
+
+
+class SharedFrame:
+    """
+    Publishes the numeric columns of a DataFrame in a single shared memory block.
+    Layout: one float64 row per column plus an int64 row for the index (epoch ns),
+    so workers can rebuild the frame without unpickling any market data.
+    """
+    def __init__(self, df: pd.DataFrame):
+        numeric = df.select_dtypes(include=[np.number])
+        self.columns = list(numeric.columns)
+        self.n_rows = len(df)
+        size = max(1, (len(self.columns) + 1) * self.n_rows * 8)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+
+        block = np.ndarray((len(self.columns) + 1, self.n_rows), dtype=np.float64, buffer=self.shm.buf)
+        for j, col in enumerate(self.columns):
+            block[j] = numeric[col].to_numpy(dtype=np.float64)
+        block[-1].view(np.int64)[:] = np.asarray(df.index, dtype='datetime64[ns]').view(np.int64)
+
+    @property
+    def descriptor(self):
+        """Picklable handle passed to workers."""
+        return (self.shm.name, tuple(self.columns), self.n_rows)
+
+    def release(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _attach(name):
+    """Attaches to an existing block without taking over its lifetime."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: pool workers share the parent's resource tracker,
+        # which already tracks the block and unlinks it only via the parent
+        return shared_memory.SharedMemory(name=name)
+
+
+# Per-worker cache of the currently attached frame: {name: (shm, df)}
+_worker_frames = {}
+# Scorer of the attached frame, built on the first candidate: {name: UnumScorer}
+_worker_scorers = {}
+
+
+def attach_frame(descriptor):
+    """
+    Rebuilds a read-only DataFrame view over a SharedFrame block.
+    """
+    name, columns, n_rows = descriptor
+    if name in _worker_frames:
+        return _worker_frames[name][1]
+
+    # Only one job's data is kept mapped per worker
+    for shm, _ in _worker_frames.values():
+        shm.close()
+    _worker_frames.clear()
+    _worker_scorers.clear()
+
+    shm = _attach(name)
+    block = np.ndarray((len(columns) + 1, n_rows), dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    index = pd.DatetimeIndex(block[-1].view('datetime64[ns]').copy(), name='timestamp')
+    df = pd.DataFrame({col: block[j] for j, col in enumerate(columns)}, index=index, copy=False)
+    _worker_frames[name] = (shm, df)
+    return df
+
+
+def attach_scorer(descriptor):
+    """
+    UnumScorer of the shared frame. Signals are stacked once per job and
+    worker; candidates only re-weight them.
+    """
+    scorer = _worker_scorers.get(descriptor[0])
+    if scorer is None:
+        scorer = _worker_scorers[descriptor[0]] = SignalAggregator(attach_frame(descriptor), inplace=False).scorer()
+    return scorer
+
+
+def evaluate_candidates(descriptor, candidates):
+    """
+    Worker entry point: scores and backtests a chunk of candidates against the shared frame.
+    candidate: {'weights': {...}, 'sub_weights': {...SUB_WEIGHTS-style, optional},
+                'backtest': {...run_backtest kwargs...}, 'bars': optional int}
+    Weighted candidates are scored together as one (K x N) batch. With
+    'bars', only the most recent bars are backtested (scored on the full
+    history, so indicator warm-up matches the full run).
+    """
+    df = attach_frame(descriptor)
+    scorer = attach_scorer(descriptor)
+    weighted = [i for i, c in enumerate(candidates) if c.get('weights')]
+    scores = dict(zip(weighted, scorer.score_batch([candidates[i]['weights'] for i in weighted],
+                                                   [candidates[i].get('sub_weights') for i in weighted]))) if weighted else {}
+    results = []
+    for i, candidate in enumerate(candidates):
+        # Candidates without weights use each bar's regime weights
+        candidate_scores = scores[i] if i in scores else scorer.score()
+        start = len(df) - candidate['bars'] if candidate.get('bars') else 0
+        backtester = Backtester(df.iloc[start:], copy=False)
+        _, metrics = backtester.run_backtest(scores=candidate_scores[start:], lean=True, **candidate.get('backtest', {}))
+        results.append({**candidate, 'metrics': {k: float(v) for k, v in metrics.items()}})
+    return results
+
+
+def evaluate_candidate(descriptor, candidate):
+    """
+    Worker entry point for a single candidate.
+    """
+    return evaluate_candidates(descriptor, [candidate])[0]
+
+
+class OptimizerJob:
+    def __init__(self, candidates, rank_by):
+        self.id = uuid.uuid4().hex
+        self.total = len(candidates)
+        self.rank_by = rank_by
+        self.results = []
+        self.errors = []
+        self.status = 'running'
+        self.created_at = time.time()
+        self.finished_at = None
+        self.shared = None
+
+    def snapshot(self, top=None):
+        ranked = sorted(self.results, key=lambda r: r['metrics'][self.rank_by], reverse=True)
+        best = ranked[0] if ranked else None
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "completed": len(self.results) + len(self.errors),
+            "total": self.total,
+            "elapsed_sec": round((self.finished_at or time.time()) - self.created_at, 3),
+            "best_weights": best.get('weights') if best else None,
+            "best_roi": best['metrics']['total_return_pct'] if best else None,
+            "best": best,
+            "results": ranked[:top] if top is not None else ranked,
+            "errors": self.errors[:10]
+        }
+
+
+class OptimizerPool:
+    """
+    Runs candidate evaluations (and other jobs, see start) across a ProcessPoolExecutor.
+    The market data of each job is published once via SharedFrame and only
+    the small descriptor and candidate chunks are pickled per task.
+    """
+    def __init__(self, max_workers=None, max_jobs=100, chunks_per_worker=4):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self.max_jobs = max_jobs
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs threads (uvicorn, numba) is unsafe
+                ctx = multiprocessing.get_context('spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+            return self._executor
+
+    def _submit(self, fn, *args):
+        executor = self.executor
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory): the executor refuses all
+            # work from then on, so later jobs get a fresh one
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            return self.executor.submit(fn, *args)
+
+    def submit(self, df: pd.DataFrame, candidates, rank_by='total_return_pct'):
+        """
+        Starts a job and returns its id immediately.
+        """
+        job = OptimizerJob(candidates, rank_by)
+        return self.start(job, df, [(evaluate_candidates, (chunk,), chunk) for chunk in self._chunks(candidates)])
+
+    def _chunks(self, candidates):
+        # A few chunks per worker: batch scoring without starving the pool
+        size = -(-len(candidates) // (self.max_workers * self.chunks_per_worker)) or 1
+        return [candidates[start:start + size] for start in range(0, len(candidates), size)]
+
+    def evaluate(self, descriptor, candidates):
+        """
+        Blocking: evaluates candidates against a published frame across the
+        pool and returns their results in candidate order.
+        """
+        futures = [self._submit(evaluate_candidates, descriptor, chunk) for chunk in self._chunks(candidates)]
+        return [result for future in futures for result in future.result()]
+
+    def start_driver(self, job, df: pd.DataFrame):
+        """
+        Publishes df and runs job.drive(evaluate) on a background thread, for
+        jobs that choose their next candidates from earlier results (see core.search).
+        evaluate(candidates) returns their results, evaluated across the pool.
+        """
+        job.shared = SharedFrame(df)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        descriptor = job.shared.descriptor
+
+        def drive():
+            try:
+                job.drive(lambda candidates: self.evaluate(descriptor, candidates))
+            except Exception as e:
+                with self._lock:
+                    job.errors.append({'error': str(e)})
+            finally:
+                self._finish(job)
+        threading.Thread(target=drive, name=f"optimizer-{job.id[:8]}", daemon=True).start()
+        return job.id
+
+    def start(self, job, df: pd.DataFrame, tasks):
+        """
+        Publishes df and runs the tasks of `job` on the pool; returns the job id.
+        task: (fn, args, items) - fn(descriptor, *args) returns one result per item
+        """
+        job.shared = SharedFrame(df)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+
+        if not tasks:
+            self._finish(job)
+            return job.id
+
+        descriptor = job.shared.descriptor
+        for i, (fn, args, items) in enumerate(tasks):
+            try:
+                future = self._submit(fn, descriptor, *args)
+            except Exception as e:
+                # Tasks that never reached the pool fail now, so the job still finishes
+                self._record(job, failed=[item for _, _, rest in tasks[i:] for item in rest], error=e)
+                break
+            future.add_done_callback(lambda f, job=job, items=items: self._collect(job, items, f))
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _collect(self, job, items, future):
+        try:
+            self._record(job, results=future.result())
+        except (Exception, CancelledError) as e:
+            self._record(job, failed=items, error=e)
+
+    def _record(self, job, results=(), failed=(), error=None):
+        with self._lock:
+            job.results.extend(results)
+            job.errors.extend({**item, 'error': str(error) or type(error).__name__} for item in failed)
+            done = len(job.results) + len(job.errors) == job.total
+        if done:
+            self._finish(job)
+
+    def _finish(self, job):
+        job.status = 'done' if job.results or not job.errors else 'failed'
+        job.finished_at = time.time()
+        if job.shared is not None:
+            job.shared.release()
+            job.shared = None
+
+    def _evict(self):
+        # Drop the oldest finished jobs beyond max_jobs
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status != 'running':
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,58 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Bar-period helpers shared by the core modules and the data layer (timeframes)
+
+_UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+YEAR = pd.Timedelta(days=365)
+
+
+def parse_timeframe(timeframe: str) -> int:
+    """
+    Converts an exchange-style timeframe ('15m', '4h', '1d', '1w') to seconds.
+    """
+    match = re.fullmatch(r'(\d+)([mhdw])', timeframe)
+    if match is None or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+def infer_period(index: pd.DatetimeIndex) -> pd.Timedelta:
+    """
+    Bar spacing of a candle index (the median gap, so missing candles don't skew it).
+    None for fewer than two bars.
+    """
+    if len(index) < 2:
+        return None
+    ts = np.asarray(index, dtype='datetime64[ns]').view(np.int64)
+    return pd.Timedelta(int(np.median(np.diff(ts))), unit='ns')
+
+
+def periods_per_year(index: pd.DatetimeIndex, default=1.0) -> float:
+    """
+    Bars per year at the index's bar spacing, for annualizing per-bar statistics.
+    Crypto trades around the clock, so a year is 365 full days.
+    `default` for fewer than two bars.
+    """
+    period = infer_period(index)
+    if period is None or period <= pd.Timedelta(0):
+        return default
+    return YEAR / period
+
+
+def sub_bar_ranges(index: pd.DatetimeIndex, sub_index: pd.DatetimeIndex, period: pd.Timedelta = None):
+    """
+    Positions [start, stop) in a sorted lower-timeframe index of the sub-bars
+    inside each bar of `index` (bars labelled by open time, lasting `period`,
+    inferred by default). Bars without sub-bars get start == stop.
+    """
+    period = period if period is not None else infer_period(index)
+    ts = np.asarray(index, dtype='datetime64[ns]').view(np.int64)
+    sub = np.asarray(sub_index, dtype='datetime64[ns]').view(np.int64)
+    if period is None:
+        return np.zeros(len(ts), dtype=np.int64), np.zeros(len(ts), dtype=np.int64)
+    start = np.searchsorted(sub, ts, side='left')
+    stop = np.searchsorted(sub, ts + pd.Timedelta(period).value, side='left')
+    return start.astype(np.int64), stop.astype(np.int64)
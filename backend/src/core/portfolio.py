@@ -0,0 +1,396 @@
+import numpy as np
+import pandas as pd
+
+from .backtest import TRADE_DTYPE, tradable_mask, build_trade_ledger, performance_metrics, _pct_change
+from .engine import (
+    EXIT_REASONS, EXIT_OPEN, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, EXIT_TRAILING_STOP,
+    T_ENTRY_BAR, T_EXIT_BAR, T_SIDE, T_ENTRY_PRICE, T_EXIT_PRICE, T_REASON, T_ENTRY_BALANCE, TRADE_FIELDS
+)
+from .periods import periods_per_year
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Portfolio engines share the single-asset exit rules (core.engine) and add
+# shared cash: every asset is marked, exited and entered on the same bar loop.
+# They return (equity_curve, positions, exposure, trades): positions is the
+# (bars x assets) side held after each bar, exposure the marked value of the
+# open positions, trades the raw ledger of core.engine plus an asset column,
+# where the entry balance is the cash committed to the trade.
+T_ASSET = TRADE_FIELDS
+PORTFOLIO_TRADE_FIELDS = TRADE_FIELDS + 1
+
+PORTFOLIO_TRADE_DTYPE = np.dtype(TRADE_DTYPE.descr + [('asset', np.int16)])
+
+# How the cash committed to a new position is sized, as a fraction of equity:
+# 'fixed' uses position_size, 'score' scales it by |unum score|
+SIZING_MODES = ('fixed', 'score')
+
+
+def panel(frames: dict, column='close') -> pd.DataFrame:
+    """
+    (bars x assets) frame of one column of per-symbol frames, aligned on the
+    union of their timestamps; NaN where a symbol has no bar.
+    """
+    if not frames:
+        raise ValueError("A panel needs at least one symbol")
+    return pd.concat({symbol: df[column] for symbol, df in frames.items()}, axis=1).sort_index()
+
+
+def _portfolio_kernel(prices, scores, tradable, long_threshold, short_threshold, sl_pct, tp_pct, trailing_sl_pct,
+                      position_size, score_sizing, max_positions, max_gross_exposure, fee, initial_balance):
+    """
+    Bar loop over a (bars x assets) panel. Per bar: mark every open position,
+    apply the single-asset exit rules, then fill free slots with the flat
+    assets whose scores cross a threshold, strongest |score| first, each
+    committing a fraction of the bar's equity within the cash and gross
+    exposure limits. Compiled with Numba when available.
+    """
+    n, m = prices.shape
+    equity = np.empty(n, dtype=np.float64)
+    exposure = np.zeros(n, dtype=np.float64)
+    positions = np.zeros((n, m), dtype=np.int8)
+    equity[0] = initial_balance
+    trades = np.empty((max(16, m), PORTFOLIO_TRADE_FIELDS), dtype=np.float64)
+    n_trades = 0
+
+    cash = initial_balance
+    position = np.zeros(m, dtype=np.int64)
+    entry_price = np.zeros(m, dtype=np.float64)
+    peak_price = np.zeros(m, dtype=np.float64)
+    invested = np.zeros(m, dtype=np.float64)
+    last_price = np.full(m, np.nan)
+    open_row = np.zeros(m, dtype=np.int64)
+    value = np.zeros(m, dtype=np.float64)
+    order = np.empty(m, dtype=np.int64)
+    strength = np.empty(m, dtype=np.float64)
+    n_open = 0
+
+    # Last valid price of every asset, for the open trades at the end
+    final_price = np.full(m, np.nan)
+    for a in range(m):
+        for i in range(n - 1, -1, -1):
+            if not np.isnan(prices[i, a]):
+                final_price[a] = prices[i, a]
+                break
+    last_price[:] = prices[0]
+
+    for i in range(1, n):
+        # 1. Mark to market (assets without a bar keep their last price)
+        curr_equity = cash
+        for a in range(m):
+            price = prices[i, a]
+            if not np.isnan(price):
+                last_price[a] = price
+            if position[a] == 1:
+                value[a] = (last_price[a] / entry_price[a]) * invested[a] * (1 - fee)
+            elif position[a] == -1:
+                value[a] = (2 - (last_price[a] / entry_price[a])) * invested[a] * (1 - fee)
+            else:
+                value[a] = 0.0
+            curr_equity += value[a]
+
+        # 2. Exits, on the assets that have a bar
+        held = 0.0
+        for a in range(m):
+            price = prices[i, a]
+            if position[a] == 0:
+                continue
+            reason = EXIT_OPEN
+            if not np.isnan(price):
+                if position[a] == 1:
+                    peak_price[a] = max(peak_price[a], price)
+                    if price <= entry_price[a] * (1 - sl_pct):
+                        reason = EXIT_STOP_LOSS
+                    elif price >= entry_price[a] * (1 + tp_pct):
+                        reason = EXIT_TAKE_PROFIT
+                    elif price <= peak_price[a] * (1 - trailing_sl_pct):
+                        reason = EXIT_TRAILING_STOP
+                else:
+                    peak_price[a] = min(peak_price[a], price)
+                    if price >= entry_price[a] * (1 + sl_pct):
+                        reason = EXIT_STOP_LOSS
+                    elif price <= entry_price[a] * (1 - tp_pct):
+                        reason = EXIT_TAKE_PROFIT
+                    elif price >= peak_price[a] * (1 + trailing_sl_pct):
+                        reason = EXIT_TRAILING_STOP
+            if reason != EXIT_OPEN:
+                cash += value[a] * (1 - fee)
+                position[a] = 0
+                n_open -= 1
+                row = open_row[a]
+                trades[row, T_EXIT_BAR] = i
+                trades[row, T_EXIT_PRICE] = price
+                trades[row, T_REASON] = reason
+            else:
+                held += value[a]
+
+        # 3. Entries, strongest signals first
+        if tradable[i] and n_open < max_positions:
+            n_candidates = 0
+            for a in range(m):
+                score = scores[i, a]
+                if position[a] == 0 and not np.isnan(prices[i, a]) and \
+                   (score > long_threshold or score < short_threshold):
+                    order[n_candidates] = a
+                    strength[n_candidates] = -abs(score)
+                    n_candidates += 1
+            ranked = order[:n_candidates][np.argsort(strength[:n_candidates], kind='mergesort')]
+            for a in ranked:
+                if n_open >= max_positions:
+                    break
+                target = position_size * curr_equity
+                if score_sizing:
+                    target *= abs(scores[i, a])
+                stake = min(target, cash, max_gross_exposure * curr_equity - held)
+                if stake <= 0:
+                    break
+                if n_trades == trades.shape[0]:
+                    grown = np.empty((2 * n_trades, PORTFOLIO_TRADE_FIELDS), dtype=np.float64)
+                    grown[:n_trades] = trades
+                    trades = grown
+                price = prices[i, a]
+                position[a] = 1 if scores[i, a] > long_threshold else -1
+                entry_price[a] = price
+                peak_price[a] = price
+                invested[a] = stake * (1 - fee)
+                cash -= stake
+                held += stake
+                n_open += 1
+                # Until it closes, a trade is marked as open at the last bar
+                trades[n_trades, T_ENTRY_BAR] = i
+                trades[n_trades, T_EXIT_BAR] = n - 1
+                trades[n_trades, T_SIDE] = position[a]
+                trades[n_trades, T_ENTRY_PRICE] = price
+                trades[n_trades, T_EXIT_PRICE] = final_price[a]
+                trades[n_trades, T_REASON] = EXIT_OPEN
+                trades[n_trades, T_ENTRY_BALANCE] = stake
+                trades[n_trades, T_ASSET] = a
+                open_row[a] = n_trades
+                n_trades += 1
+
+        equity[i] = curr_equity
+        exposure[i] = held
+        for a in range(m):
+            positions[i, a] = position[a]
+
+    return equity, positions, exposure, trades[:n_trades].copy()
+
+
+if njit is not None:
+    _portfolio_compiled = njit(cache=True, nogil=True)(_portfolio_kernel)
+else:
+    _portfolio_compiled = None
+
+
+def simulate_portfolio_numpy(prices, scores, tradable, long_threshold, short_threshold, sl_pct, tp_pct,
+                             trailing_sl_pct, position_size, score_sizing, max_positions, max_gross_exposure,
+                             fee, initial_balance):
+    """
+    Same bar loop with each step vectorized across assets; only the (few)
+    entries of a bar are sized one by one. Matches the kernel to rounding:
+    equity sums the asset values pairwise instead of in order.
+    """
+    n, m = prices.shape
+    equity = np.empty(n, dtype=np.float64)
+    exposure = np.zeros(n, dtype=np.float64)
+    positions = np.zeros((n, m), dtype=np.int8)
+    equity[0] = initial_balance
+    trades = []
+
+    valid = ~np.isnan(prices)
+    # Last valid price of every asset, for the open trades at the end
+    last_valid = np.where(valid.any(axis=0), n - 1 - np.argmax(valid[::-1], axis=0), 0)
+    final_price = prices[last_valid, np.arange(m)]
+
+    cash = initial_balance
+    position = np.zeros(m, dtype=np.int64)
+    entry_price = np.ones(m)
+    peak_price = np.zeros(m)
+    invested = np.zeros(m)
+    open_row = np.zeros(m, dtype=np.int64)
+    last_price = prices[0].copy()
+
+    for i in range(1, n):
+        price, ok = prices[i], valid[i]
+        np.copyto(last_price, price, where=ok)
+        is_long, is_short = position == 1, position == -1
+        ratio = last_price / entry_price
+        value = np.where(is_long, ratio * invested * (1 - fee),
+                         np.where(is_short, (2 - ratio) * invested * (1 - fee), 0.0))
+        curr_equity = cash + value.sum()
+
+        with np.errstate(invalid='ignore'):
+            np.copyto(peak_price, np.fmax(peak_price, price), where=is_long & ok)
+            np.copyto(peak_price, np.fmin(peak_price, price), where=is_short & ok)
+            stop_long = is_long & (price <= entry_price * (1 - sl_pct))
+            take_long = is_long & (price >= entry_price * (1 + tp_pct))
+            trail_long = is_long & (price <= peak_price * (1 - trailing_sl_pct))
+            stop_short = is_short & (price >= entry_price * (1 + sl_pct))
+            take_short = is_short & (price <= entry_price * (1 - tp_pct))
+            trail_short = is_short & (price >= peak_price * (1 + trailing_sl_pct))
+        stopped, taken = stop_long | stop_short, take_long | take_short
+        exited = stopped | taken | trail_long | trail_short
+        if exited.any():
+            # First rule that holds, in the bar loop's order
+            reason = np.where(stopped, EXIT_STOP_LOSS, np.where(taken, EXIT_TAKE_PROFIT, EXIT_TRAILING_STOP))
+            for a in np.flatnonzero(exited):
+                cash += value[a] * (1 - fee)
+                row = trades[open_row[a]]
+                row[T_EXIT_BAR], row[T_EXIT_PRICE], row[T_REASON] = i, price[a], reason[a]
+            position[exited] = 0
+        held = value[position != 0].sum()
+        n_open = np.count_nonzero(position)
+
+        if tradable[i] and n_open < max_positions:
+            score = scores[i]
+            with np.errstate(invalid='ignore'):
+                candidates = np.flatnonzero((position == 0) & ok & ((score > long_threshold) | (score < short_threshold)))
+            ranked = candidates[np.argsort(-np.abs(score[candidates]), kind='stable')]
+            for a in ranked[:max_positions - n_open]:
+                target = position_size * curr_equity
+                if score_sizing:
+                    target *= abs(score[a])
+                stake = min(target, cash, max_gross_exposure * curr_equity - held)
+                if stake <= 0:
+                    break
+                position[a] = 1 if score[a] > long_threshold else -1
+                entry_price[a] = price[a]
+                peak_price[a] = price[a]
+                invested[a] = stake * (1 - fee)
+                cash -= stake
+                held += stake
+                open_row[a] = len(trades)
+                trades.append([i, n - 1, position[a], price[a], final_price[a], EXIT_OPEN, stake, a])
+
+        equity[i] = curr_equity
+        exposure[i] = held
+        positions[i] = position
+
+    ledger = np.array(trades, dtype=np.float64).reshape(-1, PORTFOLIO_TRADE_FIELDS)
+    return equity, positions, exposure, ledger
+
+
+def simulate_portfolio_numba(*args):
+    return _portfolio_compiled(*args)
+
+
+PORTFOLIO_ENGINES = {
+    'python': _portfolio_kernel,
+    'numpy': simulate_portfolio_numpy,
+}
+if _portfolio_compiled is not None:
+    PORTFOLIO_ENGINES['numba'] = simulate_portfolio_numba
+
+
+class PortfolioBacktester:
+    def __init__(self, prices: pd.DataFrame, scores: pd.DataFrame, highs: pd.DataFrame = None,
+                 lows: pd.DataFrame = None, initial_balance=10000, fee=0.001):
+        """
+        prices, scores: (bars x assets) close and Unum score panels (see panel()),
+        same index and columns; NaN where an asset has no bar.
+        highs, lows: optional panels for the trades' MAE/MFE (closes otherwise).
+        """
+        if not prices.index.equals(scores.index) or not prices.columns.equals(scores.columns):
+            raise ValueError("Price and score panels must share index and columns")
+        self.index = prices.index
+        self.symbols = list(prices.columns)
+        self.prices = prices.to_numpy(dtype=np.float64)
+        self.scores = scores.to_numpy(dtype=np.float64)
+        self.highs = self.prices if highs is None else highs.reindex_like(prices).to_numpy(dtype=np.float64)
+        self.lows = self.prices if lows is None else lows.reindex_like(prices).to_numpy(dtype=np.float64)
+        self.initial_balance = initial_balance
+        self.fee = fee
+
+    def run(self, long_threshold=0.6, short_threshold=-0.6, sl_pct=0.02, tp_pct=0.04, trailing_sl_pct=0.015,
+            position_size=0.1, sizing='fixed', max_positions=None, max_gross_exposure=1.0,
+            skip_weekends=True, allowed_sessions=None, engine='auto'):
+        """
+        Trades every asset of the panel from one cash balance.
+        position_size: fraction of equity committed per new position (see SIZING_MODES)
+        max_positions: open positions at most (default: one per asset)
+        max_gross_exposure: marked value of the open positions over equity, at most
+        Returns (results frame: equity, returns, benchmark, drawdown, exposure, open positions; metrics).
+        """
+        if sizing not in SIZING_MODES:
+            raise ValueError(f"sizing must be one of {', '.join(SIZING_MODES)}")
+        if not 0 < position_size <= 1 or max_gross_exposure <= 0:
+            raise ValueError("position_size must be in (0, 1] and max_gross_exposure positive")
+        if engine == 'auto':
+            engine = 'numba' if 'numba' in PORTFOLIO_ENGINES else 'numpy'
+        if engine not in PORTFOLIO_ENGINES:
+            raise ValueError(f"Unknown portfolio engine '{engine}'. Available: {sorted(PORTFOLIO_ENGINES)}")
+        n_assets = len(self.symbols)
+        max_positions = n_assets if max_positions is None else min(int(max_positions), n_assets)
+
+        tradable = tradable_mask(self.index, skip_weekends, allowed_sessions)
+        equity, positions, exposure, trades = PORTFOLIO_ENGINES[engine](
+            self.prices, self.scores, tradable, float(long_threshold), float(short_threshold),
+            float(sl_pct), float(tp_pct), float(trailing_sl_pct), float(position_size), sizing == 'score',
+            max_positions, float(max_gross_exposure), float(self.fee), float(self.initial_balance)
+        )
+        self.positions = positions
+        n_bars = len(self.index)
+        offsets = trades[:, T_ASSET].astype(np.int64) * n_bars
+        self.trades = build_trade_ledger(trades, self.index, self.lows.T.ravel(), self.highs.T.ravel(), self.fee,
+                                         offsets=offsets, dtype=PORTFOLIO_TRADE_DTYPE)
+        self.trades['asset'] = trades[:, T_ASSET]
+
+        # Benchmark: equal weight buy & hold of every asset from its first bar
+        first = np.argmax(~np.isnan(self.prices), axis=0)
+        growth = pd.DataFrame(self.prices / self.prices[first, np.arange(n_assets)]).ffill().fillna(1.0)
+        market = growth.to_numpy().mean(axis=1)
+
+        peak = np.maximum.accumulate(equity)
+        drawdown = (equity - peak) / peak
+        returns = _pct_change(equity)
+        results = pd.DataFrame({
+            'equity_curve': equity,
+            'strategy_returns': returns,
+            'cum_market_returns': market,
+            'drawdown': drawdown,
+            'gross_exposure': exposure / equity,
+            'open_positions': np.count_nonzero(positions, axis=1)
+        }, index=self.index)
+        trades_count = 2 * len(trades) - np.count_nonzero(trades[:, T_REASON] == EXIT_OPEN)
+        metrics = performance_metrics(equity, self.trades, returns, market, drawdown, trades_count,
+                                      self.initial_balance, periods_per_year(self.index))
+        metrics["avg_gross_exposure_pct"] = round(float(exposure[1:].sum() / equity[1:].sum() * 100), 2) if n_bars > 1 else 0
+        metrics["max_open_positions"] = int(results['open_positions'].max())
+        return results, metrics
+
+    def attribution(self) -> pd.DataFrame:
+        """
+        Per-asset breakdown of the last run, from its trade ledger: trades,
+        win rate, PnL (realized, plus open trades marked at the last bar),
+        fees, contribution to the portfolio return and time in the market.
+        """
+        trades, n_assets = self.trades, len(self.symbols)
+        asset = trades['asset'].astype(np.int64)
+        closed = trades['exit_reason'] != EXIT_OPEN
+        count = lambda mask: np.bincount(asset[mask], minlength=n_assets)
+        total = lambda values: np.bincount(asset, weights=values, minlength=n_assets)
+        n_closed = count(closed)
+        pnl = total(trades['pnl'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            win_rate = np.where(n_closed > 0, count(closed & (trades['pnl'] > 0)) / n_closed * 100, 0.0)
+        return pd.DataFrame({
+            'trades': np.bincount(asset, minlength=n_assets),
+            'closed_trades': n_closed,
+            'win_rate_pct': win_rate.round(2),
+            'pnl': pnl.round(2),
+            'fees': total(trades['fees']).round(2),
+            'contribution_pct': (pnl / self.initial_balance * 100).round(2),
+            'time_in_market_pct': (np.count_nonzero(self.positions, axis=0) / len(self.index) * 100).round(2)
+        }, index=pd.Index(self.symbols, name='symbol'))
+
+    def trades_frame(self) -> pd.DataFrame:
+        """
+        The last run's trade ledger indexed by entry time, with symbols and exit reasons as names.
+        """
+        frame = pd.DataFrame(self.trades).set_index('entry_time')
+        frame['exit_reason'] = np.asarray(EXIT_REASONS)[frame['exit_reason'].to_numpy()]
+        frame['asset'] = np.asarray(self.symbols, dtype=object)[frame['asset'].to_numpy()]
+        return frame.rename(columns={'asset': 'symbol'})
@@ -0,0 +1,187 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .engine import EXIT_OPEN
+
+# Resampling schemes: block bootstrap of the per-bar strategy returns, or a
+# reordering (shuffle) / resampling with replacement (bootstrap) of the trades
+SIM_METHODS = ('block_bootstrap', 'trade_shuffle', 'trade_bootstrap')
+# Simulated metrics, as named in Backtester metrics
+SIM_METRICS = ('total_return_pct', 'max_drawdown_pct', 'sharpe_ratio')
+
+# Simulations per chunk: one RNG stream and one (chunk x path length) matrix each
+CHUNK_SIMS = 256
+# Default bar annualization (4h bars); pass periods.periods_per_year(index) for others
+PERIODS_PER_YEAR = 365 * 6
+
+
+def path_metrics(returns, periods_per_year=PERIODS_PER_YEAR) -> dict:
+    """
+    Metrics of every row of a (sims x steps) matrix of simple returns,
+    computed along the rows: compounded return, max drawdown, Sharpe.
+    One scratch matrix, reused in place.
+    """
+    n = returns.shape[1]
+    growth = np.add(returns, 1.0)
+    np.cumprod(growth, axis=1, out=growth)
+    total = growth[:, -1] - 1
+    peak = np.maximum.accumulate(growth, axis=1)
+    np.maximum(peak, 1.0, out=peak) # The initial balance is the first peak
+    np.divide(growth, peak, out=growth)
+    drawdown = np.minimum(growth.min(axis=1) - 1, 0.0)
+
+    # Sample std from the row sums
+    mean = returns.sum(axis=1) / n
+    var = (np.einsum('ij,ij->i', returns, returns) - n * mean ** 2) / max(n - 1, 1)
+    std = np.sqrt(np.maximum(var, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+    return {
+        'total_return_pct': total * 100,
+        'max_drawdown_pct': drawdown * 100,
+        'sharpe_ratio': sharpe
+    }
+
+
+def _block_bootstrap(rng, n, returns, block):
+    # Circular block bootstrap: runs of `block` consecutive bars from random
+    # starts, gathered as rows of a (start x block) window view of the wrapped series
+    length = len(returns)
+    n_blocks = -(-length // block)
+    windows = np.lib.stride_tricks.sliding_window_view(np.concatenate([returns, returns[:block - 1]]), block)
+    starts = rng.integers(0, length, size=(n, n_blocks))
+    return windows[starts].reshape(n, -1)[:, :length]
+
+
+def _resample_trades(rng, n, returns, replace, slippage):
+    length = len(returns)
+    if replace:
+        paths = returns[rng.integers(0, length, size=(n, length))]
+    else:
+        # Independent permutation per row: argsort of uniform keys
+        paths = returns[np.argsort(rng.random((n, length)), axis=1)]
+    if slippage:
+        # Extra cost per side, uniform in [0, 2 * slippage]: entry and exit
+        cost = rng.uniform(0, 2 * slippage, size=(n, length, 2))
+        paths = (1 + paths) * np.prod(1 - cost, axis=2) - 1
+    return paths
+
+
+def _simulate_chunk(method, seed, n, returns, block, slippage, periods_per_year):
+    rng = np.random.default_rng(seed)
+    if method == 'block_bootstrap':
+        paths = _block_bootstrap(rng, n, returns, block)
+    else:
+        paths = _resample_trades(rng, n, returns, method == 'trade_bootstrap', slippage)
+    return path_metrics(paths, periods_per_year)
+
+
+def simulate(returns, method='block_bootstrap', n_sims=10000, block=None, slippage=0.0,
+             periods_per_year=PERIODS_PER_YEAR, seed=None, workers=None, chunk_sims=CHUNK_SIMS) -> dict:
+    """
+    Monte Carlo resampling of a return stream: per-bar strategy returns for
+    'block_bootstrap', per-trade returns for the trade methods (see
+    trade_returns). Simulations run in chunks of chunk_sims rows, each a few
+    NumPy passes over its matrix; chunks run on `workers` threads (NumPy
+    releases the GIL) with their own SeedSequence child, so a seed gives the
+    same samples whatever the worker count.
+    block: bars per bootstrap block (default ~sqrt(N), keeps autocorrelation)
+    slippage: mean extra cost per trade side, jittered per trade (trade methods)
+    Returns {metric: array of n_sims values}.
+    """
+    if method not in SIM_METHODS:
+        raise ValueError(f"method must be one of {', '.join(SIM_METHODS)}")
+    returns = np.asarray(returns, dtype=np.float64)
+    returns = returns[~np.isnan(returns)]
+    if len(returns) < 2:
+        raise ValueError("At least 2 returns are needed to resample")
+    if n_sims < 1:
+        raise ValueError("n_sims must be at least 1")
+    if slippage < 0:
+        raise ValueError("slippage must be non-negative")
+    block = int(block or max(1, round(np.sqrt(len(returns)))))
+    if not 1 <= block <= len(returns):
+        raise ValueError(f"block must be between 1 and {len(returns)}")
+
+    sizes = [min(chunk_sims, n_sims - start) for start in range(0, n_sims, chunk_sims)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (returns, block, slippage, periods_per_year)
+    workers = min(workers or os.cpu_count() or 1, len(sizes))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(lambda job: _simulate_chunk(method, *job, *args), zip(seeds, sizes)))
+    else:
+        parts = [_simulate_chunk(method, s, n, *args) for s, n in zip(seeds, sizes)]
+    return {name: np.concatenate([part[name] for part in parts]) for name in SIM_METRICS}
+
+
+def point_metrics(returns, periods_per_year=PERIODS_PER_YEAR) -> dict:
+    """
+    path_metrics of the observed return stream, for comparison with its resamples.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    return {name: float(values[0]) for name, values in
+            path_metrics(returns[~np.isnan(returns)][None], periods_per_year).items()}
+
+
+def trade_returns(trades):
+    """
+    Net returns (fractions of the committed balance) of the closed trades of a
+    ledger (Backtester.trades), in entry order.
+    """
+    return trades['return_pct'][trades['exit_reason'] != EXIT_OPEN] / 100
+
+
+def trades_per_year(trades):
+    """
+    Frequency of the closed trades of a ledger (those trade_returns resamples)
+    over the period they span, to annualize a per-trade Sharpe.
+    """
+    trades = trades[trades['exit_reason'] != EXIT_OPEN]
+    if len(trades) < 2:
+        return 1.0
+    span = (trades['exit_time'].max() - trades['entry_time'].min()) / np.timedelta64(1, 'D')
+    return len(trades) / (span / 365.25) if span > 0 else 1.0
+
+
+def confidence_intervals(samples: dict, point: dict = None, confidence=0.95) -> dict:
+    """
+    Per metric: mean, median, std, the central `confidence` interval and, when
+    the point estimate is given, its percentile among the simulations.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    tail = (1 - confidence) / 2 * 100
+    summary = {}
+    for name, values in samples.items():
+        lower, median, upper = np.percentile(values, [tail, 50, 100 - tail])
+        stats = {
+            "mean": round(float(values.mean()), 4),
+            "median": round(float(median), 4),
+            "std": round(float(values.std()), 4),
+            "lower": round(float(lower), 4),
+            "upper": round(float(upper), 4)
+        }
+        if point is not None and name in point:
+            stats["point"] = float(point[name])
+            stats["point_percentile"] = round(float(np.mean(values <= point[name]) * 100), 2)
+        summary[name] = stats
+    return summary
+
+
+def robustness_report(samples: dict, point: dict = None, confidence=0.95) -> dict:
+    """
+    confidence_intervals plus the odds of a losing run and of a drawdown
+    deeper than the backtest's own.
+    """
+    report = {
+        "simulations": len(samples['total_return_pct']),
+        "confidence": confidence,
+        "prob_loss_pct": round(float(np.mean(samples['total_return_pct'] < 0) * 100), 2),
+        "metrics": confidence_intervals(samples, point, confidence)
+    }
+    if point is not None and 'max_drawdown_pct' in point:
+        report["prob_worse_drawdown_pct"] = round(float(np.mean(samples['max_drawdown_pct'] < point['max_drawdown_pct']) * 100), 2)
+    return report
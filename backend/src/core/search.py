@@ -0,0 +1,288 @@
+import math
+import time
+
+import numpy as np
+
+from .strategy import CATEGORIES, SUB_WEIGHTS
+from .optimizer import OptimizerJob
+
+# Backtest parameters searched: (name, low, high, log scale)
+BACKTEST_SPACE = (
+    ('long_threshold', 0.1, 0.9, False),
+    ('short_threshold', -0.9, -0.1, False),
+    ('sl_pct', 0.005, 0.05, True),
+    ('tp_pct', 0.01, 0.1, True),
+    ('trailing_sl_pct', 0.005, 0.05, True)
+)
+# Session filters searched (None trades every session)
+SESSION_CHOICES = (None, ('european', 'american'), ('asian',), ('european',), ('american',), ('asian', 'european'))
+
+
+def _simplex(u):
+    # Unit-cube coordinates to a point on the simplex: uniform u gives uniform (Dirichlet(1)) weights
+    e = -np.log1p(-np.minimum(u, 1 - 1e-12))
+    return e / e.sum() if e.sum() > 0 else np.full(len(u), 1 / len(u))
+
+
+class SearchSpace:
+    """
+    Candidates as points of the unit cube: one coordinate per backtest
+    parameter, one for the session filter, three for the category weights
+    and three per category for the sub-weights. Samplers only see the cube.
+    """
+    def __init__(self, backtest=BACKTEST_SPACE, sessions=SESSION_CHOICES, weights=True, sub_weights=True, fixed=None):
+        self.backtest = tuple(backtest)
+        self.sessions = tuple(sessions) if sessions else ()
+        self.weights = weights
+        self.sub_weights = sub_weights
+        self.fixed = dict(fixed or {}) # Backtest kwargs shared by every candidate
+        self.dims = len(self.backtest) + bool(self.sessions) + 3 * weights + 9 * sub_weights
+
+    def decode(self, u) -> dict:
+        """
+        Unit-cube point -> optimizer candidate ({'weights', 'sub_weights', 'backtest'}).
+        """
+        u = np.asarray(u, dtype=np.float64)
+        backtest, i = dict(self.fixed), 0
+        for name, low, high, log in self.backtest:
+            value = math.exp(math.log(low) + u[i] * (math.log(high) - math.log(low))) if log else low + u[i] * (high - low)
+            backtest[name] = round(value, 6)
+            i += 1
+        if self.sessions:
+            session = self.sessions[min(int(u[i] * len(self.sessions)), len(self.sessions) - 1)]
+            backtest['allowed_sessions'] = list(session) if session else None
+            i += 1
+        candidate = {'backtest': backtest}
+        if self.weights:
+            candidate['weights'] = dict(zip(CATEGORIES, np.round(_simplex(u[i:i + 3]), 6).tolist()))
+            i += 3
+        if self.sub_weights:
+            sub = {}
+            for category in CATEGORIES:
+                keys = list(SUB_WEIGHTS[category])
+                sub[category] = dict(zip(keys, np.round(_simplex(u[i:i + 3]), 6).tolist()))
+                i += 3
+            candidate['sub_weights'] = sub
+        return candidate
+
+
+class RandomSampler:
+    """
+    Uniform points of the unit cube.
+    """
+    name = 'random'
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def ask(self, n, dims, x=None, y=None):
+        return self.rng.random((n, dims))
+
+
+class TPESampler(RandomSampler):
+    """
+    Tree-structured Parzen estimator style sampler: observations are split
+    into the best `gamma` fraction and the rest, each modelled by a Gaussian
+    product kernel density; points are drawn from the good density and the
+    ones with the highest good/bad density ratio are kept. Uniform until
+    n_startup observations exist.
+    """
+    name = 'tpe'
+
+    def __init__(self, rng, n_startup=16, gamma=0.25, n_candidates=48):
+        super().__init__(rng)
+        self.n_startup = n_startup
+        self.gamma = gamma
+        self.n_candidates = n_candidates
+
+    def ask(self, n, dims, x=None, y=None):
+        if x is None or len(x) < self.n_startup:
+            return super().ask(n, dims)
+        order = np.argsort(-np.asarray(y), kind='stable')
+        n_good = max(2, int(math.ceil(self.gamma * len(order))))
+        good, bad = x[order[:n_good]], x[order[n_good:]]
+
+        # Draws around the good observations (reflected back into the cube)
+        bw_good, bw_bad = self._bandwidth(good), self._bandwidth(bad)
+        centers = good[self.rng.integers(len(good), size=n * self.n_candidates)]
+        draws = np.abs(centers + self.rng.normal(size=centers.shape) * bw_good)
+        draws = 1 - np.abs(1 - np.mod(draws, 2))
+        ratio = self._log_density(draws, good, bw_good) - self._log_density(draws, bad, bw_bad)
+        return draws[np.argsort(-ratio, kind='stable')[:n]]
+
+    @staticmethod
+    def _bandwidth(points):
+        # Scott's rule per dimension, kept wide enough to keep exploring
+        n, d = points.shape
+        std = points.std(axis=0) if n > 1 else np.full(d, 0.5)
+        return np.clip(std * n ** (-1 / (d + 4)), 0.05, 0.5)
+
+    @staticmethod
+    def _log_density(points, centers, bandwidth):
+        # (P x C x D) standardized distances -> log mean of product kernels per point
+        z = (points[:, None, :] - centers[None, :, :]) / bandwidth
+        log_k = -0.5 * np.einsum('pcd,pcd->pc', z, z) - np.log(bandwidth).sum()
+        top = log_k.max(axis=1, keepdims=True)
+        return (top + np.log(np.exp(log_k - top).mean(axis=1, keepdims=True)))[:, 0]
+
+
+SAMPLERS = {'random': RandomSampler, 'tpe': TPESampler}
+
+
+class Search:
+    """
+    Budgeted search over a SearchSpace. Each round the sampler proposes a
+    batch of candidates; with successive halving they are first backtested on
+    the most recent n_bars / eta^(rungs - 1) bars, the best 1/eta of each rung
+    move on to eta times more bars, and only the survivors run on the full
+    history. Cost is counted in full-history backtest equivalents.
+
+    The state (config, trials and RNG) is plain data: Search.from_state(space,
+    search.state_dict()) resumes a search where it stopped.
+    """
+    def __init__(self, space: SearchSpace, n_bars, sampler='tpe', halving=True, eta=3, rungs=3, batch=27,
+                 rank_by='total_return_pct', seed=None, state=None):
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unknown sampler '{sampler}', expected one of {', '.join(SAMPLERS)}")
+        if eta < 2 or rungs < 1 or batch < 1:
+            raise ValueError("eta must be at least 2, rungs and batch at least 1")
+        self.config = {'sampler': sampler, 'halving': halving, 'eta': eta, 'rungs': rungs, 'batch': batch,
+                       'rank_by': rank_by}
+        self.space = space
+        self.n_bars = n_bars
+        self.halving = halving
+        self.eta = eta
+        # Bars per rung, shortest first; the last rung is the full history
+        self.fidelities = [max(2, n_bars // eta ** (rungs - 1 - r)) for r in range(rungs)] if halving else [n_bars]
+        self.batch = batch
+        self.rank_by = rank_by
+        rng = np.random.default_rng(seed)
+        self.sampler = SAMPLERS[sampler](rng)
+        self.trials = [] # {'round', 'bars', 'u', 'candidate', 'metrics'}
+        self.rounds = 0
+        self.cost = 0.0
+        if state is not None:
+            self.trials = list(state['trials'])
+            self.rounds = state['rounds']
+            self.cost = state['cost']
+            rng.bit_generator.state = state['rng']
+
+    def state_dict(self) -> dict:
+        return {
+            'config': self.config,
+            'n_bars': self.n_bars,
+            'rounds': self.rounds,
+            'cost': self.cost,
+            'rng': self.sampler.rng.bit_generator.state,
+            'trials': self.trials
+        }
+
+    @classmethod
+    def from_state(cls, space: SearchSpace, state: dict):
+        return cls(space, state['n_bars'], **state['config'], state=state)
+
+    def round_cost(self, batch):
+        cost, n = 0.0, batch
+        for bars in self.fidelities:
+            cost += n * bars / self.n_bars
+            n = max(1, n // self.eta)
+        return cost
+
+    def history(self):
+        """
+        Observations the sampler learns from: the longest rung with enough
+        trials to fit a model (all of them for random search).
+        """
+        n_min = getattr(self.sampler, 'n_startup', 1)
+        for bars in reversed(self.fidelities):
+            trials = [t for t in self.trials if t['bars'] == bars]
+            if len(trials) >= n_min:
+                return (np.array([t['u'] for t in trials]),
+                        np.array([t['metrics'][self.rank_by] for t in trials]))
+        return None, None
+
+    def step(self, evaluate, batch=None, deadline=None):
+        """
+        Runs one round: propose, prune through the rungs, evaluate survivors
+        on the full history. Stops between rungs once the deadline passes.
+        """
+        x, y = self.history()
+        points = self.sampler.ask(batch or self.batch, self.space.dims, x, y)
+        for r, bars in enumerate(self.fidelities):
+            candidates = [{**self.space.decode(u), 'bars': None if bars == self.n_bars else bars} for u in points]
+            results = evaluate(candidates)
+            self.cost += len(points) * bars / self.n_bars
+            trials = [{'round': self.rounds, 'bars': bars, 'u': u.tolist(),
+                       'candidate': {k: v for k, v in result.items() if k not in ('metrics', 'bars')},
+                       'metrics': result['metrics']} for u, result in zip(points, results)]
+            self.trials.extend(trials)
+            if r == len(self.fidelities) - 1 or (deadline is not None and time.time() >= deadline):
+                break
+            keep = max(1, len(points) // self.eta)
+            order = np.argsort([-t['metrics'][self.rank_by] for t in trials], kind='stable')[:keep]
+            points = points[order]
+        self.rounds += 1
+
+    def run(self, evaluate, max_evals=None, max_seconds=None):
+        """
+        Runs rounds until `max_evals` more full-backtest equivalents or
+        `max_seconds` are spent; returns the best full-history trial.
+        evaluate(candidates) -> results with 'metrics' (OptimizerPool.evaluate, bound to a frame).
+        """
+        if not max_evals and not max_seconds:
+            raise ValueError("A search needs max_evals or max_seconds")
+        budget = self.cost + max_evals if max_evals else None
+        deadline = time.time() + max_seconds if max_seconds else None
+        while deadline is None or time.time() < deadline:
+            batch = self.batch
+            if budget is not None:
+                # Shrink the last round to what is left of the budget
+                while batch > 1 and self.cost + self.round_cost(batch) > budget + 1e-9:
+                    batch -= 1
+                if self.cost + self.round_cost(batch) > budget + 1e-9:
+                    break
+            self.step(evaluate, batch, deadline)
+        return self.best()
+
+    def full_trials(self):
+        return [t for t in self.trials if t['bars'] == self.n_bars]
+
+    def best(self):
+        full = self.full_trials()
+        return max(full, key=lambda t: t['metrics'][self.rank_by]) if full else None
+
+
+class SearchJob(OptimizerJob):
+    """
+    Background Search run on an OptimizerPool (see OptimizerPool.start_driver).
+    Results are the full-history trials, ranked like an optimization job.
+    """
+    def __init__(self, search: Search, max_evals=None, max_seconds=None):
+        super().__init__([], search.rank_by)
+        self.search = search
+        self.max_evals = max_evals
+        self.max_seconds = max_seconds
+        self.total = None # Open-ended: bounded by the budget
+
+    def drive(self, evaluate):
+        self.search.run(evaluate, self.max_evals, self.max_seconds)
+        self.results = self._full_results()
+
+    def _full_results(self):
+        return [{**t['candidate'], 'metrics': t['metrics']} for t in self.search.full_trials()]
+
+    def snapshot(self, top=None):
+        if self.status == 'running':
+            self.results = self._full_results()
+        search = self.search
+        return {
+            **super().snapshot(top),
+            "completed": len(search.trials),
+            "sampler": search.config['sampler'],
+            "halving": search.halving,
+            "fidelities": search.fidelities,
+            "rounds": search.rounds,
+            "full_backtests": len(search.full_trials()),
+            "cost": round(search.cost, 3),
+            "budget": {"max_evals": self.max_evals, "max_seconds": self.max_seconds}
+        }
@@ -1,7 +1,8 @@
 
 import pandas as pd
 import numpy as np
-from .indicators import Indicators
+from .indicators import Indicators, fib_interaction
+from .periods import parse_timeframe, infer_period
 
 from enum import Enum
 
@@ -10,171 +11,391 @@ class MarketState(Enum):
     RANGING = "ranging"
     UNCERTAIN = "uncertain"
 
+# Category weights per market state (see detect_market_state)
+STATE_WEIGHTS = {
+    MarketState.TRENDING: {'trend': 0.50, 'volume_levels': 0.35, 'momentum': 0.15}, # Prioritize Trend and Volume
+    MarketState.RANGING: {'trend': 0.20, 'volume_levels': 0.40, 'momentum': 0.40}, # Prioritize Oscillators and Levels
+    MarketState.UNCERTAIN: {'trend': 0.33, 'volume_levels': 0.33, 'momentum': 0.34}
+}
+
+# Sub-weights within categories
+SUB_WEIGHTS = {
+    'trend': {
+        'ma_alignment': 0.4,
+        'macd': 0.3,
+        'aroon': 0.3
+    },
+    'volume_levels': {
+        'fib_interaction': 0.5,
+        'obv_trend': 0.3,
+        'atr_volatility': 0.2
+    },
+    'momentum': {
+        'rsi': 0.4,
+        'stoch': 0.3,
+        'cci': 0.3
+    }
+}
+
+# Category weights used without regime weighting
+DEFAULT_WEIGHTS = {'trend': 0.40, 'volume_levels': 0.40, 'momentum': 0.20}
+
+# Columns of the signal matrix: (signal, category, sub-weight key)
+SIGNAL_COMPONENTS = (
+    ('sig_ma', 'trend', 'ma_alignment'),
+    ('sig_macd', 'trend', 'macd'),
+    ('sig_aroon', 'trend', 'aroon'),
+    ('sig_fib', 'volume_levels', 'fib_interaction'),
+    ('sig_obv', 'volume_levels', 'obv_trend'),
+    ('sig_atr', 'volume_levels', 'atr_volatility'),
+    ('sig_rsi', 'momentum', 'rsi'),
+    ('sig_stoch', 'momentum', 'stoch'),
+    ('sig_cci', 'momentum', 'cci')
+)
+SIGNALS = tuple(name for name, _, _ in SIGNAL_COMPONENTS)
+# Raw scores are rounded to this many decimals so that sign tests and threshold
+# ties don't depend on float summation order (matrix products, batch size, streaming)
+SCORE_DECIMALS = 12
+
+# Regime codes of the per-bar series: position in REGIMES
+REGIMES = (MarketState.TRENDING, MarketState.RANGING, MarketState.UNCERTAIN)
+CATEGORIES = ('trend', 'volume_levels', 'momentum')
+# REGIMES x CATEGORIES weight table for per-bar lookups
+REGIME_WEIGHTS = np.array([[STATE_WEIGHTS[state][c] for c in CATEGORIES] for state in REGIMES])
+# Category (column of a weight vector) of each signal
+_SIGNAL_CATEGORY = np.array([CATEGORIES.index(c) for _, c, _ in SIGNAL_COMPONENTS])
+
+def regime_codes(adx) -> np.ndarray:
+    """
+    Vectorized state_for_adx: int8 code into REGIMES per bar (NaN ADX is uncertain).
+    """
+    adx = np.asarray(adx, dtype=np.float64)
+    codes = np.full(len(adx), REGIMES.index(MarketState.UNCERTAIN), dtype=np.int8)
+    codes[adx > 25] = REGIMES.index(MarketState.TRENDING)
+    codes[adx < 20] = REGIMES.index(MarketState.RANGING)
+    return codes
+
+class RegimeIndex:
+    """
+    Transition index of a per-bar regime series: the bar positions where the
+    regime changes, so segments and point lookups don't scan the bars.
+    """
+    def __init__(self, index: pd.DatetimeIndex, codes: np.ndarray):
+        self.index = index
+        self.starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+        self.ends = np.r_[self.starts[1:], len(codes)] # Exclusive
+        self.codes = codes[self.starts]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def segments(self, regime: MarketState = None) -> pd.DataFrame:
+        """
+        One row per run of equal regime: first and last bar time, regime and bar count.
+        """
+        keep = slice(None) if regime is None else self.codes == REGIMES.index(regime)
+        starts, ends, codes = self.starts[keep], self.ends[keep], self.codes[keep]
+        return pd.DataFrame({
+            'start': self.index[starts],
+            'end': self.index[ends - 1],
+            'regime': pd.Categorical.from_codes(codes, categories=[r.value for r in REGIMES]),
+            'bars': ends - starts
+        })
+
+    def at(self, ts):
+        """
+        (regime, segment start time) of the bar at or before `ts`; None before the first bar.
+        """
+        pos = self.index.searchsorted(pd.Timestamp(ts), side='right') - 1
+        if pos < 0:
+            return None
+        seg = np.searchsorted(self.starts, pos, side='right') - 1
+        return REGIMES[self.codes[seg]], self.index[self.starts[seg]]
+
+# Confirmation trend: close above its SMA over this many bars of the other timeframe
+MTF_SMA_PERIOD = 50
+# Precomputed confirmation trends can be passed as df columns named MTF_TREND_PREFIX + timeframe
+MTF_TREND_PREFIX = 'mtf_trend_'
+
+def mtf_trend(index: pd.DatetimeIndex, bar_period, other: pd.DataFrame, other_timeframe: str, period=MTF_SMA_PERIOD):
+    """
+    As-of join of the `other_timeframe` trend (+1 close above SMA, -1 otherwise)
+    onto `index`: each bar gets the trend of the latest other candle that had
+    closed when the bar closed, so there is no lookahead. NaN before the first one.
+    Reuses the SMA column of an indicator frame when present.
+    """
+    sma_col = f'SMA_{period}'
+    sma = other[sma_col] if sma_col in other.columns else other['close'].rolling(period).mean()
+    trend = np.where(other['close'].to_numpy() > sma.to_numpy(), 1.0, -1.0)
+
+    closed_at = np.asarray(other.index, dtype='datetime64[ns]') + np.timedelta64(parse_timeframe(other_timeframe), 's')
+    bar_period = pd.Timedelta(bar_period or 0)
+    bar_closed_at = np.asarray(index, dtype='datetime64[ns]') + bar_period.to_timedelta64()
+    pos = np.searchsorted(closed_at, bar_closed_at, side='right') - 1
+    return np.where(pos >= 0, trend[np.maximum(pos, 0)], np.nan)
+
+def state_for_adx(adx):
+    """
+    Trending above ADX 25, ranging below 20, uncertain in between (and while ADX is NaN).
+    """
+    if adx > 25:
+        return MarketState.TRENDING
+    if adx < 20:
+        return MarketState.RANGING
+    return MarketState.UNCERTAIN
+
+class UnumScorer:
+    """
+    Unum score of one frame for any category weights. The component signals
+    are stacked once into an N x 9 matrix (SIGNALS order) next to the
+    weight-independent parts (noise filters, regime codes, confirmation trends),
+    so scoring a weight vector is a matrix-vector product plus fused passes.
+    """
+    def __init__(self, index: pd.DatetimeIndex, signals: np.ndarray, filters: np.ndarray,
+                 regimes: np.ndarray = None, mtf_trends: dict = None, sub_weights: dict = SUB_WEIGHTS):
+        self.index = index
+        self.signals = signals
+        self.filters = filters
+        self.regimes = regimes
+        self.mtf_trends = mtf_trends or {}
+        self.sub = np.array([sub_weights[c][k] for _, c, k in SIGNAL_COMPONENTS])
+
+    def component_weights(self, weights, sub_weights=None) -> np.ndarray:
+        """
+        Category weights to per-signal weights (... x 9).
+        weights: a dict, a list of dicts, or an array (... x 3, CATEGORIES order).
+        sub_weights: per-signal sub-weights (9 or ... x 9, SIGNALS order, a
+        SUB_WEIGHTS-style dict or a list of them, None rows keeping the
+        scorer's) replacing the scorer's.
+        """
+        if isinstance(weights, dict):
+            weights = [{**DEFAULT_WEIGHTS, **weights}[c] for c in CATEGORIES]
+        elif len(weights) and isinstance(weights[0], dict):
+            weights = [[{**DEFAULT_WEIGHTS, **w}[c] for c in CATEGORIES] for w in weights]
+        if sub_weights is None:
+            sub = self.sub
+        elif isinstance(sub_weights, dict):
+            sub = np.array([sub_weights[c][k] for _, c, k in SIGNAL_COMPONENTS])
+        elif isinstance(sub_weights, (list, tuple)) and any(s is None or isinstance(s, dict) for s in sub_weights):
+            sub = np.array([self.component_weights(np.ones(3), s) for s in sub_weights])
+        else:
+            sub = np.asarray(sub_weights, dtype=np.float64)
+        return np.asarray(weights, dtype=np.float64)[..., _SIGNAL_CATEGORY] * sub
+
+    def score(self, weights=None) -> np.ndarray:
+        """
+        Unum score per bar. weights: category weights applied on every bar;
+        None weights each bar by its regime (DEFAULT_WEIGHTS without regimes).
+        """
+        if weights is None and self.regimes is not None:
+            by_regime = self.signals @ self.component_weights(REGIME_WEIGHTS).T
+            score = by_regime[np.arange(len(by_regime)), self.regimes]
+        else:
+            score = self.signals @ self.component_weights(DEFAULT_WEIGHTS if weights is None else weights)
+        return self._filter(score)
+
+    def score_batch(self, weights, sub_weights=None) -> np.ndarray:
+        """
+        Scores K weight vectors at once: (K x 3) category weights (or K dicts),
+        optionally with per-row sub-weights (K x 9). Returns a (K x N) matrix,
+        one score series per row, ready for batch backtesting.
+        """
+        components = np.atleast_2d(self.component_weights(weights, sub_weights))
+        return self._filter(components @ self.signals.T)
+
+    def _filter(self, score):
+        # Raw scores (N or K x N) -> final scores, in place
+        np.round(score, SCORE_DECIMALS, out=score)
+        # ADX strength, volume spike and volatility filters
+        score *= self.filters
+
+        # Signal persistence: halve where the sign flipped from the previous bar (NaN counts as 0)
+        prev = np.zeros_like(score)
+        prev[..., 1:] = score[..., :-1]
+        np.nan_to_num(prev, copy=False, nan=0.0)
+        damp = np.where(np.sign(score) == np.sign(prev), 1.0, 0.5)
+
+        # Multi-timeframe confirmation: halve once per disagreeing timeframe
+        if self.mtf_trends:
+            direction = np.sign(score)
+            for trend in self.mtf_trends.values():
+                # No dampening before the other timeframe has any closed candle
+                damp[~np.isnan(trend) & (direction != trend)] *= 0.5
+        score *= damp
+        return score
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Frame form for FrameCache / shared memory; see from_frame.
+        """
+        frame = pd.DataFrame(self.signals, index=self.index, columns=list(SIGNALS))
+        frame['score_filter'] = self.filters
+        if self.regimes is not None:
+            frame['regime'] = self.regimes
+        for tf, trend in self.mtf_trends.items():
+            frame[MTF_TREND_PREFIX + tf] = trend
+        return frame
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame):
+        regimes = frame['regime'].to_numpy(dtype=np.int8) if 'regime' in frame.columns else None
+        trends = {col[len(MTF_TREND_PREFIX):]: frame[col].to_numpy(dtype=np.float64)
+                  for col in frame.columns if str(col).startswith(MTF_TREND_PREFIX)}
+        return cls(frame.index, frame[list(SIGNALS)].to_numpy(dtype=np.float64),
+                   frame['score_filter'].to_numpy(dtype=np.float64), regimes, trends)
+
 class SignalAggregator:
-    def __init__(self, df: pd.DataFrame, other_dfs: dict = None, custom_weights: dict = None):
+    def __init__(self, df: pd.DataFrame, other_dfs: dict = None, custom_weights: dict = None, inplace=True):
+        """
+        inplace: write the sig_* and unum_score columns into df. With inplace=False
+        df is only read and the outputs are kept in self.columns.
+        """
         self.df = df
+        self.columns = df if inplace else {}
         self.other_dfs = other_dfs or {} # Expected: {'1h': df, '2h': df}
         self.state = MarketState.UNCERTAIN
+        self.regimes = None # Per-bar MarketState values (categorical), see detect_market_state
+        self.regime_index = None
+        self._regime_codes = None
+        self.signals = None # N x 9 signal matrix, see align_signals
+        self._scorer = None
         
         # Default Weights
-        self.weights = {
-            'trend': 0.40,
-            'volume_levels': 0.40,
-            'momentum': 0.20
-        }
+        self.weights = dict(DEFAULT_WEIGHTS)
         
-        # Merge custom weights if provided
+        # Merge custom weights if provided; they replace the regime weights
+        self.custom_weights = bool(custom_weights)
         if custom_weights:
             self.weights.update(custom_weights)
             # Ensure they sum to 1? Or just use as is. 
             # We'll normalize if they don't, but for now we expect raw inputs.
         
         # Sub-weights within categories
-        self.sub_weights = {
-            'trend': {
-                'ma_alignment': 0.4, 
-                'macd': 0.3,        
-                'aroon': 0.3        
-            },
-            'volume_levels': {
-                'fib_interaction': 0.5, 
-                'obv_trend': 0.3,       
-                'atr_volatility': 0.2   
-            },
-            'momentum': {
-                'rsi': 0.4,          
-                'stoch': 0.3,       
-                'cci': 0.3          
-            }
-        }
+        self.sub_weights = {k: dict(v) for k, v in SUB_WEIGHTS.items()}
 
     def detect_market_state(self):
         """
         Determines if the market is trending or ranging using ADX and MA slope.
+        Classifies every bar (self.regimes, self.regime_index); self.state and
+        self.weights follow the latest bar.
         """
         if 'ADX' not in self.df.columns:
             return MarketState.UNCERTAIN
 
-        latest_adx = self.df['ADX'].iloc[-1]
-        
-        if latest_adx > 25:
-            self.state = MarketState.TRENDING
-            # In Trending: Priortize Trend and Volume
-            self.weights = {'trend': 0.50, 'volume_levels': 0.35, 'momentum': 0.15}
-        elif latest_adx < 20:
-            self.state = MarketState.RANGING
-            # In Ranging: Prioritize Oscillators and Levels
-            self.weights = {'trend': 0.20, 'volume_levels': 0.40, 'momentum': 0.40}
-        else:
-            self.state = MarketState.UNCERTAIN
-            self.weights = {'trend': 0.33, 'volume_levels': 0.33, 'momentum': 0.34}
-            
+        codes = regime_codes(self.df['ADX'].to_numpy())
+        self._regime_codes = codes
+        self.regimes = pd.Series(pd.Categorical.from_codes(codes, categories=[r.value for r in REGIMES]),
+                                 index=self.df.index, name='market_state')
+        self.regime_index = RegimeIndex(self.df.index, codes)
+        self.state = REGIMES[codes[-1]] if len(codes) else MarketState.UNCERTAIN
+        if not self.custom_weights:
+            self.weights = dict(STATE_WEIGHTS[self.state])
         return self.state
 
+    def mtf_trends(self):
+        """
+        Confirmation trend of every other timeframe, aligned to df's bars: {timeframe: array}.
+        Precomputed trend columns of df are used for timeframes without a frame.
+        """
+        trends = {col[len(MTF_TREND_PREFIX):]: self.df[col].to_numpy(dtype=np.float64)
+                  for col in self.df.columns if str(col).startswith(MTF_TREND_PREFIX)}
+        if self.other_dfs:
+            period = infer_period(self.df.index)
+            for tf, other in self.other_dfs.items():
+                trends[tf] = mtf_trend(self.df.index, period, other, tf)
+        return trends
+
     def confirm_signal_mtf(self, score_series):
         """
         Adjusts the score based on confirmation from other timeframes.
-        If we have 1h data, check the latest trend on 1h.
+        Every bar whose direction disagrees with the trend of another
+        timeframe (as of that bar's close) is dampened by half, once per timeframe.
         """
-        if not self.other_dfs or '1h' not in self.other_dfs:
+        trends = self.mtf_trends()
+        if not trends:
             return score_series
-            
-        df1 = self.other_dfs['1h']
-        # Simple confirmation: 1h trend direction
-        # Bullish if close > EMA_50 on 1h
-        ema_50_1h = df1['close'].rolling(50).mean()
-        latest_1h_trend = 1 if df1['close'].iloc[-1] > ema_50_1h.iloc[-1] else -1
-        
-        # If 4h score and 1h trend disagree, dampen the score.
-        current_4h_dir = np.sign(score_series.iloc[-1])
-        if current_4h_dir != latest_1h_trend:
-            # Dampen the last value (and ideally the whole series if we had full alignment, 
-            # but for MVP we focus on the current signal)
-            score_series.iloc[-1] *= 0.5
-                
-        return score_series
+
+        score = score_series.to_numpy(dtype=np.float64, copy=True)
+        direction = np.sign(score)
+        for trend in trends.values():
+            # No dampening before the other timeframe has any closed candle
+            score[~np.isnan(trend) & (direction != trend)] *= 0.5
+        return pd.Series(score, index=score_series.index) # Same rule as UnumScorer.score
 
     def align_signals(self):
         """
-        Calculates raw signals (-1, 0, 1) for each component.
+        Calculates raw signals (-1, 0, 1) for each component, stacked
+        column-wise into self.signals (N x 9, SIGNALS order).
         """
-        # 1. Trend Signals
-        self.df['sig_ma'] = self._calc_ma_signal()
-        self.df['sig_macd'] = self._calc_macd_signal()
-        self.df['sig_aroon'] = self._calc_aroon_signal()
-        
-        # 2. Volume & Levels
-        self.df['sig_fib'] = self._calc_fib_signal()
-        self.df['sig_obv'] = self._calc_obv_signal()
-        self.df['sig_atr'] = self._calc_atr_signal() # Mostly likely a filter (0 or 1)
-        
-        # 3. Momentum
-        self.df['sig_rsi'] = self._calc_rsi_signal()
-        self.df['sig_stoch'] = self._calc_stoch_signal()
-        self.df['sig_cci'] = self._calc_cci_signal()
+        calcs = {
+            # 1. Trend Signals
+            'sig_ma': self._calc_ma_signal,
+            'sig_macd': self._calc_macd_signal,
+            'sig_aroon': self._calc_aroon_signal,
+            # 2. Volume & Levels
+            'sig_fib': self._calc_fib_signal,
+            'sig_obv': self._calc_obv_signal,
+            'sig_atr': self._calc_atr_signal, # Mostly likely a filter (0 or 1)
+            # 3. Momentum
+            'sig_rsi': self._calc_rsi_signal,
+            'sig_stoch': self._calc_stoch_signal,
+            'sig_cci': self._calc_cci_signal
+        }
+        self.signals = np.empty((len(self.df), len(SIGNALS)), order='F')
+        for j, name in enumerate(SIGNALS):
+            self.signals[:, j] = calcs[name]()
+            self.columns[name] = self.signals[:, j]
 
-    def calculate_unum_score(self, apply_state_weights=True):
+    def score_filters(self):
         """
-        Aggregates signals into a final 'Unum' score (-1.0 to +1.0).
+        Weight-independent multiplier of the raw score per bar (noise reduction filters).
         """
-        if apply_state_weights:
-            self.detect_market_state() # Update weights based on current state
-        self.align_signals()
-        
-        # Trend Score
-        trend_score = (
-            self.df['sig_ma'] * self.sub_weights['trend']['ma_alignment'] +
-            self.df['sig_macd'] * self.sub_weights['trend']['macd'] +
-            self.df['sig_aroon'] * self.sub_weights['trend']['aroon']
-        )
-        
-        # Volume/Levels Score
-        vol_score = (
-            self.df['sig_fib'] * self.sub_weights['volume_levels']['fib_interaction'] +
-            self.df['sig_obv'] * self.sub_weights['volume_levels']['obv_trend'] +
-            self.df['sig_atr'] * self.sub_weights['volume_levels']['atr_volatility']
-        )
-        
-        # Momentum Score
-        mom_score = (
-            self.df['sig_rsi'] * self.sub_weights['momentum']['rsi'] +
-            self.df['sig_stoch'] * self.sub_weights['momentum']['stoch'] +
-            self.df['sig_cci'] * self.sub_weights['momentum']['cci']
-        )
-        
-        # Final Weighted Sum
-        raw_score = (
-            trend_score * self.weights['trend'] +
-            vol_score * self.weights['volume_levels'] +
-            mom_score * self.weights['momentum']
-        )
-        
-        # --- PHASE 5: Noise Reduction Filters ---
-        
         # 1. Stricter Trend Strength (ADX)
         # If ADX < 22, the trend is too weak. Neutralize or heavily dampen.
-        adx_filter = np.where(self.df['ADX'] > 22, 1.0, 0.2)
+        adx_filter = np.where(self.df['ADX'].to_numpy() > 22, 1.0, 0.2)
         
         # 2. Volume Spike Confirmation
         # Check if volume is 20% higher than SMA(20)
-        vol_spike = np.where(self.df['volume'] > self.df['VOL_SMA'] * 1.2, 1.0, 0.5)
+        vol_spike = np.where(self.df['volume'].to_numpy() > self.df['VOL_SMA'].to_numpy() * 1.2, 1.0, 0.5)
         
         # 3. Volatility Normalization (refined ATR filter)
-        vol_dampener = self.df['sig_atr']
-        
-        # Combine filters
-        score_series = raw_score * adx_filter * vol_spike * vol_dampener
-        
-        # 4. Signal Persistence (Dampen if signal just flipped)
-        # Requirement: Current sign matches previous sign
-        prev_score = score_series.shift(1).fillna(0)
-        persistence = np.where(np.sign(score_series) == np.sign(prev_score), 1.0, 0.5)
-        score_series = score_series * persistence
-        
-        # Multi-Timeframe Confirmation (MTC)
-        self.df['unum_score'] = self.confirm_signal_mtf(score_series)
+        adx_filter *= vol_spike
+        adx_filter *= self.signals[:, SIGNALS.index('sig_atr')]
+        return adx_filter
+
+    def scorer(self, apply_state_weights=True):
+        """
+        UnumScorer over this frame's signals; score any weights with it without
+        recomputing signals, regimes or confirmation.
+        """
+        if apply_state_weights:
+            self.detect_market_state() # Regime of every bar
+        self.align_signals()
+        regimes = self._regime_codes if apply_state_weights else None
+        return UnumScorer(self.df.index, self.signals, self.score_filters(), regimes,
+                          self.mtf_trends(), self.sub_weights)
+
+    def score_batch(self, weights, sub_weights=None):
+        """
+        (K x N) scores for K category weight vectors (K x 3, CATEGORIES order, or K dicts),
+        optionally with sub-weights; see UnumScorer.score_batch.
+        The component signals are computed once per aggregator.
+        """
+        if self._scorer is None:
+            self._scorer = self.scorer()
+        return self._scorer.score_batch(weights, sub_weights)
+
+    def calculate_unum_score(self, apply_state_weights=True):
+        """
+        Aggregates signals into a final 'Unum' score (-1.0 to +1.0).
+        Each bar is weighted by its regime unless custom weights were given.
+        """
+        scorer = self.scorer(apply_state_weights)
+        use_regimes = apply_state_weights and not self.custom_weights
+        score = scorer.score(None if use_regimes else self.weights)
+        self.columns['unum_score'] = pd.Series(score, index=self.df.index)
         
-        return self.df['unum_score']
+        return self.columns['unum_score']
 
     # --- Signal Calculation Helpers ---
 
@@ -191,33 +412,15 @@ class SignalAggregator:
     def _calc_aroon_signal(self):
         return np.where(self.df['Aroon_Up'] > self.df['Aroon_Down'], 1, -1)
 
-    def _calc_fib_signal(self):
+    def _calc_fib_signal(self, tolerance=0.005, lookback=1):
         """
         Advanced logic: Detect bounces off key Fib levels (0.382, 0.5, 0.618).
+        Tolerance is a fraction of the close (0.5%).
         """
-        lookback = 3
-        # Tolerance: 0.5% of price
-        tolerance = self.df['close'] * 0.005
-        
-        # Bullish bounce: Low within tolerance of level, Close > Level
-        fib_levels = ['Fib_382', 'Fib_500', 'Fib_618']
-        bull_signal = np.zeros(len(self.df))
-        bear_signal = np.zeros(len(self.df))
-        
-        for level in fib_levels:
-            # Price touched level from above and bounced
-            touched = (self.df['low'] <= self.df[level] + tolerance) & (self.df['low'] >= self.df[level] - tolerance)
-            bounced = (self.df['close'] > self.df[level])
-            bull_signal = np.where(touched & bounced, 1, bull_signal)
-            
-            # Price touched level from below and rejected
-            touched_upper = (self.df['high'] >= self.df[level] - tolerance) & (self.df['high'] <= self.df[level] + tolerance)
-            rejected = (self.df['close'] < self.df[level])
-            bear_signal = np.where(touched_upper & rejected, -1, bear_signal)
-            
+        interaction = fib_interaction(self.df, tolerance, lookback)
         # If no bounce, return trend direction relative to middle
-        combined = np.where(bull_signal != 0, bull_signal, bear_signal)
-        return np.where(combined != 0, combined, np.where(self.df['close'] > self.df['Fib_500'], 0.5, -0.5))
+        trend = np.where(self.df['close'].to_numpy() > self.df['Fib_500'].to_numpy(), 0.5, -0.5)
+        return np.where(interaction != 0, interaction, trend)
 
     def _calc_obv_signal(self):
         obv_sma = self.df['OBV'].rolling(20).mean()
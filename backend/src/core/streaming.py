@@ -0,0 +1,504 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .strategy import MarketState, DEFAULT_WEIGHTS, STATE_WEIGHTS, SUB_WEIGHTS, SCORE_DECIMALS, state_for_adx
+
+NAN = float('nan')
+
+
+def _is_nan(x):
+    return x != x
+
+
+class RollingMean:
+    """
+    Fixed-window mean over a compensated (Kahan) running sum.
+    NaN inputs occupy a slot but are not counted, like pandas rolling().mean().
+    """
+    def __init__(self, window, min_periods=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.count = 0
+        self._sum = 0.0
+        self._comp = 0.0
+
+    def _add(self, x):
+        y = x - self._comp
+        t = self._sum + y
+        self._comp = (t - self._sum) - y
+        self._sum = t
+
+    def update(self, x):
+        self.values.append(x)
+        if not _is_nan(x):
+            self._add(x)
+            self.count += 1
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if not _is_nan(old):
+                self._add(-old)
+                self.count -= 1
+        if self.count >= max(self.min_periods, 1):
+            return self._sum / self.count
+        return NAN
+
+
+class RollingStd:
+    """
+    Fixed-window mean and population std (ddof=0) via sliding Welford updates.
+    """
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self._m2 += delta * (x - self.mean)
+        if n > self.window:
+            old = self.values.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean -= delta / n
+            self._m2 -= delta * (old - self.mean)
+        if n < self.window:
+            return NAN, NAN
+        return self.mean, math.sqrt(max(self._m2, 0.0) / n)
+
+
+class RollingExtreme:
+    """
+    Rolling max (or min) over a monotonic deque: amortized O(1) per update.
+    Also reports how many bars ago the extreme occurred (oldest on ties, like np.argmax).
+    """
+    def __init__(self, window, kind='max'):
+        self.window = window
+        self.sign = 1.0 if kind == 'max' else -1.0
+        self.items = deque()
+        self.count = 0
+
+    def update(self, x):
+        i = self.count
+        self.count += 1
+        v = x * self.sign
+        while self.items and self.items[-1][1] < v:
+            self.items.pop()
+        self.items.append((i, v))
+        if self.items[0][0] <= i - self.window:
+            self.items.popleft()
+        if self.count < self.window:
+            return NAN, None
+        idx, value = self.items[0]
+        return value * self.sign, i - idx
+
+
+class EMA:
+    """
+    Exponential moving average matching pandas ewm(adjust=False).mean().
+    Leading NaNs are skipped; output is NaN until min_periods observations.
+    """
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        com = (span - 1) / 2 if span is not None else (1 - alpha) / alpha
+        self.alpha = 1.0 / (1.0 + com)
+        self.old_wt = 1.0 - self.alpha
+        self.min_periods = min_periods
+        self.value = NAN
+        self.nobs = 0
+
+    def update(self, x):
+        if not _is_nan(x):
+            self.nobs += 1
+            if _is_nan(self.value):
+                self.value = x
+            elif self.value != x:
+                self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+        return self.value if self.nobs >= max(self.min_periods, 1) else NAN
+
+
+class WilderATR:
+    """
+    ATR as computed by ta: zeros during warm-up, simple mean of the first
+    `window` true ranges, then Wilder smoothing.
+    """
+    def __init__(self, window):
+        self.window = window
+        self.seed = []
+        self.value = 0.0
+
+    def update(self, tr):
+        if len(self.seed) < self.window:
+            self.seed.append(tr)
+            if len(self.seed) == self.window:
+                self.value = float(np.mean(self.seed))
+            return self.value
+        self.value = (self.value * (self.window - 1) + tr) / float(self.window)
+        return self.value
+
+
+class WilderADX:
+    """
+    ADX / +DI / -DI following ta.trend.ADXIndicator bar by bar,
+    including its zero-filled warm-up periods.
+    """
+    def __init__(self, window):
+        self.window = window
+        self.bars = 0
+        self.trs = 0.0
+        self.dip = 0.0
+        self.din = 0.0
+        self.di_seed = []
+        self.adx = 0.0
+
+    def update(self, high, low, prev_high, prev_low, prev_close):
+        w = self.window
+        t = self.bars
+        self.bars += 1
+        if t == 0:
+            return 0.0, 0.0, 0.0
+
+        dm = max(high, prev_close) - min(low, prev_close)
+        diff_up = high - prev_high
+        diff_down = prev_low - low
+        pos = diff_up if (diff_up > diff_down and diff_up > 0) else 0.0
+        neg = diff_down if (diff_down > diff_up and diff_down > 0) else 0.0
+
+        if t <= w:
+            self.trs += dm
+            self.dip += pos
+            self.din += neg
+            if t < w:
+                return 0.0, 0.0, 0.0
+        else:
+            self.trs = self.trs - (self.trs / float(w)) + dm
+            self.dip = self.dip - (self.dip / float(w)) + pos
+            self.din = self.din - (self.din / float(w)) + neg
+
+        dip_pct = 100 * (self.dip / self.trs) if self.trs != 0 else 0.0
+        din_pct = 100 * (self.din / self.trs) if self.trs != 0 else 0.0
+        if dip_pct + din_pct != 0:
+            di = 100 * abs((dip_pct - din_pct) / (dip_pct + din_pct))
+        else:
+            di = 0.0
+
+        if len(self.di_seed) < w:
+            self.di_seed.append(di)
+            if len(self.di_seed) == w:
+                self.adx = float(np.mean(self.di_seed))
+        else:
+            self.adx = ((self.adx * (w - 1)) + di) / float(w)
+
+        # +DI/-DI are reported from the bar after the first full window
+        if t == w:
+            return self.adx, 0.0, 0.0
+        return self.adx, dip_pct, din_pct
+
+
+class StreamingIndicators:
+    """
+    Stateful counterpart of Indicators.add_all_indicators().
+    Each update(candle) costs O(1) (CCI: O(window) for its mean deviation) and
+    returns the same columns the batch path produces for that bar.
+    """
+    def __init__(self, ma_periods=(20, 50, 200), rsi_period=14, stoch_k=14, stoch_d=3,
+                 macd_fast=12, macd_slow=26, macd_sign=9, volume_period=20, atr_period=14,
+                 aroon_period=25, cci_period=20, adx_period=14, bb_period=20, bb_std=2,
+                 kc_period=20, fib_lookback=100):
+        self.ma_periods = list(ma_periods)
+        self.sma = {p: RollingMean(p) for p in self.ma_periods}
+        self.ema = {p: EMA(span=p, min_periods=p) for p in self.ma_periods}
+
+        self.rsi_up = EMA(alpha=1 / rsi_period, min_periods=rsi_period)
+        self.rsi_down = EMA(alpha=1 / rsi_period, min_periods=rsi_period)
+
+        self.stoch_low = RollingExtreme(stoch_k, 'min')
+        self.stoch_high = RollingExtreme(stoch_k, 'max')
+        self.stoch_d = RollingMean(stoch_d)
+
+        self.macd_fast = EMA(span=macd_fast, min_periods=macd_fast)
+        self.macd_slow = EMA(span=macd_slow, min_periods=macd_slow)
+        self.macd_signal = EMA(span=macd_sign, min_periods=macd_sign)
+
+        self.obv = 0.0
+        self.vol_sma = RollingMean(volume_period)
+        self.atr = WilderATR(atr_period)
+
+        self.aroon_period = aroon_period
+        self.aroon_high = RollingExtreme(aroon_period + 1, 'max')
+        self.aroon_low = RollingExtreme(aroon_period + 1, 'min')
+
+        self.cci_period = cci_period
+        self.cci_tp = deque(maxlen=cci_period)
+        self.cci_mean = RollingMean(cci_period)
+
+        self.adx = WilderADX(adx_period)
+
+        self.bb = RollingStd(bb_period)
+        self.bb_std = bb_std
+
+        self.kc_mid = RollingMean(kc_period)
+        self.kc_high = RollingMean(kc_period, min_periods=0)
+        self.kc_low = RollingMean(kc_period, min_periods=0)
+
+        self.fib_high = RollingExtreme(fib_lookback, 'max')
+        self.fib_low = RollingExtreme(fib_lookback, 'min')
+
+        self.prev = None
+        self.bars = 0
+
+    def update(self, candle):
+        """
+        Consumes one closed candle (mapping with open/high/low/close/volume)
+        and returns the candle fields plus every indicator value for it.
+        """
+        o = float(candle['open'])
+        h = float(candle['high'])
+        l = float(candle['low'])
+        c = float(candle['close'])
+        v = float(candle['volume'])
+        prev = self.prev
+        row = {'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+
+        # Moving averages
+        for p in self.ma_periods:
+            row[f'SMA_{p}'] = self.sma[p].update(c)
+            row[f'EMA_{p}'] = self.ema[p].update(c)
+
+        # RSI (Wilder smoothing of gains/losses; the first diff counts as zero)
+        diff = c - prev['close'] if prev else 0.0
+        up = self.rsi_up.update(diff if diff > 0 else 0.0)
+        down = self.rsi_down.update(-diff if diff < 0 else 0.0)
+        if down == 0:
+            row['RSI'] = 100.0
+        else:
+            row['RSI'] = 100 - (100 / (1 + up / down))
+
+        # Stochastic
+        smin, _ = self.stoch_low.update(l)
+        smax, _ = self.stoch_high.update(h)
+        if _is_nan(smin) or smax == smin:
+            # A flat window gives 0/0 in the batch path
+            stoch_k = NAN
+        else:
+            stoch_k = 100 * (c - smin) / (smax - smin)
+        row['Stoch_K'] = stoch_k
+        row['Stoch_D'] = self.stoch_d.update(stoch_k)
+
+        # MACD
+        macd = self.macd_fast.update(c) - self.macd_slow.update(c)
+        signal = self.macd_signal.update(macd)
+        row['MACD'] = macd
+        row['MACD_Signal'] = signal
+        row['MACD_Hist'] = macd - signal
+
+        # Volume
+        if prev and c < prev['close']:
+            self.obv -= v
+        else:
+            self.obv += v
+        row['OBV'] = self.obv
+        row['VOL_SMA'] = self.vol_sma.update(v)
+
+        # ATR
+        if prev:
+            tr = max(h - l, abs(h - prev['close']), abs(l - prev['close']))
+        else:
+            tr = h - l
+        row['ATR'] = self.atr.update(tr)
+
+        # Aroon
+        _, bars_since_high = self.aroon_high.update(h)
+        _, bars_since_low = self.aroon_low.update(l)
+        if bars_since_high is None:
+            row['Aroon_Up'] = row['Aroon_Down'] = row['Aroon_Ind'] = NAN
+        else:
+            aroon_up = float(self.aroon_period - bars_since_high) / self.aroon_period * 100
+            aroon_down = float(self.aroon_period - bars_since_low) / self.aroon_period * 100
+            row['Aroon_Up'] = aroon_up
+            row['Aroon_Down'] = aroon_down
+            row['Aroon_Ind'] = aroon_up - aroon_down
+
+        # CCI (mean absolute deviation needs the whole window)
+        tp = (h + l + c) / 3.0
+        self.cci_tp.append(tp)
+        tp_mean = self.cci_mean.update(tp)
+        if _is_nan(tp_mean):
+            row['CCI'] = NAN
+        else:
+            window = np.fromiter(self.cci_tp, dtype=np.float64, count=len(self.cci_tp))
+            mad = np.mean(np.abs(window - np.mean(window)))
+            row['CCI'] = (tp - tp_mean) / (0.015 * mad) if mad != 0 else NAN
+
+        # ADX
+        if prev:
+            adx, adx_pos, adx_neg = self.adx.update(h, l, prev['high'], prev['low'], prev['close'])
+        else:
+            adx, adx_pos, adx_neg = self.adx.update(h, l, NAN, NAN, NAN)
+        row['ADX'] = adx
+        row['ADX_Pos'] = adx_pos
+        row['ADX_Neg'] = adx_neg
+
+        # Bollinger Bands
+        mavg, mstd = self.bb.update(c)
+        row['BB_High'] = mavg + self.bb_std * mstd
+        row['BB_Mid'] = mavg
+        row['BB_Low'] = mavg - self.bb_std * mstd
+        row['BB_Width'] = ((row['BB_High'] - row['BB_Low']) / mavg) * 100
+
+        # Keltner Channels (original version: typical-price SMAs)
+        row['KC_High'] = self.kc_high.update(((4 * h) - (2 * l) + c) / 3.0)
+        row['KC_Mid'] = self.kc_mid.update(tp)
+        row['KC_Low'] = self.kc_low.update(((-2 * h) + (4 * l) + c) / 3.0)
+
+        # Fibonacci levels over the rolling range
+        roll_max, _ = self.fib_high.update(h)
+        roll_min, _ = self.fib_low.update(l)
+        span = roll_max - roll_min
+        row['Roll_Max'] = roll_max
+        row['Roll_Min'] = roll_min
+        row['Fib_0'] = roll_min
+        row['Fib_236'] = roll_min + span * 0.236
+        row['Fib_382'] = roll_min + span * 0.382
+        row['Fib_500'] = roll_min + span * 0.5
+        row['Fib_618'] = roll_min + span * 0.618
+        row['Fib_786'] = roll_min + span * 0.786
+        row['Fib_100'] = roll_max
+
+        self.prev = row
+        self.bars += 1
+        return row
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feeds every row of `df` through update() and returns the resulting frame.
+        Useful to warm up the state from history before streaming live candles.
+        """
+        rows = [self.update(candle) for candle in df[['open', 'high', 'low', 'close', 'volume']].to_dict('records')]
+        out = pd.DataFrame(rows, index=df.index)
+        extra = [col for col in df.columns if col not in out.columns]
+        return pd.concat([df[extra], out], axis=1) if extra else out
+
+
+class StreamingUnumScore:
+    """
+    Stateful counterpart of SignalAggregator.calculate_unum_score().
+    update(row) scores one StreamingIndicators row. With state weights on, each
+    bar is weighted by its own market state, which is what the batch path
+    applies to its latest bar; so every streamed score equals the batch score
+    of the series ending at that bar.
+    """
+    FIB_LEVELS = ('Fib_382', 'Fib_500', 'Fib_618')
+
+    def __init__(self, custom_weights: dict = None, apply_state_weights=True, fib_tolerance=0.005, mtf_period=50):
+        self.weights = dict(DEFAULT_WEIGHTS)
+        # Custom weights replace the regime weights, as in SignalAggregator
+        self.custom_weights = bool(custom_weights)
+        if custom_weights:
+            self.weights.update(custom_weights)
+        self.sub_weights = SUB_WEIGHTS
+        self.apply_state_weights = apply_state_weights
+        self.fib_tolerance = fib_tolerance
+        self.state = MarketState.UNCERTAIN
+
+        self.obv_sma = RollingMean(20)
+        self.atr_sma = RollingMean(50)
+        self.prev_score = 0.0
+
+        # Higher-resolution confirmation series (1h closes for a 4h stream)
+        self.mtf_sma = RollingMean(mtf_period)
+        self.mtf_close = None
+        self.mtf_trend = None
+
+    def update_confirmation(self, close):
+        """
+        Feeds one closed candle of the confirmation timeframe.
+        """
+        self.mtf_close = float(close)
+        self.mtf_trend = 1 if self.mtf_close > self.mtf_sma.update(self.mtf_close) else -1
+
+    def _fib_signal(self, row):
+        close, low, high = row['close'], row['low'], row['high']
+        tolerance = close * self.fib_tolerance
+        bull = bear = False
+        for name in self.FIB_LEVELS:
+            level = row[name]
+            bull = bull or (level - tolerance <= low <= level + tolerance and close > level)
+            bear = bear or (level - tolerance <= high <= level + tolerance and close < level)
+        if bull:
+            return 1.0
+        if bear:
+            return -1.0
+        return 0.5 if close > row['Fib_500'] else -0.5
+
+    @staticmethod
+    def _atr_signal(atr, atr_sma):
+        # ATR relative to its 50-bar mean, clipped to [0.3, 1.0]; x/0 follows NumPy (0/0 -> NaN, x/0 -> inf)
+        if _is_nan(atr) or _is_nan(atr_sma) or (atr_sma == 0 and atr == 0):
+            return NAN
+        rel_vol = math.inf if atr_sma == 0 else atr / atr_sma
+        return min(max(rel_vol, 0.3), 1.0)
+
+    def update(self, row):
+        """
+        Returns the signal columns, unum_score and market_state for one bar.
+        """
+        if self.apply_state_weights:
+            self.state = state_for_adx(row['ADX'])
+            if not self.custom_weights:
+                self.weights = STATE_WEIGHTS[self.state]
+
+        close = row['close']
+        obv_sma = self.obv_sma.update(row['OBV'])
+        atr_sma = self.atr_sma.update(row['ATR'])
+        # NaN comparisons are False, matching np.where in the batch helpers
+        signals = {
+            'sig_ma': 1 if close > row['EMA_20'] > row['EMA_50'] else (-1 if close < row['EMA_20'] < row['EMA_50'] else 0),
+            'sig_macd': 1 if row['MACD_Hist'] > 0 else -1,
+            'sig_aroon': 1 if row['Aroon_Up'] > row['Aroon_Down'] else -1,
+            'sig_fib': self._fib_signal(row),
+            'sig_obv': 1 if row['OBV'] > obv_sma else -1,
+            'sig_atr': self._atr_signal(row['ATR'], atr_sma),
+            'sig_rsi': 1 if row['RSI'] > 50 else -1,
+            'sig_stoch': 1 if row['Stoch_K'] > row['Stoch_D'] else -1,
+            'sig_cci': 1 if row['CCI'] > 0 else -1
+        }
+
+        sw = self.sub_weights
+        trend_score = (signals['sig_ma'] * sw['trend']['ma_alignment'] +
+                       signals['sig_macd'] * sw['trend']['macd'] +
+                       signals['sig_aroon'] * sw['trend']['aroon'])
+        vol_score = (signals['sig_fib'] * sw['volume_levels']['fib_interaction'] +
+                     signals['sig_obv'] * sw['volume_levels']['obv_trend'] +
+                     signals['sig_atr'] * sw['volume_levels']['atr_volatility'])
+        mom_score = (signals['sig_rsi'] * sw['momentum']['rsi'] +
+                     signals['sig_stoch'] * sw['momentum']['stoch'] +
+                     signals['sig_cci'] * sw['momentum']['cci'])
+        raw_score = (trend_score * self.weights['trend'] +
+                     vol_score * self.weights['volume_levels'] +
+                     mom_score * self.weights['momentum'])
+        raw_score = float(np.round(raw_score, SCORE_DECIMALS))
+
+        # Noise filters: ADX strength, volume spike, volatility dampener
+        adx_filter = 1.0 if row['ADX'] > 22 else 0.2
+        vol_spike = 1.0 if row['volume'] > row['VOL_SMA'] * 1.2 else 0.5
+        score = raw_score * adx_filter * vol_spike * signals['sig_atr']
+
+        # Persistence compares against the previous bar's pre-persistence score
+        prev = self.prev_score
+        self.prev_score = 0.0 if _is_nan(score) else score
+        if _is_nan(score) or np.sign(score) != np.sign(prev):
+            score *= 0.5
+
+        if self.mtf_trend is not None and np.sign(score) != self.mtf_trend:
+            score *= 0.5
+
+        signals['unum_score'] = score
+        signals['market_state'] = self.state.value
+        return signals
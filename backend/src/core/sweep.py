@@ -0,0 +1,292 @@
+import os
+import numpy as np
+import pandas as pd
+from .backtest import tradable_mask
+from .periods import periods_per_year
+
+try:
+    import numba
+    from numba import njit, prange
+    # Parallel kernels are launched from executor threads: OpenMP handles that safely,
+    # while TBB keeps the interpreter from exiting afterwards
+    if 'NUMBA_THREADING_LAYER' not in os.environ:
+        numba.config.THREADING_LAYER_PRIORITY = ['omp', 'tbb', 'workqueue']
+except ImportError:
+    njit = None
+
+# Parameter columns of a sweep grid, in order
+PARAM_COLUMNS = ['long_threshold', 'short_threshold', 'sl_pct', 'tp_pct', 'trailing_sl_pct']
+
+# Fields of the (combos x fields) simulation state matrix
+POSITION, ENTRY, PEAK, BALANCE, TRADES, EQ_PREV, EQ_PEAK, MAX_DD, \
+    RET_COUNT, RET_MEAN, RET_M2, CLOSED, WINS, ENTRY_BALANCE = range(14)
+N_FIELDS = 14
+
+
+def build_grid(long_thresholds, short_thresholds, sl_pcts, tp_pcts, trailing_sl_pcts):
+    """
+    Cartesian product of the parameter lists as a (K x 5) float64 matrix.
+    """
+    axes = [np.atleast_1d(np.asarray(v, dtype=np.float64))
+            for v in (long_thresholds, short_thresholds, sl_pcts, tp_pcts, trailing_sl_pcts)]
+    mesh = np.meshgrid(*axes, indexing='ij')
+    return np.stack([m.ravel() for m in mesh], axis=1)
+
+
+def _sweep_numpy(prices, scores, tradable, grid, fee, initial_balance):
+    """
+    Walks the bars once and advances every combo together. Each row of the
+    state matrix is one combo; each step is a handful of vector ops over K rows.
+    """
+    k = grid.shape[0]
+    long_t, short_t = grid[:, 0], grid[:, 1]
+    sl_lvl_long, sl_lvl_short = 1 - grid[:, 2], 1 + grid[:, 2]
+    tp_lvl_long, tp_lvl_short = 1 + grid[:, 3], 1 - grid[:, 3]
+    ts_lvl_long, ts_lvl_short = 1 - grid[:, 4], 1 + grid[:, 4]
+
+    # Fortran order keeps each field contiguous across combos
+    state = np.zeros((k, N_FIELDS), dtype=np.float64, order='F')
+    state[:, ENTRY] = 1.0
+    state[:, BALANCE] = initial_balance
+    state[:, EQ_PREV] = initial_balance
+    state[:, EQ_PEAK] = initial_balance
+    state[:, RET_COUNT] = 1 # Bar 0 contributes a zero return
+
+    position = state[:, POSITION]
+    entry = state[:, ENTRY]
+    peak = state[:, PEAK]
+    balance = state[:, BALANCE]
+
+    for i in range(1, len(prices)):
+        price = prices[i]
+        is_long = position == 1
+        is_short = position == -1
+        ratio = price / entry
+        curr = np.where(is_long, ratio * balance * (1 - fee),
+                        np.where(is_short, (2 - ratio) * balance * (1 - fee), balance))
+
+        # Exits (always active once in a trade)
+        np.copyto(peak, np.maximum(peak, price), where=is_long)
+        np.copyto(peak, np.minimum(peak, price), where=is_short)
+        exit_long = is_long & ((price <= entry * sl_lvl_long) |
+                               (price >= entry * tp_lvl_long) |
+                               (price <= peak * ts_lvl_long))
+        exit_short = is_short & ((price >= entry * sl_lvl_short) |
+                                 (price <= entry * tp_lvl_short) |
+                                 (price >= peak * ts_lvl_short))
+        exited = exit_long | exit_short
+        if exited.any():
+            np.copyto(balance, curr * (1 - fee), where=exited)
+            position[exited] = 0
+            state[:, TRADES] += exited
+            # Closed trades and winners, as in the Backtester trade ledger
+            state[:, CLOSED] += exited
+            state[:, WINS] += exited & (balance > state[:, ENTRY_BALANCE])
+
+        # Entries
+        if tradable[i]:
+            flat = position == 0
+            go_long = flat & (scores[i] > long_t)
+            go_short = flat & ~go_long & (scores[i] < short_t)
+            entered = go_long | go_short
+            if entered.any():
+                position[go_long] = 1
+                position[go_short] = -1
+                entry[entered] = price
+                peak[entered] = price
+                np.copyto(state[:, ENTRY_BALANCE], balance, where=entered)
+                np.copyto(balance, balance * (1 - fee), where=entered)
+                state[:, TRADES] += entered
+
+        # Running metrics (Welford for return mean/variance)
+        ret = curr / state[:, EQ_PREV] - 1
+        state[:, RET_COUNT] += 1
+        delta = ret - state[:, RET_MEAN]
+        state[:, RET_MEAN] += delta / state[:, RET_COUNT]
+        state[:, RET_M2] += delta * (ret - state[:, RET_MEAN])
+        np.maximum(state[:, EQ_PEAK], curr, out=state[:, EQ_PEAK])
+        np.minimum(state[:, MAX_DD], (curr - state[:, EQ_PEAK]) / state[:, EQ_PEAK], out=state[:, MAX_DD])
+        state[:, EQ_PREV] = curr
+
+    return state
+
+
+def _sweep_rows_kernel(prices, scores, tradable, grid, fee, initial_balance, state):
+    """
+    One combo per state row, rows simulated in parallel.
+    The per-row loop matches core.engine._bar_loop_kernel exactly.
+    """
+    for r in prange(grid.shape[0]):
+        long_t = grid[r, 0]
+        short_t = grid[r, 1]
+        sl_pct = grid[r, 2]
+        tp_pct = grid[r, 3]
+        trailing_sl_pct = grid[r, 4]
+
+        balance = initial_balance
+        position = 0
+        entry_price = 0.0
+        peak_price = 0.0
+        trades = 0
+        eq_prev = initial_balance
+        eq_peak = initial_balance
+        max_dd = 0.0
+        count = 1.0
+        mean = 0.0
+        m2 = 0.0
+        closed = 0
+        wins = 0
+        entry_balance = 0.0
+
+        for i in range(1, prices.shape[0]):
+            price = prices[i]
+            curr = balance
+            if position == 1:
+                curr = (price / entry_price) * balance * (1 - fee)
+            elif position == -1:
+                curr = (2 - (price / entry_price)) * balance * (1 - fee)
+
+            exit_triggered = False
+            if position == 1:
+                if price > peak_price:
+                    peak_price = price
+                if (price <= entry_price * (1 - sl_pct)) or \
+                   (price >= entry_price * (1 + tp_pct)) or \
+                   (price <= peak_price * (1 - trailing_sl_pct)):
+                    exit_triggered = True
+            elif position == -1:
+                if price < peak_price:
+                    peak_price = price
+                if (price >= entry_price * (1 + sl_pct)) or \
+                   (price <= entry_price * (1 - tp_pct)) or \
+                   (price >= peak_price * (1 + trailing_sl_pct)):
+                    exit_triggered = True
+
+            if exit_triggered:
+                balance = curr * (1 - fee)
+                position = 0
+                trades += 1
+                closed += 1
+                if balance > entry_balance:
+                    wins += 1
+
+            if position == 0 and tradable[i]:
+                if scores[i] > long_t:
+                    position = 1
+                    entry_price = price
+                    peak_price = price
+                    entry_balance = balance
+                    balance = balance * (1 - fee)
+                    trades += 1
+                elif scores[i] < short_t:
+                    position = -1
+                    entry_price = price
+                    peak_price = price
+                    entry_balance = balance
+                    balance = balance * (1 - fee)
+                    trades += 1
+
+            ret = curr / eq_prev - 1
+            count += 1
+            delta = ret - mean
+            mean += delta / count
+            m2 += delta * (ret - mean)
+            if curr > eq_peak:
+                eq_peak = curr
+            dd = (curr - eq_peak) / eq_peak
+            if dd < max_dd:
+                max_dd = dd
+            eq_prev = curr
+
+        state[r, POSITION] = position
+        state[r, ENTRY] = entry_price
+        state[r, PEAK] = peak_price
+        state[r, BALANCE] = balance
+        state[r, TRADES] = trades
+        state[r, EQ_PREV] = eq_prev
+        state[r, EQ_PEAK] = eq_peak
+        state[r, MAX_DD] = max_dd
+        state[r, RET_COUNT] = count
+        state[r, RET_MEAN] = mean
+        state[r, RET_M2] = m2
+        state[r, CLOSED] = closed
+        state[r, WINS] = wins
+        state[r, ENTRY_BALANCE] = entry_balance
+
+
+if njit is not None:
+    _sweep_rows_compiled = njit(cache=True, parallel=True, nogil=True)(_sweep_rows_kernel)
+else:
+    _sweep_rows_compiled = None
+
+
+def _sweep_numba(prices, scores, tradable, grid, fee, initial_balance):
+    state = np.zeros((grid.shape[0], N_FIELDS), dtype=np.float64)
+    _sweep_rows_compiled(prices, scores, tradable, grid, float(fee), float(initial_balance), state)
+    return state
+
+
+SWEEP_ENGINES = {'numpy': _sweep_numpy}
+if _sweep_rows_compiled is not None:
+    SWEEP_ENGINES['numba'] = _sweep_numba
+
+
+class ParameterSweep:
+    def __init__(self, df: pd.DataFrame, initial_balance=10000, fee=0.001):
+        """
+        df: frame with 'close' and 'unum_score' (as produced by SignalAggregator).
+        Price and score arrays are extracted once and shared by every combo.
+        """
+        self.index = df.index
+        self.prices = df['close'].to_numpy(dtype=np.float64)
+        self.scores = df['unum_score'].to_numpy(dtype=np.float64)
+        self.initial_balance = initial_balance
+        self.fee = fee
+        # Sharpe annualization at the bar frequency, same as Backtester.calculate_metrics
+        self.annualization = np.sqrt(periods_per_year(df.index))
+
+    def run(self, long_thresholds=(0.6,), short_thresholds=(-0.6,), sl_pcts=(0.02,),
+            tp_pcts=(0.04,), trailing_sl_pcts=(0.015,), skip_weekends=True,
+            allowed_sessions=None, rank_by='total_return_pct', engine='auto'):
+        """
+        Simulates every combination of the given grids in one pass.
+        Returns a metrics table (one row per combo) ranked by `rank_by`, descending.
+        """
+        grid = build_grid(long_thresholds, short_thresholds, sl_pcts, tp_pcts, trailing_sl_pcts)
+        tradable = tradable_mask(self.index, skip_weekends, allowed_sessions)
+
+        if engine == 'auto':
+            engine = 'numba' if 'numba' in SWEEP_ENGINES else 'numpy'
+        if engine not in SWEEP_ENGINES:
+            raise ValueError(f"Unknown sweep engine '{engine}'. Available: {sorted(SWEEP_ENGINES)}")
+        state = SWEEP_ENGINES[engine](self.prices, self.scores, tradable, grid,
+                                      self.fee, self.initial_balance)
+
+        table = pd.DataFrame(grid, columns=PARAM_COLUMNS)
+        table = pd.concat([table, self._metrics(state)], axis=1)
+        if rank_by not in table.columns:
+            raise ValueError(f"Cannot rank by '{rank_by}'")
+        table = table.sort_values(rank_by, ascending=False, kind='stable').reset_index(drop=True)
+        metric_columns = table.columns.drop(PARAM_COLUMNS)
+        table[metric_columns] = table[metric_columns].round(2)
+        return table
+
+    def _metrics(self, state):
+        """
+        Final KPIs from the state matrix, mirroring Backtester.calculate_metrics.
+        """
+        final_balance = state[:, EQ_PREV]
+        std = np.sqrt(state[:, RET_M2] / (state[:, RET_COUNT] - 1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(std != 0, state[:, RET_MEAN] / std * self.annualization, 0.0)
+            win_rate = np.where(state[:, CLOSED] > 0, state[:, WINS] / state[:, CLOSED] * 100, 0.0)
+        buy_hold = (self.prices[-1] / self.prices[0] - 1) * 100
+        return pd.DataFrame({
+            'total_return_pct': (final_balance / self.initial_balance - 1) * 100,
+            'buy_hold_return_pct': np.full(len(state), buy_hold),
+            'win_rate_pct': win_rate,
+            'max_drawdown_pct': state[:, MAX_DD] * 100,
+            'sharpe_ratio': sharpe,
+            'final_balance': final_balance,
+            'total_trades': state[:, TRADES].astype(np.int64)
+        })
@@ -0,0 +1,169 @@
+import time
+
+import numpy as np
+
+from .backtest import Backtester
+from .optimizer import OptimizerJob, attach_frame, attach_scorer
+
+# Longest indicator window (SMA_200): train bars closer than this after a test
+# window still see its prices through their indicators
+EMBARGO_BARS = 200
+
+# Backtester metrics a fold can select its candidate by (higher is better)
+RANK_METRICS = ('total_return_pct', 'sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'win_rate_pct',
+                'profit_factor', 'expectancy_pct', 'max_drawdown_pct', 'final_balance')
+
+
+def walk_forward_splits(n_bars, train_bars, test_bars, step=None, anchored=False):
+    """
+    Consecutive train/test windows over n_bars, moving forward by `step`
+    (default test_bars). Rolling windows keep train_bars bars, anchored ones
+    grow from bar 0. Every test window directly follows its train window.
+    fold: {'fold': i, 'train': [(start, stop)], 'test': (start, stop)}
+    """
+    step = step or test_bars
+    if train_bars < 2 or test_bars < 2 or step < 1:
+        raise ValueError("train_bars and test_bars must be at least 2 and step at least 1")
+    folds = []
+    for test_start in range(train_bars, n_bars - test_bars + 1, step):
+        train_start = 0 if anchored else test_start - train_bars
+        folds.append({'fold': len(folds), 'train': [(train_start, test_start)],
+                      'test': (test_start, test_start + test_bars)})
+    if not folds:
+        raise ValueError(f"{n_bars} bars are too few for {train_bars} train + {test_bars} test bars")
+    return folds
+
+
+def purged_kfold_splits(n_bars, n_folds=5, purge=0, embargo=EMBARGO_BARS):
+    """
+    K contiguous test blocks; each trains on the bars outside its block, less
+    `purge` bars before it and `embargo` bars after it.
+    """
+    if not 2 <= n_folds <= n_bars // 2:
+        raise ValueError(f"n_folds must be between 2 and {n_bars // 2}, got {n_folds}")
+    bounds = np.linspace(0, n_bars, n_folds + 1).astype(int)
+    folds = []
+    for i, (test_start, test_stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        segments = [(0, int(test_start) - purge), (int(test_stop) + embargo, n_bars)]
+        folds.append({'fold': i, 'train': [(a, b) for a, b in segments if b - a >= 2],
+                      'test': (int(test_start), int(test_stop))})
+    if any(not fold['train'] for fold in folds):
+        raise ValueError("purge and embargo leave a fold without train bars")
+    return folds
+
+
+def run_segments(df, scores, segments, backtest_params):
+    """
+    Backtests each (start, stop) bar range of df on its own and chains the
+    equity curves, so the metrics cover the segments as one account.
+    Slices are views: nothing is recomputed per segment.
+    """
+    parts, trades = [], 0
+    for start, stop in segments:
+        backtester = Backtester(df.iloc[start:stop], copy=False)
+        results, metrics = backtester.run_backtest(scores=scores[start:stop], lean=True, **backtest_params)
+        if len(segments) == 1:
+            return metrics
+        parts.append((results, backtester.trades))
+        trades += metrics['total_trades']
+
+    equity, market, ledgers, returns = [], [], [], []
+    balance, market_level = backtester.initial_balance, 1.0
+    for results, ledger in parts:
+        scale = balance / backtester.initial_balance
+        equity.append(results['equity_curve'].to_numpy() * scale)
+        market.append(results['cum_market_returns'].to_numpy() * market_level)
+        # Each segment started from initial_balance: rescale its cash amounts
+        ledger = ledger.copy()
+        ledger['pnl'] *= scale
+        ledger['fees'] *= scale
+        ledgers.append(ledger)
+        returns.append(results['strategy_returns'].to_numpy())
+        balance, market_level = equity[-1][-1], market[-1][-1]
+    equity = np.concatenate(equity)
+    peak = np.maximum.accumulate(equity)
+    return backtester._metrics(equity, np.concatenate(ledgers), np.concatenate(returns),
+                               np.concatenate(market), (equity - peak) / peak, trades)
+
+
+def _period(index, start, stop):
+    return [index[start].isoformat(), index[stop - 1].isoformat()]
+
+
+def evaluate_folds(descriptor, folds, candidates, rank_by='total_return_pct'):
+    """
+    Worker entry point: for each fold, picks the candidate with the best
+    `rank_by` on the train bars and backtests it on the unseen test bars.
+    Indicators and signals cover the whole shared frame once; folds only slice them.
+    """
+    df = attach_frame(descriptor)
+    scorer = attach_scorer(descriptor)
+    weighted = [i for i, c in enumerate(candidates) if c.get('weights')]
+    batch = dict(zip(weighted, scorer.score_batch([candidates[i]['weights'] for i in weighted]))) if weighted else {}
+    # Candidates without weights use each bar's regime weights
+    scores = [batch[i] if i in batch else scorer.score() for i in range(len(candidates))]
+
+    results = []
+    for fold in folds:
+        in_sample = [run_segments(df, s, fold['train'], c.get('backtest', {})) for s, c in zip(scores, candidates)]
+        best = max(range(len(candidates)), key=lambda i: in_sample[i][rank_by])
+        out_of_sample = run_segments(df, scores[best], [fold['test']], candidates[best].get('backtest', {}))
+        results.append({
+            **fold,
+            'train_period': [_period(df.index, a, b) for a, b in fold['train']],
+            'test_period': _period(df.index, *fold['test']),
+            'best': candidates[best],
+            'in_sample': {k: float(v) for k, v in in_sample[best].items()},
+            'out_of_sample': {k: float(v) for k, v in out_of_sample.items()}
+        })
+    return results
+
+
+def summarize_folds(folds, rank_by='total_return_pct'):
+    """
+    Aggregate out-of-sample view of fold results: mean in/out-of-sample
+    `rank_by`, the chained out-of-sample return and walk-forward efficiency
+    (out-of-sample over in-sample return).
+    """
+    if not folds:
+        return None
+    oos = np.array([f['out_of_sample']['total_return_pct'] for f in folds])
+    ins = np.array([f['in_sample']['total_return_pct'] for f in folds])
+    return {
+        "folds": len(folds),
+        "rank_by": rank_by,
+        "mean_in_sample": round(float(np.mean([f['in_sample'][rank_by] for f in folds])), 2),
+        "mean_out_of_sample": round(float(np.mean([f['out_of_sample'][rank_by] for f in folds])), 2),
+        "chained_out_of_sample_return_pct": round(float((np.prod(1 + oos / 100) - 1) * 100), 2),
+        "profitable_folds_pct": round(float(np.mean(oos > 0) * 100), 2),
+        "walk_forward_efficiency": round(float(oos.mean() / ins.mean()), 3) if ins.mean() > 0 else None
+    }
+
+
+class ValidationJob(OptimizerJob):
+    """
+    Walk-forward or purged k-fold optimization: one pool task per fold.
+    """
+    def __init__(self, folds, candidates, rank_by='total_return_pct', method='rolling'):
+        super().__init__(folds, rank_by)
+        self.folds = folds
+        self.candidates = candidates
+        self.method = method
+
+    def tasks(self):
+        return [(evaluate_folds, ([fold], self.candidates, self.rank_by), [fold]) for fold in self.folds]
+
+    def snapshot(self, top=None):
+        folds = sorted(self.results, key=lambda r: r['fold'])
+        return {
+            "job_id": self.id,
+            "method": self.method,
+            "status": self.status,
+            "completed": len(self.results) + len(self.errors),
+            "total": self.total,
+            "candidates": len(self.candidates),
+            "elapsed_sec": round((self.finished_at or time.time()) - self.created_at, 3),
+            "out_of_sample": summarize_folds(folds, self.rank_by),
+            "folds": folds[:top] if top is not None else folds,
+            "errors": self.errors[:10]
+        }
@@ -1,25 +1,155 @@
 
 import ccxt.async_support as ccxt
+import numpy as np
 import pandas as pd
 import asyncio
 import os
+import time
 from datetime import datetime
 import logging
 
+try:
+    from .storage import OHLCVStore
+except ImportError: # Executed as a script
+    from storage import OHLCVStore
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 
+# Raised by ccxt on HTTP 429/418 and similar throttling responses
+THROTTLE_ERRORS = (ccxt.RateLimitExceeded, ccxt.DDoSProtection)
+
+class TokenBucket:
+    """
+    Async token-bucket limiter shared by every request against one exchange.
+    `rate` is the request-weight budget per second, `capacity` the allowed burst.
+    A throttling response halves the rate and pauses all callers; each success
+    restores a little of the rate (AIMD).
+    """
+    def __init__(self, rate, capacity=None, base_backoff=1.0, max_backoff=60.0):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, weight=1):
+        # Waiters are served in arrival order while holding the lock
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                await asyncio.sleep((weight - self.tokens) / self.rate)
+
+    def backoff(self, attempt):
+        """
+        Records a throttling response and returns how long callers are paused.
+        """
+        delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+        self.throttled += 1
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+        self.tokens = 0.0
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def recover(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def find_gaps(timestamps_ms, timeframe_ms):
+    """
+    Returns the missing stretches of a sorted candle series as half-open
+    (first missing ms, next present ms) ranges.
+    """
+    ts = np.asarray(timestamps_ms, dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(ts) > timeframe_ms)
+    return [(int(ts[i]) + timeframe_ms, int(ts[i + 1])) for i in breaks]
+
 class DataLoader:
-    def __init__(self, exchange_id='binance', symbol='BTC/USDT', timeframe='4h'):
+    def __init__(self, exchange_id='binance', symbol='BTC/USDT', timeframe='4h', exchange=None, data_dir=DATA_DIR,
+                 limiter: TokenBucket = None, request_weight=1, max_retries=5):
         self.exchange_id = exchange_id
         self.symbol = symbol
         self.timeframe = timeframe
-        self.exchange = getattr(ccxt, exchange_id)({'enableRateLimit': True})
-        os.makedirs(DATA_DIR, exist_ok=True)
+        # An injected exchange belongs to the caller and is left open
+        self._owns_exchange = exchange is None
+        self.exchange = exchange if exchange is not None else getattr(ccxt, exchange_id)({'enableRateLimit': True})
+        self.store = OHLCVStore(data_dir)
+        self.limiter = limiter
+        self.request_weight = request_weight
+        self.max_retries = max_retries
+        os.makedirs(data_dir, exist_ok=True)
+
+    async def close(self):
+        if self._owns_exchange:
+            await self.exchange.close()
+
+    async def _fetch_page(self, since, limit):
+        if self.limiter is None:
+            ohlcv = await self.exchange.fetch_ohlcv(self.symbol, self.timeframe, since=since, limit=limit)
+            # Rate limit sleep (basic)
+            await asyncio.sleep(self.exchange.rateLimit / 1000)
+            return ohlcv
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(self.request_weight)
+            try:
+                ohlcv = await self.exchange.fetch_ohlcv(self.symbol, self.timeframe, since=since, limit=limit)
+            except THROTTLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.limiter.backoff(attempt)
+                logger.warning(f"Throttled on {self.symbol} {self.timeframe} ({e}); backing off {delay:.1f}s")
+                continue
+            self.limiter.recover()
+            return ohlcv
+
+    async def _fetch_range(self, since, until, limit=1000):
+        """
+        Pages fetch_ohlcv over [since, until) and returns the raw candles.
+        """
+        rows = []
+        current_since = since
+        while current_since < until:
+            ohlcv = await self._fetch_page(current_since, limit)
+            if not ohlcv:
+                break
 
+            rows.extend(candle for candle in ohlcv if candle[0] < until)
+            current_since = ohlcv[-1][0] + 1 # Move to next timestamp
+
+            if len(ohlcv) < limit: # Reached end of data
+                break
+        return rows
+
+    @staticmethod
+    def _to_frame(rows):
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df.set_index('timestamp', inplace=True)
+
+        # Remove duplicates just in case
+        return df[~df.index.duplicated(keep='last')].sort_index()
 
     async def fetch_data(self, limit=1000, since=None, years=4):
         """
@@ -29,61 +159,130 @@ class DataLoader:
             # Calculate start time if 'since' is not provided
             if since is None:
                 since = self.exchange.milliseconds() - (years * 365 * 24 * 60 * 60 * 1000)
-            
-            all_ohlcv = []
-            current_since = since
-            now = self.exchange.milliseconds()
-            
-            logger.info(f"Fetching {self.timeframe} data for {self.symbol} starting from {datetime.fromtimestamp(current_since/1000)}...")
-            
-            while current_since < now:
-                ohlcv = await self.exchange.fetch_ohlcv(self.symbol, self.timeframe, since=current_since, limit=limit)
-                if not ohlcv:
-                    break
-                
-                all_ohlcv.extend(ohlcv)
-                current_since = ohlcv[-1][0] + 1 # Move to next timestamp
-                
-                # Rate limit sleep (basic)
-                await asyncio.sleep(self.exchange.rateLimit / 1000)
-                
-                if len(ohlcv) < limit: # Reached end of data
-                    break
-
-            if not all_ohlcv:
+
+            logger.info(f"Fetching {self.timeframe} data for {self.symbol} starting from {datetime.fromtimestamp(since/1000)}...")
+            df = self._to_frame(await self._fetch_range(since, self.exchange.milliseconds(), limit))
+            if df.empty:
                 logger.warning("No data returned from exchange.")
-                return pd.DataFrame()
-
-            df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            
-            # Remove duplicates just in case
-            df = df[~df.index.duplicated(keep='first')]
-            
+                return df
+
             logger.info(f"Fetched {len(df)} rows for {self.timeframe}.")
             return df
         except Exception as e:
             logger.error(f"Error fetching data: {e}")
             return pd.DataFrame()
         finally:
+            await self.close()
+
+    async def sync(self, limit=1000, years=4, backfill_gaps=True):
+        """
+        Brings the stored series up to date by fetching only what is missing:
+        the tail from the last stored candle onwards (it is re-fetched, since it
+        may have been stored while still open) and any interior gaps.
+        Falls back to a full `years` fetch when nothing is stored yet.
+        Returns the merged series.
+        """
+        rows, stored = [], None
+        try:
+            step = self.exchange.parse_timeframe(self.timeframe) * 1000
+            now = self.exchange.milliseconds()
+            try:
+                stored = self.store.load(self.store_symbol, self.timeframe)
+            except FileNotFoundError:
+                pass
+
+            if stored is None or stored.empty:
+                ranges = [(now - years * 365 * 24 * 60 * 60 * 1000, now)]
+            else:
+                ts = np.asarray(stored.index, dtype='datetime64[ms]').view(np.int64)
+                # Stretches the exchange itself has no candles for cost one call each per sync
+                ranges = find_gaps(ts, step) if backfill_gaps else []
+                ranges.append((int(ts[-1]), now))
+
+            for since, until in ranges:
+                logger.info(f"Syncing {self.symbol} {self.timeframe} from {datetime.fromtimestamp(since/1000)}...")
+                rows.extend(await self._fetch_range(since, until, limit))
+        except Exception as e:
+            # Keep whatever was fetched; the next sync backfills the remainder as a gap
+            logger.error(f"Error syncing data: {e}")
+        finally:
+            await self.close()
+
+        df = self._to_frame(rows)
+        if df.empty:
+            logger.info(f"{self.symbol} {self.timeframe} is up to date.")
+            return stored if stored is not None else df
+
+        merged = self.store.append(self.store_symbol, self.timeframe, df)
+        logger.info(f"Synced {len(df)} rows for {self.timeframe}; {len(merged)} stored.")
+        return merged
+
+    @property
+    def store_symbol(self):
+        return self.symbol.replace('/', '')
+
+    def save_data(self, df: pd.DataFrame, export_csv: bool = False):
+        """
+        Writes the candles to the binary store; CSV export is optional.
+        """
+        self.store.write(self.store_symbol, self.timeframe, df)
+        logger.info(f"Data saved to {self.store.path(self.store_symbol, self.timeframe)}")
+        if export_csv:
+            self.store.export_csv(self.store_symbol, self.timeframe)
+
+class FetchScheduler:
+    """
+    Syncs many (symbol, timeframe) series concurrently over one shared exchange
+    client. All requests draw from a single TokenBucket sized to the exchange's
+    request-weight budget, so adding pairs never exceeds it.
+    """
+    def __init__(self, exchange_id='binance', exchange=None, weight_per_minute=None, request_weight=1,
+                 max_concurrency=8, data_dir=DATA_DIR):
+        self._owns_exchange = exchange is None
+        # The bucket does the throttling, so ccxt's own per-request sleep is disabled
+        self.exchange = exchange if exchange is not None else getattr(ccxt, exchange_id)({'enableRateLimit': False})
+        if weight_per_minute is None:
+            weight_per_minute = 60000 / max(self.exchange.rateLimit, 1)
+        self.limiter = TokenBucket(weight_per_minute / 60)
+        self.request_weight = request_weight
+        self.max_concurrency = max_concurrency
+        self.data_dir = data_dir
+
+    async def _sync_one(self, semaphore, symbol, timeframe, **kwargs):
+        async with semaphore:
+            loader = DataLoader(symbol=symbol, timeframe=timeframe, exchange=self.exchange, data_dir=self.data_dir,
+                                limiter=self.limiter, request_weight=self.request_weight)
+            return await loader.sync(**kwargs)
+
+    async def run(self, jobs, **kwargs):
+        """
+        Syncs every (symbol, timeframe) in `jobs`; extra kwargs go to DataLoader.sync.
+        Returns {(symbol, timeframe): DataFrame or the exception it raised}.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        jobs = list(jobs)
+        results = await asyncio.gather(*(self._sync_one(semaphore, symbol, tf, **kwargs) for symbol, tf in jobs),
+                                       return_exceptions=True)
+        return dict(zip(jobs, results))
+
+    async def close(self):
+        if self._owns_exchange:
             await self.exchange.close()
 
-    def save_data(self, df: pd.DataFrame, filename: str = None):
-        if filename is None:
-            filename = f"{self.symbol.replace('/', '')}_{self.timeframe}.csv"
-        filepath = os.path.join(DATA_DIR, filename)
-        df.to_csv(filepath)
-        logger.info(f"Data saved to {filepath}")
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
 
 async def main():
-    timeframes = ['4h', '2h', '1h']
-    for tf in timeframes:
-        loader = DataLoader(timeframe=tf)
-        df = await loader.fetch_data(years=4)
-        if not df.empty:
-            loader.save_data(df)
-            print(f"[{tf}] Head: {df.index[0]}, Tail: {df.index[-1]}, Count: {len(df)}")
+    # Higher timeframes are derived from 1h (see timeframes.py)
+    jobs = [('BTC/USDT', '1h')]
+    async with FetchScheduler() as scheduler:
+        results = await scheduler.run(jobs, years=4)
+    for (symbol, tf), df in results.items():
+        if isinstance(df, pd.DataFrame) and not df.empty:
+            print(f"[{symbol} {tf}] Head: {df.index[0]}, Tail: {df.index[-1]}, Count: {len(df)}")
 
 if __name__ == "__main__":
     asyncio.run(main())
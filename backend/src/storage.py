@@ -0,0 +1,111 @@
+import os
+import uuid
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Row layout of a stored series: timestamp (int64 epoch ns, stored bit-for-bit) + OHLCV
+STORE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+OHLCV_COLUMNS = STORE_COLUMNS[1:]
+
+
+class OHLCVStore:
+    """
+    Columnar binary storage for OHLCV series.
+    Each (symbol, timeframe) is one .npy file holding a (6 x N) float64 matrix:
+    row 0 is the int64 epoch-ns index, rows 1-5 are open/high/low/close/volume.
+    Reads are memory-mapped, so loading is zero-copy and involves no date parsing.
+    CSV is kept only as an import/export format.
+    """
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.data_dir, f"{symbol}_{timeframe}.npy")
+
+    def csv_path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.data_dir, f"{symbol}_{timeframe}.csv")
+
+    def exists(self, symbol: str, timeframe: str) -> bool:
+        return os.path.exists(self.path(symbol, timeframe))
+
+    def version(self, symbol: str, timeframe: str):
+        """
+        Cheap identity of the stored data: (mtime_ns, size). Changes on every write.
+        """
+        st = os.stat(self.path(symbol, timeframe))
+        return (st.st_mtime_ns, st.st_size)
+
+    def write(self, symbol: str, timeframe: str, df: pd.DataFrame):
+        """
+        Atomically replaces the stored series with `df` (DatetimeIndex + OHLCV columns).
+        """
+        block = np.empty((len(STORE_COLUMNS), len(df)), dtype=np.float64)
+        block[0].view(np.int64)[:] = np.asarray(df.index, dtype='datetime64[ns]').view(np.int64)
+        for i, col in enumerate(OHLCV_COLUMNS, start=1):
+            block[i] = df[col].to_numpy(dtype=np.float64)
+
+        os.makedirs(self.data_dir, exist_ok=True)
+        target = self.path(symbol, timeframe)
+        tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                np.save(f, block)
+                f.flush()
+                os.fsync(f.fileno())
+            # Readers holding a mapping of the old file keep a valid view
+            os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merges `df` into the stored series (new rows win on equal timestamps) and
+        writes the result atomically. Returns the merged series.
+        """
+        if self.exists(symbol, timeframe):
+            stored = self.read(symbol, timeframe, mmap=False)
+            merged = pd.concat([stored, df[OHLCV_COLUMNS]])
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        else:
+            merged = df[OHLCV_COLUMNS].sort_index()
+        self.write(symbol, timeframe, merged)
+        return merged
+
+    def read(self, symbol: str, timeframe: str, mmap: bool = True) -> pd.DataFrame:
+        """
+        Returns the stored series as a DataFrame backed by the (read-only) file mapping.
+        """
+        block = np.load(self.path(symbol, timeframe), mmap_mode='r' if mmap else None)
+        index = pd.DatetimeIndex(block[0].view('datetime64[ns]'), name='timestamp')
+        # block[1:].T is F-contiguous, which pandas keeps as a single block without copying
+        return pd.DataFrame(block[1:].T, index=index, columns=OHLCV_COLUMNS, copy=False)
+
+    def load(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        """
+        Reads a series, importing its CSV first if the binary copy is missing or older.
+        Raises FileNotFoundError when neither exists.
+        """
+        csv_path = self.csv_path(symbol, timeframe)
+        if os.path.exists(csv_path):
+            if not self.exists(symbol, timeframe) or \
+               os.path.getmtime(csv_path) > os.path.getmtime(self.path(symbol, timeframe)):
+                self.import_csv(csv_path, symbol, timeframe)
+        if not self.exists(symbol, timeframe):
+            raise FileNotFoundError(f"No data stored for {symbol} {timeframe}")
+        return self.read(symbol, timeframe)
+
+    def import_csv(self, csv_path: str, symbol: str, timeframe: str):
+        df = pd.read_csv(csv_path, index_col='timestamp', parse_dates=True)
+        self.write(symbol, timeframe, df)
+        logger.info(f"Imported {len(df)} rows from {csv_path}")
+
+    def export_csv(self, symbol: str, timeframe: str, csv_path: str = None):
+        csv_path = csv_path or self.csv_path(symbol, timeframe)
+        self.read(symbol, timeframe).to_csv(csv_path)
+        logger.info(f"Exported {symbol} {timeframe} to {csv_path}")
+        return csv_path
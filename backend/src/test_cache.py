@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.cache import FrameCache
+
+def _frame(rows):
+    return pd.DataFrame({'close': np.arange(rows, dtype=np.float64)})
+
+def test_frame_cache():
+    nbytes = int(_frame(1000).memory_usage(index=True, deep=False).sum())
+    cache = FrameCache(max_bytes=nbytes * 2)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return _frame(1000)
+
+    # Single flight: concurrent misses on one key compute once
+    threads = [threading.Thread(target=cache.get_or_compute, args=(('BTCUSDT', '4h', 1), compute))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats['misses'] == 1 and stats['hits'] == 7
+
+    # Callers get their own shallow copy
+    df = cache.get_or_compute(('BTCUSDT', '4h', 1), compute)
+    df['unum_score'] = 0.0
+    assert 'unum_score' not in cache.get_or_compute(('BTCUSDT', '4h', 1), compute).columns
+
+    # A new data version replaces the old entry of the same group
+    cache.clear()
+    cache.get_or_compute(('BTCUSDT', '4h', 1), compute, group=('BTCUSDT', '4h'))
+    cache.get_or_compute(('BTCUSDT', '4h', 2), compute, group=('BTCUSDT', '4h'))
+    assert cache.stats()['entries'] == 1
+
+    # LRU eviction under the memory budget
+    cache.get_or_compute(('BTCUSDT', '1h', 1), compute)
+    cache.get_or_compute(('BTCUSDT', '4h', 2), compute)
+    cache.get_or_compute(('BTCUSDT', '2h', 1), compute)
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['evictions'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+    print(stats)
+
+if __name__ == "__main__":
+    test_frame_cache()
@@ -0,0 +1,100 @@
+import sys
+import os
+import asyncio
+import tempfile
+import numpy as np
+import pandas as pd
+import ccxt.async_support as ccxt
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data_loader import DataLoader, FetchScheduler, find_gaps
+
+class FakeExchange:
+    """
+    Minimal stand-in for a ccxt async exchange serving candles from a DataFrame.
+    """
+    rateLimit = 0
+
+    def __init__(self, df):
+        self.ts = np.asarray(df.index, dtype='datetime64[ms]').view(np.int64)
+        self.rows = df[['open', 'high', 'low', 'close', 'volume']].to_numpy()
+        self.calls = 0
+        self.closed = False
+        self.throttle_next = 0
+
+    def milliseconds(self):
+        return int(self.ts[-1]) + 1
+
+    def parse_timeframe(self, timeframe):
+        return {'1h': 3600, '2h': 7200, '4h': 14400}[timeframe]
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+        self.calls += 1
+        if self.throttle_next:
+            self.throttle_next -= 1
+            raise ccxt.RateLimitExceeded('429 Too Many Requests')
+        start = np.searchsorted(self.ts, since)
+        return [[int(t), *row] for t, row in zip(self.ts[start:start + limit], self.rows[start:start + limit])]
+
+    async def close(self):
+        self.closed = True
+
+def test_incremental_sync():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    df = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_4h.csv'), index_col='timestamp', parse_dates=True)
+    df = df[['open', 'high', 'low', 'close', 'volume']]
+    exchange = FakeExchange(df)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stored copy is missing a 30-bar stretch and the last 200 bars; its last candle is stale
+        stale = pd.concat([df.iloc[:500], df.iloc[530:-200]])
+        stale.iloc[-1, stale.columns.get_loc('close')] = -1.0
+        loader = DataLoader(timeframe='4h', exchange=exchange, data_dir=tmp)
+        loader.store.write(loader.store_symbol, '4h', stale)
+
+        assert find_gaps(np.asarray(stale.index, dtype='datetime64[ms]').view(np.int64), 4 * 3600 * 1000) == \
+            [(int(df.index[500].value // 10**6), int(df.index[530].value // 10**6))]
+
+        synced = asyncio.run(loader.sync(limit=100))
+        stored = loader.store.read(loader.store_symbol, '4h')
+        assert (stored.index == df.index).all()
+        np.testing.assert_array_equal(stored.to_numpy(), df.to_numpy())
+        assert len(synced) == len(df)
+        # One page for the gap, three for the 201-bar tail; the injected exchange stays open
+        assert exchange.calls == 4
+        assert not exchange.closed
+
+        # Already up to date: only the last candle is re-fetched
+        exchange.calls = 0
+        asyncio.run(loader.sync(limit=100))
+        assert exchange.calls == 1
+    print(f"Synced {len(df)} rows.")
+
+def test_scheduler_shared_exchange():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    df = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_4h.csv'), index_col='timestamp', parse_dates=True)
+    exchange = FakeExchange(df.iloc[:1000])
+    exchange.throttle_next = 3
+    jobs = [(symbol, '4h') for symbol in ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'XRP/USDT']]
+
+    async def run(tmp):
+        async with FetchScheduler(exchange=exchange, max_concurrency=4, data_dir=tmp) as scheduler:
+            scheduler.limiter.base_backoff = 0.01
+            results = await scheduler.run(jobs, limit=250, years=10)
+        return scheduler, results
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler, results = asyncio.run(run(tmp))
+        # Every series fetched in full over the one client, despite the 429s
+        assert all(len(results[job]) == 1000 for job in jobs)
+        assert set(os.listdir(tmp)) == {'BTCUSDT_4h.npy', 'ETHUSDT_4h.npy', 'SOLUSDT_4h.npy', 'XRPUSDT_4h.npy'}
+        assert scheduler.limiter.throttled == 3
+        assert exchange.calls == 4 * 4 + 3
+        assert not exchange.closed
+    print(f"Synced {len(jobs)} series with {exchange.calls} calls.")
+
+if __name__ == "__main__":
+    test_incremental_sync()
+    test_scheduler_shared_exchange()
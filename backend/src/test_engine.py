@@ -0,0 +1,113 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.backtest import Backtester
+from src.core.engine import ENGINES, EXIT_REASONS
+from src.core.periods import sub_bar_ranges
+from src.testing import load_frame
+
+PARAM_SETS = [
+    dict(long_threshold=0.6, short_threshold=-0.6, sl_pct=0.02, tp_pct=0.04, trailing_sl_pct=0.015),
+    dict(long_threshold=0.2, short_threshold=-0.2, sl_pct=0.01, tp_pct=0.02, trailing_sl_pct=0.005),
+    dict(long_threshold=0.05, short_threshold=-0.05, sl_pct=0.05, tp_pct=0.1, trailing_sl_pct=0.03,
+         skip_weekends=False),
+    dict(long_threshold=0.1, short_threshold=-0.1, sl_pct=0.015, tp_pct=0.03, trailing_sl_pct=0.015,
+         allowed_sessions=['asian', 'american']),
+]
+
+def test_engine_parity():
+    for timeframe in ['4h', '1h']:
+        df = load_frame(timeframe, scored=True)
+        for params in PARAM_SETS:
+            reference = Backtester(df)
+            ref_df, ref_metrics = reference.run_backtest(engine='python', **params)
+            for name in ENGINES:
+                if name == 'python':
+                    continue
+                backtester = Backtester(df)
+                res_df, metrics = backtester.run_backtest(engine=name, **params)
+                assert np.array_equal(backtester.trades, reference.trades), (timeframe, name, params)
+                # Bit-identical equity curves, positions and trade counts
+                assert np.array_equal(res_df['equity_curve'].values, ref_df['equity_curve'].values), (timeframe, name, params)
+                assert np.array_equal(res_df['signal'].values, ref_df['signal'].values), (timeframe, name, params)
+                assert metrics == ref_metrics, (timeframe, name, params)
+            print(f"[{timeframe}] {params}: {ref_metrics['total_trades']} trades, engines {sorted(ENGINES)} match")
+
+def test_intrabar_fills():
+    # Long entry at 100 on bar 1; bar 2 wicks through both the 2% stop (98) and the 4% target (104)
+    index = pd.date_range('2024-01-01', periods=3, freq='4h')
+    bars = pd.DataFrame({'open': [100, 100, 100], 'high': [100, 100, 105], 'low': [100, 100, 97],
+                         'close': [100, 100, 101]}, index=index, dtype=np.float64)
+    scores = np.array([0.0, 1.0, 0.0])
+    params = dict(long_threshold=0.5, short_threshold=-0.5, sl_pct=0.02, tp_pct=0.04, trailing_sl_pct=0.5,
+                  skip_weekends=False, lean=True, scores=scores)
+    backtester = Backtester(bars, fee=0.0, copy=False)
+
+    # Close prices never reach either level
+    results, metrics = backtester.run_backtest(**params)
+    assert metrics['total_trades'] == 1 and results['signal'].iloc[-1] == 1
+    # Order unknown within the bar: the stop is assumed first
+    results, metrics = backtester.run_backtest(execution='intrabar', **params)
+    assert metrics['total_trades'] == 2 and results['equity_curve'].iloc[-1] == 9800
+    # The 1h candles show the target was hit first
+    sub_bars = pd.DataFrame({'open': [100, 101, 104.5, 99], 'high': [102, 105, 104.5, 101],
+                             'low': [100, 100.5, 98, 97], 'close': [101, 104.5, 99, 101]},
+                            index=pd.date_range(index[2], periods=4, freq='1h'))
+    assert [list(r) for r in sub_bar_ranges(index, sub_bars.index)] == [[0, 0, 0], [0, 0, 4]]
+    results, metrics = backtester.run_backtest(execution='intrabar', sub_bars=sub_bars, **params)
+    assert metrics['total_trades'] == 2 and results['equity_curve'].iloc[-1] == 10400
+    assert backtester.trades_frame()['exit_reason'].tolist() == ['take_profit']
+
+def test_trade_ledger():
+    df = load_frame('4h', scored=True)
+    backtester = Backtester(df)
+    results, metrics = backtester.run_backtest(**PARAM_SETS[1])
+    trades = backtester.trades
+    assert 2 * len(trades) - (trades['exit_reason'][-1] == 0) == metrics['total_trades']
+    # Trade PnL adds up to the equity curve's final balance
+    np.testing.assert_allclose(10000 + trades['pnl'].sum(), results['equity_curve'].iloc[-1], rtol=1e-9)
+    assert (trades['fees'] > 0).all() and (trades['mae_pct'] <= 0).all() and (trades['mfe_pct'] >= 0).all()
+    assert (trades['exit_time'] > trades['entry_time']).all()
+    assert (trades['entry_time'][1:] >= trades['exit_time'][:-1]).all()
+    # Positions held between entry and exit
+    signal = results['signal'].to_numpy()
+    for trade in trades[:50]:
+        entry, held = df.index.get_loc(trade['entry_time']), trade['bars_held']
+        assert (signal[entry:entry + held] == trade['side']).all()
+
+    closed = trades[trades['exit_reason'] != 0]
+    wins, losses = closed['pnl'][closed['pnl'] > 0], closed['pnl'][closed['pnl'] < 0]
+    assert metrics['closed_trades'] == len(closed)
+    assert metrics['win_rate_pct'] == round(len(wins) / len(closed) * 100, 2)
+    assert metrics['profit_factor'] == round(wins.sum() / -losses.sum(), 2)
+    assert metrics['expectancy_pct'] == round(closed['return_pct'].mean(), 3)
+    reasons = backtester.trades_frame()['exit_reason']
+    assert set(reasons) <= set(EXIT_REASONS)
+    print(f"Ledger: {len(trades)} trades, {reasons.value_counts().to_dict()}, profit factor {metrics['profit_factor']}")
+
+def test_intrabar_engines():
+    df = load_frame('4h', scored=True)
+    hourly = load_frame('1h', indicators=False)
+    for params in PARAM_SETS:
+        _, close_metrics = Backtester(df).run_backtest(**params)
+        for sub_bars in (None, hourly):
+            reference, backtester = Backtester(df), Backtester(df)
+            ref_df, ref_metrics = reference.run_backtest(engine='python', execution='intrabar', sub_bars=sub_bars, **params)
+            res_df, metrics = backtester.run_backtest(engine='numba', execution='intrabar', sub_bars=sub_bars, **params)
+            assert np.array_equal(res_df['equity_curve'].values, ref_df['equity_curve'].values), params
+            assert np.array_equal(backtester.trades, reference.trades), params
+            assert metrics == ref_metrics
+            # Wicks trigger exits the closes never show
+            assert metrics['total_trades'] >= close_metrics['total_trades']
+        print(f"{params}: close {close_metrics['total_trades']} trades, intrabar {metrics['total_trades']}")
+
+if __name__ == "__main__":
+    test_engine_parity()
+    test_intrabar_fills()
+    test_trade_ledger()
+    test_intrabar_engines()
@@ -0,0 +1,57 @@
+import sys
+import os
+import time
+import asyncio
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import HTTPException
+from src.api.executors import ExecutionLayer
+
+def test_execution_layer_limits():
+    layer = ExecutionLayer(cpu_workers=4)
+    layer.register("slow", limit=2, timeout=0.5, max_queue=3)
+    active, peak = [0], [0]
+
+    def work(seconds):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        time.sleep(seconds)
+        active[0] -= 1
+        return seconds
+
+    async def call(seconds):
+        try:
+            return await layer.run("slow", work, seconds)
+        except HTTPException as e:
+            return e.status_code
+
+    async def main():
+        # The loop keeps ticking while blocking work runs in the pool
+        ticks = 0
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        beat = asyncio.create_task(heartbeat())
+
+        ok = await asyncio.gather(*(call(0.1) for _ in range(4)))
+        # 2 running + 3 queued; the sixth is rejected, the slow ones time out
+        crowded = await asyncio.gather(*(call(1.0) for _ in range(6)))
+        beat.cancel()
+        return ok, crowded, ticks
+
+    ok, crowded, ticks = asyncio.run(main())
+    assert ok == [0.1] * 4
+    assert peak[0] == 2
+    assert sorted(crowded) == [503, 503, 503, 503, 504, 504]
+    assert ticks > 50
+    stats = layer.stats()["slow"]
+    assert stats["completed"] == 4 and stats["rejected"] == 1 and stats["timeouts"] == 5
+    layer.shutdown()
+    print(stats)
+
+if __name__ == "__main__":
+    test_execution_layer_limits()
@@ -1,11 +1,12 @@
 
 import sys
 import os
+import numpy as np
 import pandas as pd
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.core.indicators import Indicators
+from src.core.indicators import Indicators, FIB_BOUNCE_LEVELS
 
 def test_indicators():
     # Load 4h data
@@ -32,5 +33,36 @@ def test_indicators():
     else:
         print("SMA_20 missing.")
 
+def _fib_reference(df, tolerance):
+    # The per-level loop SignalAggregator used before check_fib_interaction
+    tol = df['close'] * tolerance
+    bull = np.zeros(len(df))
+    bear = np.zeros(len(df))
+    for level in FIB_BOUNCE_LEVELS:
+        touched = (df['low'] <= df[level] + tol) & (df['low'] >= df[level] - tol)
+        bull = np.where(touched & (df['close'] > df[level]), 1, bull)
+        touched_upper = (df['high'] >= df[level] - tol) & (df['high'] <= df[level] + tol)
+        bear = np.where(touched_upper & (df['close'] < df[level]), -1, bear)
+    return np.where(bull != 0, bull, bear)
+
+def test_fib_interaction():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    df = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_4h.csv'), index_col='timestamp', parse_dates=True)
+    indicators = Indicators(df)
+    df = indicators.add_all_indicators()
+
+    for tolerance in (0.005, 0.03):
+        signal = indicators.check_fib_interaction(tolerance=tolerance)
+        assert signal.dtype == np.int8
+        np.testing.assert_array_equal(signal, _fib_reference(df, tolerance))
+
+    # A touch stays valid for `lookback` bars
+    base = indicators.check_fib_interaction()
+    wide = indicators.check_fib_interaction(lookback=3)
+    assert (wide != 0).sum() > (base != 0).sum()
+    assert np.all(wide[base == 1] == 1)
+    print(f"Fib interaction: {(base == 1).sum()} bounces, {(base == -1).sum()} rejections over {len(df)} bars.")
+
 if __name__ == "__main__":
     test_indicators()
+    test_fib_interaction()
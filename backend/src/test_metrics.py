@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.backtest import Backtester
+from src.core.metrics import rolling_metrics, sliding_max_drawdown, drawdown_duration
+from src.core.periods import periods_per_year
+from src.testing import load_frame
+
+PARAMS = dict(sl_pct=0.015, tp_pct=0.03, trailing_sl_pct=0.015)
+
+def _max_drawdown(equity):
+    return (equity / np.maximum.accumulate(equity)).min() - 1
+
+def test_sliding_max_drawdown():
+    rng = np.random.default_rng(0)
+    equity = 100 * np.cumprod(1 + rng.normal(0, 0.02, 500))
+    for size in (1, 2, 7, 64, 600):
+        expected = [_max_drawdown(equity[max(0, i - size + 1):i + 1]) for i in range(len(equity))]
+        np.testing.assert_allclose(sliding_max_drawdown(equity, size), expected, rtol=1e-12)
+    # A crash before the window does not count: 50 -> 65 only rises
+    equity = np.array([100, 50, 55, 60, 65, 70, 75.0])
+    assert sliding_max_drawdown(equity, 4)[4] == 0
+    assert np.isnan(rolling_metrics(equity, 3, 365)['rolling_calmar'][4])
+    equity = np.array([100, 101, 99, 98, 102, 102, 101, 103.0])
+    assert drawdown_duration(equity).tolist() == [0, 0, 1, 2, 0, 0, 1, 0]
+
+def test_annualization_follows_bar_frequency():
+    for timeframe, bars_per_day in (('4h', 6), ('1h', 24)):
+        df = load_frame(timeframe, scored=True)
+        assert periods_per_year(df.index) == 365 * bars_per_day
+        results, metrics = Backtester(df).run_backtest(**PARAMS)
+        returns = results['strategy_returns'].dropna()
+        expected = returns.mean() / returns.std() * np.sqrt(365 * bars_per_day)
+        assert metrics['sharpe_ratio'] == round(expected, 2), timeframe
+        assert metrics['volatility_pct'] == round(returns.std() * np.sqrt(365 * bars_per_day) * 100, 2)
+        assert metrics['max_drawdown_bars'] == drawdown_duration(results['equity_curve'].to_numpy()).max()
+
+def test_rolling_metrics_match_windows():
+    df = load_frame('4h', scored=True)
+    results, _ = Backtester(df).run_backtest(**PARAMS)
+    equity = results['equity_curve'].to_numpy()
+    window, ppy = 180, periods_per_year(df.index)
+    rolling = rolling_metrics(equity, window, ppy)
+
+    # Reference: every statistic recomputed from scratch on a sample of windows
+    returns = pd.Series(equity).pct_change().to_numpy()
+    assert np.isnan(rolling['rolling_sharpe'][:window]).all()
+    for t in range(window, len(equity), 97):
+        r = returns[t - window + 1:t + 1]
+        assert np.isclose(rolling['rolling_sharpe'][t], r.mean() / r.std(ddof=1) * np.sqrt(ppy), rtol=1e-6, atol=1e-9)
+        assert np.isclose(rolling['rolling_volatility_pct'][t], r.std(ddof=1) * np.sqrt(ppy) * 100, rtol=1e-6)
+        downside = np.sqrt(np.mean(np.minimum(r, 0) ** 2))
+        if downside > 0:
+            assert np.isclose(rolling['rolling_sortino'][t], r.mean() / downside * np.sqrt(ppy), rtol=1e-6)
+        # Calmar: max drawdown of the window's own equity
+        trough = _max_drawdown(equity[t - window:t + 1])
+        if trough < 0:
+            annual = (equity[t] / equity[t - window]) ** (ppy / window) - 1
+            assert np.isclose(rolling['rolling_calmar'][t], annual / -trough, rtol=1e-9)
+
+    start = time.perf_counter()
+    rolling_metrics(np.tile(equity, 20), window, ppy)
+    print(f"Rolling metrics over {20 * len(equity)} bars: {time.perf_counter() - start:.3f}s")
+
+if __name__ == "__main__":
+    test_sliding_max_drawdown()
+    test_annualization_follows_bar_frequency()
+    test_rolling_metrics_match_windows()
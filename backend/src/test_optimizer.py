@@ -0,0 +1,90 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.strategy import SignalAggregator
+from src.core.backtest import Backtester
+from src.core.optimizer import OptimizerPool, OptimizerJob, simplex_weights, weight_candidates
+from src.testing import load_frame
+
+def test_optimizer_pool():
+    df = load_frame()
+
+    backtest_params = {'sl_pct': 0.015, 'tp_pct': 0.03, 'trailing_sl_pct': 0.015}
+    candidates = [
+        {'weights': {'trend': 0.4, 'volume_levels': 0.4, 'momentum': 0.2}, 'backtest': backtest_params},
+        {'weights': {'trend': 0.2, 'volume_levels': 0.4, 'momentum': 0.4}, 'backtest': backtest_params},
+        {'weights': {'trend': 0.6, 'volume_levels': 0.2, 'momentum': 0.2}, 'backtest': backtest_params},
+        {'backtest': backtest_params}, # Regime weights
+    ] + weight_candidates(simplex_weights(0.25), backtest_params)
+
+    pool = OptimizerPool(max_workers=2, chunks_per_worker=2)
+    try:
+        job_id = pool.submit(df, candidates)
+        job = pool.get(job_id)
+        deadline = time.time() + 120
+        while job.status == 'running' and time.time() < deadline:
+            time.sleep(0.2)
+        snapshot = job.snapshot()
+    finally:
+        pool.shutdown()
+
+    assert snapshot['status'] == 'done', snapshot['errors']
+    assert snapshot['completed'] == len(candidates)
+    # Shared block is released once the job finishes
+    assert job.shared is None
+
+    # Same numbers as running each candidate in-process
+    for result in snapshot['results']:
+        df_run = df.copy()
+        SignalAggregator(df_run, custom_weights=result.get('weights')).calculate_unum_score()
+        _, metrics = Backtester(df_run).run_backtest(**result['backtest'])
+        assert result['metrics'] == {k: float(v) for k, v in metrics.items()}
+    print(f"Best weights: {snapshot['best_weights']} ROI: {snapshot['best_roi']}%")
+
+def _crash(descriptor, code):
+    os._exit(code)
+
+def _wait(job, timeout=120):
+    deadline = time.time() + timeout
+    while job.status == 'running' and time.time() < deadline:
+        time.sleep(0.2)
+
+def test_pool_recovers_from_crashed_worker():
+    df = load_frame()
+    candidates = [{'backtest': {'sl_pct': 0.015, 'tp_pct': 0.03, 'trailing_sl_pct': 0.015}}]
+
+    pool = OptimizerPool(max_workers=1)
+    try:
+        # A worker that dies fails its job and breaks the executor...
+        job = OptimizerJob([{}], 'total_return_pct')
+        pool.start(job, df, [(_crash, (1,), [{}])])
+        _wait(job)
+        assert job.status == 'failed' and job.shared is None
+        # ...which the next job replaces
+        job = pool.get(pool.submit(df, candidates))
+        _wait(job)
+        assert job.status == 'done', job.errors
+    finally:
+        pool.shutdown()
+
+def test_simplex_weights():
+    weights = simplex_weights(0.1)
+    assert weights.shape == (66, 3)
+    np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+    assert (weights >= 0).all() and len(np.unique(weights, axis=0)) == 66
+    assert len(simplex_weights(0.5)) == 6
+    try:
+        simplex_weights(0.3)
+        assert False, "0.3 does not divide 1"
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_optimizer_pool()
+    test_pool_recovers_from_crashed_worker()
+    test_simplex_weights()
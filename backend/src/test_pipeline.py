@@ -0,0 +1,56 @@
+import sys
+import os
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.indicators import Indicators
+from src.core.strategy import SignalAggregator
+from src.core.backtest import Backtester
+from src.testing import load_frame
+
+PARAMS = dict(long_threshold=0.2, short_threshold=-0.2, sl_pct=0.01, tp_pct=0.02, trailing_sl_pct=0.005,
+              allowed_sessions=['european', 'american'])
+
+def test_lean_pipeline_matches_legacy():
+    ohlcv = load_frame('4h', indicators=False)
+    df = Indicators(ohlcv, copy=False).add_all_indicators()
+    assert list(ohlcv.columns) == ['open', 'high', 'low', 'close', 'volume'] # Input untouched
+    columns_before = list(df.columns)
+
+    # Legacy: every stage writes into (a copy of) the frame
+    legacy = df.copy(deep=False)
+    SignalAggregator(legacy).calculate_unum_score()
+    ref_df, ref_metrics = Backtester(legacy).run_backtest(**PARAMS)
+
+    # Lean: the frame is only read, each stage returns its own arrays
+    aggregator = SignalAggregator(df, inplace=False)
+    scores = aggregator.calculate_unum_score()
+    results, metrics = Backtester(df, copy=False).run_backtest(scores=scores, lean=True, **PARAMS)
+
+    assert list(df.columns) == columns_before
+    assert metrics == ref_metrics
+    np.testing.assert_array_equal(scores.to_numpy(), legacy['unum_score'].to_numpy())
+    for col in results.columns:
+        np.testing.assert_array_equal(results[col].to_numpy(), ref_df[col].to_numpy(), err_msg=col)
+    assert len(results.columns) < len(ref_df.columns) - len(df.columns)
+    print(f"Lean metrics match legacy: {metrics}")
+
+def test_float32_indicators():
+    ohlcv = load_frame('4h', indicators=False)
+    df64 = Indicators(ohlcv).add_all_indicators()
+    df32 = Indicators(ohlcv, copy=False, dtype=np.float32).add_all_indicators()
+
+    assert df32['close'].dtype == np.float64 # Inputs keep their dtype
+    assert df32['RSI'].dtype == np.float32 and df32['Fib_618'].dtype == np.float32
+    assert df32.memory_usage().sum() < 0.6 * df64.memory_usage().sum()
+    np.testing.assert_allclose(df32['RSI'].to_numpy(), df64['RSI'].to_numpy(), rtol=1e-5)
+
+    scores = SignalAggregator(df32, inplace=False).calculate_unum_score()
+    _, metrics = Backtester(df32, copy=False).run_backtest(scores=scores, lean=True, **PARAMS)
+    print(f"float32 indicators: {df32.memory_usage().sum() / 1e6:.1f} MB vs {df64.memory_usage().sum() / 1e6:.1f} MB, metrics {metrics}")
+
+if __name__ == "__main__":
+    test_lean_pipeline_matches_legacy()
+    test_float32_indicators()
@@ -0,0 +1,98 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.backtest import Backtester
+from src.core.portfolio import PortfolioBacktester, PORTFOLIO_ENGINES, panel
+from src.testing import load_frame
+
+PARAMS = dict(long_threshold=0.2, short_threshold=-0.2, sl_pct=0.015, tp_pct=0.03, trailing_sl_pct=0.015)
+
+def _synthetic_panel(df, n_assets=12, seed=0):
+    # Assets that follow BTC with their own beta and noise; momentum scores
+    rng = np.random.default_rng(seed)
+    log_returns = np.diff(np.log(df['close'].to_numpy()))
+    prices, scores = {}, {}
+    for a in range(n_assets):
+        steps = log_returns * rng.uniform(0.5, 1.5) + rng.normal(0, 0.006, len(log_returns))
+        close = pd.Series(100 * np.exp(np.concatenate([[0], np.cumsum(steps)])), index=df.index)
+        prices[f'A{a}'], scores[f'A{a}'] = close, np.tanh(close.pct_change(6).fillna(0) * 15)
+    prices, scores = pd.DataFrame(prices), pd.DataFrame(scores)
+    # One asset lists late, one stops trading early
+    prices.iloc[:1000, 3] = np.nan
+    prices.iloc[-300:, 7] = np.nan
+    return prices, scores
+
+def test_single_asset_matches_backtester():
+    df = load_frame(scored=True)
+    backtester = Backtester(df)
+    results_ref, metrics = backtester.run_backtest(**PARAMS)
+    as_panel = {'BTCUSDT': df}
+    for engine in PORTFOLIO_ENGINES:
+        portfolio = PortfolioBacktester(panel(as_panel, 'close'), panel(as_panel, 'unum_score'),
+                                        highs=panel(as_panel, 'high'), lows=panel(as_panel, 'low'))
+        # The whole balance in one position is the single-asset backtest
+        results, portfolio_metrics = portfolio.run(position_size=1.0, engine=engine, **PARAMS)
+        assert np.array_equal(results['equity_curve'].values, results_ref['equity_curve'].values), engine
+        assert np.array_equal(portfolio.positions[:, 0], results_ref['signal'].values), engine
+        assert np.array_equal(portfolio.trades[list(backtester.trades.dtype.names)], backtester.trades), engine
+        assert {k: portfolio_metrics[k] for k in metrics} == metrics, engine
+
+def test_portfolio_engines_and_caps():
+    df = load_frame(scored=True)
+    prices, scores = _synthetic_panel(df)
+    runs = {}
+    for engine in PORTFOLIO_ENGINES:
+        portfolio = PortfolioBacktester(prices, scores)
+        results, metrics = portfolio.run(position_size=0.15, sizing='score', max_positions=5,
+                                         max_gross_exposure=0.6, engine=engine, **PARAMS)
+        runs[engine] = (results, metrics, portfolio)
+    ref_results, ref_metrics, reference = runs['python']
+    ref_trades = reference.trades
+    for engine, (results, metrics, portfolio) in runs.items():
+        trades = portfolio.trades
+        # Identical trades; equity equal to rounding (numpy sums asset values pairwise)
+        np.testing.assert_allclose(results['equity_curve'], ref_results['equity_curve'], rtol=1e-12)
+        assert np.array_equal(trades[['asset', 'entry_time', 'exit_time', 'exit_reason']],
+                              ref_trades[['asset', 'entry_time', 'exit_time', 'exit_reason']]), engine
+        assert metrics == ref_metrics, engine
+
+    results, metrics, portfolio = runs['python']
+    trades = portfolio.trades
+    assert (results['open_positions'] <= 5).all() and metrics['max_open_positions'] == 5
+    # The exposure cap limits new positions; held ones may drift above it
+    assert (results['gross_exposure'].loc[np.unique(trades['entry_time'])] <= 0.6 + 1e-9).all()
+    # No trades outside an asset's listed bars, none overlapping on one asset
+    assert not (trades['asset'] == 3).any() or trades['entry_time'][trades['asset'] == 3].min() >= prices.index[1000]
+    for a in range(prices.shape[1]):
+        own = trades[trades['asset'] == a]
+        assert (own['entry_time'][1:] >= own['exit_time'][:-1]).all()
+    # Trade PnL and attribution add up to the portfolio result
+    final = results['equity_curve'].iloc[-1]
+    np.testing.assert_allclose(10000 + trades['pnl'].sum(), final, rtol=1e-9)
+    table = portfolio.attribution()
+    assert table['trades'].sum() == len(trades)
+    np.testing.assert_allclose(table['contribution_pct'].sum(), metrics['total_return_pct'], atol=0.1)
+    print(f"Portfolio: {metrics['total_return_pct']}% over {len(trades)} trades, exposure {metrics['avg_gross_exposure_pct']}%")
+
+def test_portfolio_speed():
+    # 50 assets of 4 years of 1h bars
+    hourly = load_frame('1h', indicators=False)
+    prices, scores = _synthetic_panel(hourly, n_assets=50, seed=1)
+    portfolio = PortfolioBacktester(prices, scores)
+    portfolio.run(position_size=0.05, max_positions=20, **PARAMS) # Compile
+    start = time.perf_counter()
+    _, metrics = portfolio.run(position_size=0.05, max_positions=20, **PARAMS)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 10
+    print(f"50 x {len(prices)} panel: {elapsed:.2f}s, {metrics['closed_trades']} trades")
+
+if __name__ == "__main__":
+    test_single_asset_matches_backtester()
+    test_portfolio_engines_and_caps()
+    test_portfolio_speed()
@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.backtest import Backtester
+from src.core.engine import EXIT_OPEN
+from src.core.robustness import (
+    PERIODS_PER_YEAR, simulate, path_metrics, point_metrics, trade_returns, trades_per_year, robustness_report
+)
+from src.testing import load_frame
+
+PARAMS = dict(sl_pct=0.015, tp_pct=0.03, trailing_sl_pct=0.015)
+
+def _backtest():
+    backtester = Backtester(load_frame(scored=True))
+    results, metrics = backtester.run_backtest(**PARAMS)
+    return backtester, results, metrics
+
+def test_path_metrics():
+    backtester, results, metrics = _backtest()
+    point = point_metrics(results['strategy_returns'].to_numpy())
+    # The observed stream reproduces the backtest's own metrics
+    assert round(point['total_return_pct'], 2) == metrics['total_return_pct']
+    assert round(point['max_drawdown_pct'], 2) == metrics['max_drawdown_pct']
+    assert round(point['sharpe_ratio'], 2) == metrics['sharpe_ratio']
+
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.001, 0.02, (50, 300))
+    batch = path_metrics(returns)
+    for row, r in enumerate(returns):
+        equity = np.concatenate([[1.0], np.cumprod(1 + r)])
+        peak = np.maximum.accumulate(equity)
+        assert np.isclose(batch['total_return_pct'][row], (equity[-1] - 1) * 100)
+        assert np.isclose(batch['max_drawdown_pct'][row], ((equity - peak) / peak).min() * 100)
+        assert np.isclose(batch['sharpe_ratio'][row], r.mean() / r.std(ddof=1) * np.sqrt(PERIODS_PER_YEAR))
+
+def test_simulations():
+    backtester, results, metrics = _backtest()
+    returns = results['strategy_returns'].to_numpy()
+
+    # Same seed, same samples, whatever the worker count
+    one = simulate(returns, n_sims=600, seed=7, workers=1)
+    many = simulate(returns, n_sims=600, seed=7, workers=4)
+    assert all(np.array_equal(one[k], many[k]) for k in one)
+    assert not np.array_equal(one['total_return_pct'], simulate(returns, n_sims=600, seed=8)['total_return_pct'])
+
+    # Shuffling trades keeps the compounded return and only moves the drawdown
+    trades = trade_returns(backtester.trades)
+    shuffled = simulate(trades, 'trade_shuffle', n_sims=500, seed=1)
+    point = point_metrics(trades)
+    np.testing.assert_allclose(shuffled['total_return_pct'], point['total_return_pct'], rtol=1e-9)
+    assert shuffled['max_drawdown_pct'].std() > 0
+    # Extra costs only make things worse
+    costly = simulate(trades, 'trade_shuffle', n_sims=500, seed=1, slippage=0.0005)
+    assert (costly['total_return_pct'] < shuffled['total_return_pct']).all()
+
+    # Annualized over the closed trades only, as resampled
+    ledger = backtester.trades
+    closed = ledger[ledger['exit_reason'] != EXIT_OPEN]
+    with_open = np.concatenate([closed, closed[-1:]])
+    with_open['exit_reason'][-1] = EXIT_OPEN
+    assert trades_per_year(with_open) == trades_per_year(closed)
+
+    samples = simulate(trades, 'trade_bootstrap', n_sims=2000, seed=2, periods_per_year=trades_per_year(backtester.trades))
+    report = robustness_report(samples, point, confidence=0.9)
+    interval = report['metrics']['total_return_pct']
+    assert report['simulations'] == 2000 and interval['lower'] < interval['median'] < interval['upper']
+    assert 0 <= report['prob_loss_pct'] <= 100 and 0 <= interval['point_percentile'] <= 100
+
+    for bad in (lambda: simulate(returns, 'jackknife'), lambda: simulate(returns, block=10 ** 6),
+                lambda: simulate(returns[:2], n_sims=0)):
+        try:
+            bad()
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+
+def test_simulation_speed():
+    _, results, _ = _backtest()
+    start = time.perf_counter()
+    samples = simulate(results['strategy_returns'].to_numpy(), n_sims=10000, seed=0)
+    elapsed = time.perf_counter() - start
+    assert len(samples['sharpe_ratio']) == 10000 and elapsed < 30
+    print(f"10k block bootstrap runs of {len(results)} bars: {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    test_path_metrics()
+    test_simulations()
+    test_simulation_speed()
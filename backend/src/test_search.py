@@ -0,0 +1,103 @@
+import sys
+import os
+import time
+import json
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.strategy import SignalAggregator, CATEGORIES
+from src.core.backtest import Backtester
+from src.core.optimizer import OptimizerPool, SharedFrame
+from src.core.search import Search, SearchSpace, SearchJob, TPESampler
+from src.testing import load_frame
+
+def test_search_space_decode():
+    space = SearchSpace()
+    assert space.dims == 5 + 1 + 3 + 9
+    rng = np.random.default_rng(0)
+    for u in rng.random((50, space.dims)):
+        candidate = space.decode(u)
+        backtest = candidate['backtest']
+        assert 0.1 <= backtest['long_threshold'] <= 0.9 and -0.9 <= backtest['short_threshold'] <= -0.1
+        assert 0.005 <= backtest['sl_pct'] <= 0.05
+        assert abs(sum(candidate['weights'].values()) - 1) < 1e-5
+        assert all(abs(sum(sub.values()) - 1) < 1e-5 for sub in candidate['sub_weights'].values())
+    assert space.decode(np.zeros(space.dims))['backtest']['allowed_sessions'] is None
+
+def test_tpe_concentrates_on_good_region():
+    # Maximise -|u - 0.8|^2: TPE proposals should land closer to the optimum than uniform ones
+    rng = np.random.default_rng(1)
+    sampler = TPESampler(rng)
+    x = rng.random((40, 4))
+    y = -((x - 0.8) ** 2).sum(axis=1)
+    proposals = sampler.ask(20, 4, x, y)
+    assert proposals.shape == (20, 4) and ((proposals >= 0) & (proposals <= 1)).all()
+    assert ((proposals - 0.8) ** 2).sum(axis=1).mean() < ((x - 0.8) ** 2).sum(axis=1).mean()
+
+def test_successive_halving_search():
+    df = load_frame()
+    pool = OptimizerPool(max_workers=2)
+    shared = SharedFrame(df)
+    try:
+        evaluate = lambda candidates: pool.evaluate(shared.descriptor, candidates)
+        space = SearchSpace(fixed={'skip_weekends': True})
+        search = Search(space, len(df), sampler='tpe', batch=9, eta=3, rungs=3, seed=7)
+        assert search.fidelities == [len(df) // 9, len(df) // 3, len(df)]
+        best = search.run(evaluate, max_evals=6)
+
+        # 9 @ 1/9, 3 @ 1/3, 1 @ full per round: 3 full-backtest equivalents per round
+        assert search.rounds == 2 and abs(search.cost - 6) < 0.01
+        assert len(search.trials) == 26 and len(search.full_trials()) == 2
+        # Survivors of each rung are its best trials
+        rung0 = [t for t in search.trials if t['round'] == 0 and t['bars'] == len(df) // 9]
+        rung1 = [t for t in search.trials if t['round'] == 0 and t['bars'] == len(df) // 3]
+        cutoff = sorted(t['metrics']['total_return_pct'] for t in rung0)[-3]
+        assert all(t['metrics']['total_return_pct'] >= cutoff for t in [r for r in rung0 if r['u'] in [s['u'] for s in rung1]])
+
+        # Full-history trials match an in-process run of the same candidate
+        candidate = best['candidate']
+        df_run = df.copy()
+        aggregator = SignalAggregator(df_run, custom_weights=candidate['weights'])
+        aggregator.sub_weights = candidate['sub_weights']
+        aggregator.calculate_unum_score()
+        _, metrics = Backtester(df_run).run_backtest(**candidate['backtest'])
+        assert best['metrics'] == {k: float(v) for k, v in metrics.items()}
+
+        # Resuming from the JSON state continues the same sequence
+        state = json.loads(json.dumps(search.state_dict()))
+        resumed = Search.from_state(space, state)
+        resumed.run(evaluate, max_evals=3)
+        search.run(evaluate, max_evals=3)
+        assert [t['u'] for t in resumed.trials] == [t['u'] for t in search.trials]
+        assert resumed.rounds == 3
+    finally:
+        shared.release()
+        pool.shutdown()
+
+def test_search_job():
+    df = load_frame()
+    pool = OptimizerPool(max_workers=2)
+    try:
+        search = Search(SearchSpace(sub_weights=False), len(df), sampler='random', halving=False, batch=4, seed=3)
+        job = SearchJob(search, max_evals=8, max_seconds=60)
+        pool.start_driver(job, df)
+        deadline = time.time() + 120
+        while job.status == 'running' and time.time() < deadline:
+            time.sleep(0.2)
+        snapshot = job.snapshot()
+    finally:
+        pool.shutdown()
+
+    assert snapshot['status'] == 'done', snapshot['errors']
+    assert snapshot['full_backtests'] == 8 and snapshot['cost'] == 8
+    assert set(snapshot['best_weights']) == set(CATEGORIES)
+    assert job.shared is None
+    print(f"Search best: {snapshot['best']['backtest']} ROI: {snapshot['best_roi']}%")
+
+if __name__ == "__main__":
+    test_search_space_decode()
+    test_tpe_concentrates_on_good_region()
+    test_successive_halving_search()
+    test_search_job()
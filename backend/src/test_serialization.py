@@ -0,0 +1,42 @@
+import sys
+import os
+import orjson
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.indicators import Indicators
+from src.api.serialization import select_frame, to_records, to_columns
+
+def test_serializers_match_row_cleaning():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    df = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_4h.csv'), index_col='timestamp', parse_dates=True)
+    df = Indicators(df).add_all_indicators()
+    recent = select_frame(df, limit=500)
+
+    # Reference: the per-cell cleaning the endpoint used to do
+    expected = []
+    for row in recent.reset_index().to_dict(orient='records'):
+        clean_row = {k: (None if pd.isna(v) else v) for k, v in row.items()}
+        clean_row['timestamp'] = row['timestamp'].isoformat()
+        clean_row['market_state'] = 'trending'
+        expected.append(clean_row)
+
+    records = orjson.loads(orjson.dumps(to_records(recent, {'market_state': 'trending'}), option=orjson.OPT_SERIALIZE_NUMPY))
+    assert records == orjson.loads(orjson.dumps(expected))
+    # Warm-up NaNs become null
+    assert orjson.loads(orjson.dumps(to_records(df.iloc[:5])))[0]['SMA_200'] is None
+
+    columns = orjson.loads(orjson.dumps(to_columns(recent), option=orjson.OPT_SERIALIZE_NUMPY))
+    assert columns['timestamp'] == [r['timestamp'] for r in records]
+    assert columns['close'] == [r['close'] for r in records]
+
+    # Paging and projection
+    page = select_frame(df, columns='close,RSI', limit=10, since=str(df.index[-30]))
+    assert len(page) == 10 and page.index[-1] == df.index[-1] and len(page.columns) == 2
+    assert len(select_frame(df, limit=500, since=str(df.index[-5]))) == 5
+    print(f"Serialized {len(records)} rows, {len(orjson.dumps(columns))} bytes column-oriented.")
+
+if __name__ == "__main__":
+    test_serializers_match_row_cleaning()
@@ -0,0 +1,42 @@
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.storage import OHLCVStore
+
+def test_store_roundtrip():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    data_path = os.path.join(base_dir, 'data', 'BTCUSDT_4h.csv')
+    df = pd.read_csv(data_path, index_col='timestamp', parse_dates=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        store.import_csv(data_path, 'BTCUSDT', '4h')
+        loaded = store.read('BTCUSDT', '4h')
+
+        # Same values and timestamps, int64 epoch index, read-only mapping
+        assert loaded.index.dtype == 'datetime64[ns]'
+        assert (loaded.index == df.index).all()
+        np.testing.assert_array_equal(loaded.to_numpy(), df[loaded.columns].to_numpy())
+        assert not loaded['close'].to_numpy().flags.writeable
+
+        # Atomic replace: an existing mapping stays valid after a rewrite
+        version = store.version('BTCUSDT', '4h')
+        store.write('BTCUSDT', '4h', df.iloc[:100])
+        assert len(store.read('BTCUSDT', '4h')) == 100
+        assert len(loaded) == len(df) and loaded['close'].iloc[-1] == df['close'].iloc[-1]
+        assert store.version('BTCUSDT', '4h') != version
+
+        # CSV export re-imports cleanly
+        csv_path = store.export_csv('BTCUSDT', '4h', os.path.join(tmp, 'export.csv'))
+        store.import_csv(csv_path, 'BTCUSDT', '2h')
+        pd.testing.assert_frame_equal(store.read('BTCUSDT', '2h'), store.read('BTCUSDT', '4h'))
+    print(f"Round-tripped {len(df)} rows.")
+
+if __name__ == "__main__":
+    test_store_roundtrip()
@@ -1,6 +1,8 @@
 
 import sys
 import os
+import time
+import numpy as np
 import pandas as pd
 
 
@@ -8,7 +10,8 @@ import pandas as pd
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.core.indicators import Indicators
-from src.core.strategy import SignalAggregator
+from src.core.strategy import SignalAggregator, UnumScorer, MarketState, state_for_adx
+from src.timeframes import resample_ohlcv
 
 def test_strategy():
     # Load 4h and 1h data
@@ -47,5 +50,139 @@ def test_strategy():
     cols = ['close', 'unum_score', 'sig_ma', 'sig_macd', 'ADX']
     print(df_4h[cols].tail(10))
 
+def test_mtf_confirmation_every_bar():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    base = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_1h.csv'), index_col='timestamp', parse_dates=True)
+    df = Indicators(resample_ohlcv(base, '4h')).add_all_indicators()
+    df_1h = Indicators(base).add_all_indicators()
+    df_2h = Indicators(resample_ohlcv(base, '2h')).add_all_indicators()
+
+    plain = SignalAggregator(df, inplace=False).calculate_unum_score().to_numpy()
+    scores = SignalAggregator(df, other_dfs={'1h': df_1h}, inplace=False).calculate_unum_score().to_numpy()
+    # Cached SMA_50 and a recomputed rolling mean give the same confirmation
+    np.testing.assert_array_equal(scores, SignalAggregator(df, other_dfs={'1h': base}, inplace=False).calculate_unum_score().to_numpy())
+
+    # Every bar is confirmed, not only the last one
+    ratio = scores[~np.isnan(plain) & (plain != 0)] / plain[~np.isnan(plain) & (plain != 0)]
+    assert set(np.unique(ratio)) == {0.5, 1.0}
+    both = SignalAggregator(df, other_dfs={'1h': df_1h, '2h': df_2h}, inplace=False).calculate_unum_score().to_numpy()
+    assert set(np.unique(both[~np.isnan(plain) & (plain != 0)] / plain[~np.isnan(plain) & (plain != 0)])) == {0.25, 0.5, 1.0}
+
+    # No lookahead: a bar's score only depends on 1h candles closed by the bar's close
+    for end in [300, 2000, len(df) - 5]:
+        closed_at = df.index[end - 1] + pd.Timedelta(hours=4)
+        upto = base[base.index < closed_at]
+        truncated = Indicators(resample_ohlcv(upto, '4h')).add_all_indicators()
+        expected = SignalAggregator(truncated, other_dfs={'1h': upto}).calculate_unum_score().iloc[-1]
+        np.testing.assert_allclose(scores[end - 1], expected, rtol=1e-12)
+    print(f"MTF dampened {np.sum(ratio == 0.5)} of {len(ratio)} bars")
+
+def test_per_bar_regimes():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    df = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_4h.csv'), index_col='timestamp', parse_dates=True)
+    df = Indicators(df).add_all_indicators()
+
+    aggregator = SignalAggregator(df, inplace=False)
+    scores = aggregator.calculate_unum_score()
+    regimes = aggregator.regimes
+    assert list(regimes) == [state_for_adx(adx).value for adx in df['ADX']]
+    assert aggregator.state.value == regimes.iloc[-1]
+
+    # Each bar is weighted with its own regime: its score does not change as later bars arrive
+    for end in [500, 3000]:
+        expected = SignalAggregator(df.iloc[:end]).calculate_unum_score().iloc[-1]
+        np.testing.assert_allclose(scores.iloc[end - 1], expected, rtol=1e-12)
+
+    index = aggregator.regime_index
+    segments = index.segments()
+    assert segments['bars'].sum() == len(df) and len(segments) == len(index)
+    assert (segments['regime'].astype(str).to_numpy()[1:] != segments['regime'].astype(str).to_numpy()[:-1]).all()
+    trending = index.segments(MarketState.TRENDING)
+    assert (trending['regime'] == 'trending').all()
+    assert trending['bars'].sum() == (regimes == 'trending').sum()
+    row = segments.iloc[len(segments) // 2]
+    assert index.at(row['end']) == (MarketState(row['regime']), row['start'])
+    assert index.at(df.index[0] - pd.Timedelta(hours=4)) is None
+    print(f"{len(segments)} regime segments, {len(trending)} trending")
+
+def _reference_score(df, signals, weights):
+    # Category sums, filters and persistence as separate Series steps (the previous formulation)
+    trend = signals['sig_ma'] * 0.4 + signals['sig_macd'] * 0.3 + signals['sig_aroon'] * 0.3
+    vol = signals['sig_fib'] * 0.5 + signals['sig_obv'] * 0.3 + signals['sig_atr'] * 0.2
+    mom = signals['sig_rsi'] * 0.4 + signals['sig_stoch'] * 0.3 + signals['sig_cci'] * 0.3
+    raw = trend * weights['trend'] + vol * weights['volume_levels'] + mom * weights['momentum']
+    raw = np.round(raw, 12)
+    adx_filter = np.where(df['ADX'] > 22, 1.0, 0.2)
+    vol_spike = np.where(df['volume'] > df['VOL_SMA'] * 1.2, 1.0, 0.5)
+    score = pd.Series(raw * adx_filter * vol_spike * signals['sig_atr'], index=df.index)
+    prev = score.shift(1).fillna(0)
+    return (score * np.where(np.sign(score) == np.sign(prev), 1.0, 0.5)).to_numpy()
+
+def test_scorer_reweights_signal_matrix():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    df = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_4h.csv'), index_col='timestamp', parse_dates=True)
+    df = Indicators(df).add_all_indicators()
+
+    aggregator = SignalAggregator(df, inplace=False)
+    start = time.perf_counter()
+    scores = aggregator.calculate_unum_score().to_numpy()
+    full_sec = time.perf_counter() - start
+    scorer = aggregator.scorer()
+    assert scorer.signals.shape == (len(df), 9)
+    np.testing.assert_array_equal(scorer.score(), scores)
+
+    start = time.perf_counter()
+    for weights in [{'trend': 0.4, 'volume_levels': 0.4, 'momentum': 0.2},
+                    {'trend': 0.1, 'volume_levels': 0.3, 'momentum': 0.6},
+                    {'trend': 1.0, 'volume_levels': 0.0, 'momentum': 0.0}]:
+        fast = scorer.score(weights)
+        np.testing.assert_allclose(fast, _reference_score(df, aggregator.columns, weights), rtol=1e-12, atol=1e-12)
+        # Custom weights replace the regime weights
+        custom = SignalAggregator(df, custom_weights=weights, inplace=False).calculate_unum_score()
+        np.testing.assert_array_equal(custom.to_numpy(), fast)
+    reweight_sec = (time.perf_counter() - start) / 3
+
+    # Round trip through the cacheable frame form
+    restored = UnumScorer.from_frame(scorer.to_frame())
+    np.testing.assert_array_equal(restored.score(), scores)
+    np.testing.assert_array_equal(restored.score({'trend': 0.2}), scorer.score({'trend': 0.2}))
+    start = time.perf_counter()
+    restored.score({'trend': 0.5, 'volume_levels': 0.3, 'momentum': 0.2})
+    print(f"Full scoring {full_sec * 1000:.1f} ms, re-weighting {(time.perf_counter() - start) * 1000:.2f} ms")
+
+def test_score_batch():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    base = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_1h.csv'), index_col='timestamp', parse_dates=True)
+    df = Indicators(resample_ohlcv(base, '4h')).add_all_indicators()
+    aggregator = SignalAggregator(df, other_dfs={'1h': base}, inplace=False)
+
+    weights = np.array([[0.4, 0.4, 0.2], [1.0, 0.0, 0.0], [0.2, 0.3, 0.5]])
+    start = time.perf_counter()
+    batch = aggregator.score_batch(weights)
+    batch_sec = time.perf_counter() - start
+    assert batch.shape == (3, len(df))
+    scorer = aggregator.scorer()
+    for row, w in zip(batch, weights):
+        expected = SignalAggregator(df, other_dfs={'1h': base}, custom_weights=dict(zip(['trend', 'volume_levels', 'momentum'], w)),
+                                    inplace=False).calculate_unum_score().to_numpy()
+        np.testing.assert_allclose(row, expected, rtol=1e-12, atol=1e-15)
+
+    # Sub-weights per row: moving all trend weight onto MACD
+    sub = np.tile(scorer.sub, (2, 1))
+    sub[1, :3] = [0.0, 1.0, 0.0]
+    with_sub = aggregator.score_batch(weights[:2], sub)
+    np.testing.assert_array_equal(with_sub[0], batch[0])
+    macd_only = np.sign(scorer.signals[:, 1] * scorer.filters)
+    assert np.array_equal(np.sign(with_sub[1])[~np.isnan(with_sub[1])], macd_only[~np.isnan(with_sub[1])])
+
+    large = np.random.default_rng(0).dirichlet(np.ones(3), size=500)
+    start = time.perf_counter()
+    assert aggregator.score_batch(large).shape == (500, len(df))
+    print(f"Batch of 3 (incl. signals) {batch_sec * 1000:.1f} ms, 500 weight vectors {(time.perf_counter() - start) * 1000:.1f} ms")
+
 if __name__ == "__main__":
     test_strategy()
+    test_mtf_confirmation_every_bar()
+    test_per_bar_regimes()
+    test_scorer_reweights_signal_matrix()
+    test_score_batch()
@@ -0,0 +1,48 @@
+import sys
+import os
+import asyncio
+import numpy as np
+import pandas as pd
+import orjson
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.indicators import Indicators
+from src.core.strategy import SignalAggregator
+from src.timeframes import resample_ohlcv
+from src.api.stream import CandleHub, ReplaySource
+
+def test_hub_fans_out_incremental_scores():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    base = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_1h.csv'), index_col='timestamp', parse_dates=True)
+    # Start mid-bar so warm-up leaves a forming 4h candle behind
+    history, live = base.iloc[:-42], base.iloc[-42:]
+
+    async def run():
+        hub = CandleHub('4h', source=ReplaySource(live, interval=0))
+        hub.warm_up(history)
+        queues = [hub.subscribe() for _ in range(3)]
+        await hub.run()
+        return [[q.get_nowait() for _ in range(q.qsize())] for q in queues]
+
+    received = asyncio.run(run())
+    # One computation, identical payloads for every subscriber (snapshot first)
+    assert received[0] == received[1] == received[2]
+    messages = [orjson.loads(m) for m in received[0]]
+    assert len(messages) == 1 + len(resample_ohlcv(live, '4h'))
+
+    for message in messages[:2] + messages[-2:]:
+        ts = pd.Timestamp(message['data']['timestamp'])
+        upto = base[base.index < ts + pd.Timedelta(hours=4)]
+        df = Indicators(resample_ohlcv(upto, '4h')).add_all_indicators()
+        aggregator = SignalAggregator(df, other_dfs={'1h': upto})
+        expected = aggregator.calculate_unum_score().iloc[-1]
+        assert df.index[-1] == ts
+        np.testing.assert_allclose(message['data']['close'], df['close'].iloc[-1])
+        np.testing.assert_allclose(message['data']['unum_score'], expected, rtol=1e-9)
+        assert message['data']['market_state'] == aggregator.state.value
+    print(f"Pushed {len(messages)} bars, last score {messages[-1]['data']['unum_score']:.4f}")
+
+if __name__ == "__main__":
+    test_hub_fans_out_incremental_scores()
@@ -0,0 +1,51 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.indicators import Indicators
+from src.core.strategy import SignalAggregator
+from src.core.streaming import StreamingIndicators, StreamingUnumScore
+
+def test_streaming_matches_batch():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    data_path = os.path.join(base_dir, 'data', 'BTCUSDT_4h.csv')
+    df = pd.read_csv(data_path, index_col='timestamp', parse_dates=True)
+
+    batch = Indicators(df).add_all_indicators()
+
+    # Warm up on history, then stream the last candles one by one
+    history, live = df.iloc[:-50], df.iloc[-50:]
+    engine = StreamingIndicators()
+    warm = engine.run(history)
+    rows = [engine.update(candle) for candle in live.to_dict('records')]
+    stream = pd.concat([warm, pd.DataFrame(rows, index=live.index)])
+
+    assert list(stream.columns) == list(batch.columns)
+    for col in batch.columns:
+        np.testing.assert_allclose(stream[col].to_numpy(float), batch[col].to_numpy(float),
+                                   rtol=1e-6, atol=1e-8, equal_nan=True, err_msg=col)
+    print("Last streamed row:\n", stream.tail(1).T)
+
+def test_streaming_score_matches_batch():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    df = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_4h.csv'), index_col='timestamp', parse_dates=True)
+
+    engine, scorer = StreamingIndicators(), StreamingUnumScore()
+    scores = []
+    for candle in df.to_dict('records'):
+        scores.append(scorer.update(engine.update(candle))['unum_score'])
+
+    # Each streamed score is the batch score of the series ending at that bar
+    for end in [250, 1000, 4000, len(df) - 7, len(df)]:
+        aggregator = SignalAggregator(Indicators(df.iloc[:end]).add_all_indicators())
+        expected = aggregator.calculate_unum_score().iloc[-1]
+        np.testing.assert_allclose(scores[end - 1], expected, rtol=1e-9, equal_nan=True, err_msg=str(end))
+    print(f"Streamed {len(scores)} scores, last {scores[-1]:.4f}")
+
+if __name__ == "__main__":
+    test_streaming_matches_batch()
+    test_streaming_score_matches_batch()
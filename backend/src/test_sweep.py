@@ -0,0 +1,40 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.backtest import Backtester
+from src.core.sweep import ParameterSweep, SWEEP_ENGINES, PARAM_COLUMNS
+from src.testing import load_frame
+
+def test_sweep_matches_backtester():
+    df = load_frame(scored=True)
+
+    grids = dict(
+        long_thresholds=[0.1, 0.3],
+        short_thresholds=[-0.1, -0.3],
+        sl_pcts=[0.01, 0.03],
+        tp_pcts=[0.02, 0.05],
+        trailing_sl_pcts=[0.01, 0.02]
+    )
+    sweep = ParameterSweep(df)
+    for engine in SWEEP_ENGINES:
+        table = sweep.run(allowed_sessions=['european', 'american'], engine=engine, **grids)
+        assert len(table) == 32
+        # Ranked best-first
+        assert table['total_return_pct'].is_monotonic_decreasing
+
+        for _, row in table.iterrows():
+            params = {col: row[col] for col in PARAM_COLUMNS}
+            _, metrics = Backtester(df).run_backtest(allowed_sessions=['european', 'american'], **params)
+            assert int(row['total_trades']) == metrics['total_trades'], (engine, params)
+            assert row['final_balance'] == metrics['final_balance'], (engine, params)
+            assert row['total_return_pct'] == metrics['total_return_pct'], (engine, params)
+            assert row['win_rate_pct'] == metrics['win_rate_pct'], (engine, params)
+            assert row['max_drawdown_pct'] == metrics['max_drawdown_pct'], (engine, params)
+            assert abs(row['sharpe_ratio'] - metrics['sharpe_ratio']) <= 0.01, (engine, params)
+        print(f"[{engine}] best combo:\n{table.head(1).T}")
+
+if __name__ == "__main__":
+    test_sweep_matches_backtester()
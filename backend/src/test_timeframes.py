@@ -0,0 +1,64 @@
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.storage import OHLCVStore
+from src.core.cache import FrameCache
+from src.timeframes import TimeframeStore, resample_ohlcv
+from src.core.periods import parse_timeframe
+
+def test_resample_matches_exchange_candles():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    df_1h = pd.read_csv(os.path.join(base_dir, 'data', 'BTCUSDT_1h.csv'), index_col='timestamp', parse_dates=True)
+
+    for tf in ['2h', '4h']:
+        fetched = pd.read_csv(os.path.join(base_dir, 'data', f'BTCUSDT_{tf}.csv'), index_col='timestamp', parse_dates=True)
+        derived = resample_ohlcv(df_1h, tf)
+        assert (derived.index == fetched.index).all()
+        # The 1h history misses one candle and the last 4h candle was fetched while still open
+        mismatched = ~np.isclose(derived.to_numpy(), fetched[derived.columns].to_numpy(), rtol=1e-9).all(axis=1)
+        assert mismatched[:-1].sum() <= 1
+
+    # Same result as pandas' resampler (which keeps empty buckets as NaN)
+    expected = df_1h.resample('24h', origin='epoch').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}).dropna()
+    pd.testing.assert_frame_equal(resample_ohlcv(df_1h, '1d'), expected, check_freq=False, check_index_type=False)
+
+    weekly = resample_ohlcv(df_1h, '1w')
+    assert (weekly.index.dayofweek == 0).all()
+    assert parse_timeframe('8h') == 8 * 3600
+    print(f"Derived {len(weekly)} weekly candles.")
+
+def test_timeframe_store_cache():
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        store.import_csv(os.path.join(base_dir, 'data', 'BTCUSDT_1h.csv'), 'BTCUSDT', '1h')
+        cache = FrameCache()
+        timeframes = TimeframeStore(store, cache=cache)
+
+        first = timeframes.load('BTCUSDT', '12h')
+        second = timeframes.load('BTCUSDT', '12h')
+        assert cache.hits == 1 and cache.misses == 1
+        pd.testing.assert_frame_equal(first, second)
+
+        # A base sync changes the version and the derived series follows it
+        store.write('BTCUSDT', '1h', store.read('BTCUSDT', '1h', mmap=False).iloc[:48])
+        assert len(timeframes.load('BTCUSDT', '12h')) == len(resample_ohlcv(store.read('BTCUSDT', '1h'), '12h'))
+        assert cache.stats()['entries'] == 1
+
+        assert not timeframes.supports('90m') and not timeframes.supports('abc')
+        try:
+            timeframes.load('BTCUSDT', '30m')
+            assert False, "30m cannot be derived from 1h"
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    test_resample_matches_exchange_candles()
+    test_timeframe_store_cache()
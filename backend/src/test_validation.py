@@ -0,0 +1,95 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.strategy import SignalAggregator
+from src.core.backtest import Backtester
+from src.core.optimizer import OptimizerPool, simplex_weights, weight_candidates
+from src.core.validation import ValidationJob, walk_forward_splits, purged_kfold_splits, run_segments
+from src.testing import load_frame
+
+BACKTEST_PARAMS = {'sl_pct': 0.015, 'tp_pct': 0.03, 'trailing_sl_pct': 0.015}
+
+def test_splits():
+    rolling = walk_forward_splits(1000, 400, 100)
+    assert [f['test'] for f in rolling] == [(400, 500), (500, 600), (600, 700), (700, 800), (800, 900), (900, 1000)]
+    assert all(f['train'] == [(f['test'][0] - 400, f['test'][0])] for f in rolling)
+    anchored = walk_forward_splits(1000, 400, 100, step=200, anchored=True)
+    assert [f['train'] for f in anchored] == [[(0, 400)], [(0, 600)], [(0, 800)]]
+
+    kfold = purged_kfold_splits(1000, n_folds=4, purge=10, embargo=50)
+    assert [f['test'] for f in kfold] == [(0, 250), (250, 500), (500, 750), (750, 1000)]
+    assert kfold[0]['train'] == [(300, 1000)]
+    assert kfold[1]['train'] == [(0, 240), (550, 1000)]
+    assert kfold[3]['train'] == [(0, 740)]
+    for fold in kfold: # Test bars never train
+        train = np.concatenate([np.arange(a, b) for a, b in fold['train']])
+        assert not np.isin(train, np.arange(*fold['test'])).any()
+
+    for bad in (lambda: walk_forward_splits(100, 90, 20), lambda: purged_kfold_splits(100, n_folds=1)):
+        try:
+            bad()
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+
+def test_run_segments():
+    df = load_frame()
+    scores = SignalAggregator(df, inplace=False).calculate_unum_score().to_numpy()
+    _, ref = Backtester(df.iloc[1000:3000]).run_backtest(scores=scores[1000:3000], **BACKTEST_PARAMS)
+    assert run_segments(df, scores, [(1000, 3000)], BACKTEST_PARAMS) == ref
+
+    # Two segments trade as one account: balances compound, trades add up
+    first = run_segments(df, scores, [(0, 1000)], BACKTEST_PARAMS)
+    second = run_segments(df, scores, [(3000, 5000)], BACKTEST_PARAMS)
+    both = run_segments(df, scores, [(0, 1000), (3000, 5000)], BACKTEST_PARAMS)
+    assert both['total_trades'] == first['total_trades'] + second['total_trades']
+    np.testing.assert_allclose(both['final_balance'], first['final_balance'] * second['final_balance'] / 10000, rtol=1e-6)
+
+def test_walk_forward_job():
+    df = load_frame()
+    candidates = weight_candidates(simplex_weights(0.5), BACKTEST_PARAMS) + [{'backtest': BACKTEST_PARAMS}]
+    folds = walk_forward_splits(len(df), 2190, 1095)
+
+    pool = OptimizerPool(max_workers=2)
+    try:
+        job = ValidationJob(folds, candidates, method='rolling')
+        pool.start(job, df, job.tasks())
+        deadline = time.time() + 120
+        while job.status == 'running' and time.time() < deadline:
+            time.sleep(0.2)
+        snapshot = job.snapshot()
+    finally:
+        pool.shutdown()
+
+    assert snapshot['status'] == 'done', snapshot['errors']
+    assert [f['fold'] for f in snapshot['folds']] == list(range(len(folds)))
+    assert job.shared is None
+
+    # Each fold keeps its best in-sample candidate and reports it on the unseen bars
+    for fold in snapshot['folds']:
+        (train_start, train_stop), (test_start, test_stop) = fold['train'][0], fold['test']
+        in_sample = []
+        for candidate in candidates:
+            scores = SignalAggregator(df, custom_weights=candidate.get('weights'), inplace=False).calculate_unum_score().to_numpy()
+            _, metrics = Backtester(df.iloc[train_start:train_stop]).run_backtest(
+                scores=scores[train_start:train_stop], **BACKTEST_PARAMS)
+            in_sample.append(metrics['total_return_pct'])
+            if candidate == fold['best']:
+                _, oos = Backtester(df.iloc[test_start:test_stop]).run_backtest(
+                    scores=scores[test_start:test_stop], **BACKTEST_PARAMS)
+                assert fold['out_of_sample'] == {k: float(v) for k, v in oos.items()}
+        assert fold['in_sample']['total_return_pct'] == max(in_sample)
+
+    summary = snapshot['out_of_sample']
+    assert summary['folds'] == len(folds)
+    print(f"Walk-forward out-of-sample: {summary}")
+
+if __name__ == "__main__":
+    test_splits()
+    test_run_segments()
+    test_walk_forward_job()
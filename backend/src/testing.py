@@ -0,0 +1,35 @@
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+from src.core.indicators import Indicators
+from src.core.strategy import SignalAggregator
+
+# Market data shared by the test modules: each frame is read and enriched
+# once per session (pytest or a test module run as a script), callers get copies.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data')
+
+
+@lru_cache(maxsize=None)
+def _cached_frame(timeframe, stage):
+    if stage == 'ohlcv':
+        return pd.read_csv(os.path.join(DATA_DIR, f'BTCUSDT_{timeframe}.csv'), index_col='timestamp', parse_dates=True)
+    if stage == 'indicators':
+        return Indicators(_cached_frame(timeframe, 'ohlcv')).add_all_indicators()
+    df = _cached_frame(timeframe, 'indicators').copy()
+    SignalAggregator(df).calculate_unum_score()
+    return df
+
+
+def load_frame(timeframe='4h', indicators=True, scored=False) -> pd.DataFrame:
+    """
+    BTCUSDT candles of `timeframe`: raw OHLCV, with all indicators, or with
+    indicators and the default unum_score (scored=True). A fresh copy per call.
+    """
+    stage = 'scored' if scored else 'indicators' if indicators else 'ohlcv'
+    df = _cached_frame(timeframe, stage).copy()
+    # Own index object too: lookups build a hash table that memory_usage counts
+    df.index = df.index.copy(deep=True)
+    return df
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .storage import OHLCV_COLUMNS
+    from .core.periods import parse_timeframe
+except ImportError: # Executed as a script
+    from storage import OHLCV_COLUMNS
+    from core.periods import parse_timeframe
+
+BASE_TIMEFRAME = '1h'
+
+# Weekly candles open on Monday; the epoch (1970-01-01) was a Thursday
+_WEEK_OFFSET_NS = 4 * 86400 * 10**9
+
+
+def _bucket_ids(ts_ns, timeframe: str):
+    period_ns = parse_timeframe(timeframe) * 10**9
+    offset = _WEEK_OFFSET_NS if timeframe.endswith('w') else 0
+    return (ts_ns - offset) // period_ns, period_ns, offset
+
+
+def bucket_start(ts: pd.Timestamp, timeframe: str) -> pd.Timestamp:
+    """
+    Open time of the `timeframe` candle containing `ts`.
+    """
+    bucket, period_ns, offset = _bucket_ids(pd.Timestamp(ts).as_unit('ns').value, timeframe)
+    return pd.Timestamp(bucket * period_ns + offset)
+
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str, base: str = BASE_TIMEFRAME) -> pd.DataFrame:
+    """
+    Aggregates a sorted OHLCV series into `timeframe` candles, which must be a
+    whole multiple of `base`. Buckets are aligned to the epoch the way exchanges
+    align them (so 4h opens at 00/04/08 UTC, 1w on Monday), labelled by their
+    open time; buckets without any base candle are omitted.
+    """
+    period, base_period = parse_timeframe(timeframe), parse_timeframe(base)
+    if period % base_period:
+        raise ValueError(f"{timeframe} is not a multiple of {base}")
+
+    if df.empty:
+        return df[OHLCV_COLUMNS].copy()
+
+    ts = np.asarray(df.index, dtype='datetime64[ns]').view(np.int64)
+    bucket, period_ns, offset = _bucket_ids(ts, timeframe)
+    # First and last base candle of every bucket
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    columns = {
+        'open': df['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=np.float64), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=np.float64), starts),
+        'close': df['close'].to_numpy(dtype=np.float64)[ends],
+        'volume': np.add.reduceat(df['volume'].to_numpy(dtype=np.float64), starts)
+    }
+    index = pd.DatetimeIndex((bucket[starts] * period_ns + offset).view('datetime64[ns]'), name='timestamp')
+    return pd.DataFrame(columns, index=index)
+
+
+class TimeframeStore:
+    """
+    Serves any timeframe that is a multiple of the base from the stored base
+    series. Derived series are cached per base data version, so they are
+    rebuilt only after the base is synced.
+    """
+    def __init__(self, store, base: str = BASE_TIMEFRAME, cache=None):
+        self.store = store
+        self.base = base
+        self.cache = cache
+
+    def supports(self, timeframe: str) -> bool:
+        try:
+            return parse_timeframe(timeframe) % parse_timeframe(self.base) == 0
+        except ValueError:
+            return False
+
+    def version(self, symbol: str, timeframe: str):
+        """
+        Data version of a timeframe (that of its base series), for cache keys.
+        Read it before the data it keys: a concurrent sync can then only
+        cause a recompute, never a stale frame under a new version.
+        """
+        return self.store.version(symbol, self.base)
+
+    def load(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        """
+        Raises ValueError for timeframes that cannot be derived and
+        FileNotFoundError when the base series is missing.
+        """
+        if timeframe == self.base:
+            return self.store.load(symbol, timeframe)
+        if not self.supports(timeframe):
+            raise ValueError(f"{timeframe} is not a multiple of {self.base}")
+
+        base_df = self.store.load(symbol, self.base)
+        if self.cache is None:
+            return resample_ohlcv(base_df, timeframe, self.base)
+        version = self.version(symbol, timeframe) # Before the data (see version)
+        return self.cache.get_or_compute(
+            ('ohlcv', symbol, timeframe, version),
+            lambda: resample_ohlcv(self.store.read(symbol, self.base), timeframe, self.base),
+            group=('ohlcv', symbol, timeframe)
+        )
@@ -15,6 +15,9 @@ interface MarketData {
     market_state?: string;
 }
 
+// Only the columns the chart reads are requested from the API
+const CHART_COLUMNS = "close,unum_score,RSI,MACD";
+
 interface LatestSignal {
     timestamp: string;
     unum_score: number;
@@ -65,10 +68,10 @@ export default function Dashboard() {
     const [analyzing, setAnalyzing] = useState(false);
 
     useEffect(() => {
+        const baseUrl = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
         const fetchData = async () => {
             try {
-                const baseUrl = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
-                const resData = await fetch(`${baseUrl}/api/v1/market-data/${timeframe}`);
+                const resData = await fetch(`${baseUrl}/api/v1/market-data/${timeframe}?columns=${CHART_COLUMNS}`);
                 const jsonData = await resData.json();
                 setData(jsonData);
 
@@ -83,8 +86,38 @@ export default function Dashboard() {
         };
 
         fetchData();
-        const interval = setInterval(fetchData, 60000); // Update every minute
-        return () => clearInterval(interval);
+
+        // Closed candles are pushed by the server instead of polled
+        const subscribe = (tf: string, onRow: (row: any) => void) => {
+            const ws = new WebSocket(`${baseUrl.replace(/^http/, "ws")}/ws/stream?timeframe=${tf}`);
+            ws.onmessage = (event) => {
+                const message = JSON.parse(event.data);
+                if (message.type === "candle") onRow(message.data);
+            };
+            return ws;
+        };
+        const updateChart = (row: MarketData) => setData((prev) => {
+            const last = prev[prev.length - 1];
+            if (!last || last.timestamp < row.timestamp) return [...prev.slice(-499), row];
+            // The closed bar replaces the still-forming one served by /market-data
+            if (last.timestamp === row.timestamp) return [...prev.slice(0, -1), row];
+            return prev;
+        });
+        const updateLatest = (row: any) => setLatest({
+            timestamp: row.timestamp,
+            unum_score: row.unum_score,
+            close: row.close,
+            rsi: row.RSI,
+            macd: row.MACD,
+            obv_trend: row.sig_obv > 0 ? "Bullish" : "Bearish",
+            market_state: row.market_state
+        });
+
+        // The signal card always follows 4h
+        const sockets = timeframe === "4h"
+            ? [subscribe("4h", (row) => { updateChart(row); updateLatest(row); })]
+            : [subscribe(timeframe, updateChart), subscribe("4h", updateLatest)];
+        return () => sockets.forEach((ws) => ws.close());
     }, [timeframe]);
 
 
@@ -135,7 +168,8 @@ export default function Dashboard() {
                 tp_pct: (risk.tp / 100).toString(),
                 trailing_sl_pct: (risk.ts / 100).toString(),
                 skip_weekends: risk.skipWeekends.toString(),
-                sessions: selectedSessions
+                sessions: selectedSessions,
+                columns: CHART_COLUMNS
             });
             const baseUrl = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
             const res = await fetch(`${baseUrl}/api/v1/backtest?${params}`);
@@ -172,7 +206,13 @@ export default function Dashboard() {
             const baseUrl = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
             const res = await fetch(`${baseUrl}/api/v1/optimize?${params}`);
 
-            const json = await res.json();
+            // The optimizer runs as a background job: poll until it finishes
+            let json = await res.json();
+            while (json.job_id && json.status === "running") {
+                await new Promise((resolve) => setTimeout(resolve, 1000));
+                const resJob = await fetch(`${baseUrl}/api/v1/optimize/${json.job_id}?top=0`);
+                json = await resJob.json();
+            }
             if (json.best_weights) {
                 const newWeights = {
                     trend: json.best_weights.trend,
@@ -192,7 +232,8 @@ export default function Dashboard() {
                     tp_pct: (risk.tp / 100).toString(),
                     trailing_sl_pct: (risk.ts / 100).toString(),
                     skip_weekends: risk.skipWeekends.toString(),
-                    sessions: selectedSessions
+                    sessions: selectedSessions,
+                    columns: CHART_COLUMNS
                 });
                 const resBt = await fetch(`${baseUrl}/api/v1/backtest?${paramsBt}`);
 